@@ -0,0 +1,85 @@
+"""
+Compares the 13 separate analysis queries with the single-pass analysis engine.
+
+For every table size a synthetic database is built with the loader's indexes and
+rollup tables. The 13 `data_analysis` functions are timed one query at a time
+(bypassing the result cache), then `load_repositories` + `compute_all_analyses`
+are timed as one pass and every engine result is checked against its query.
+The script exits with an error if any result differs. Run from the repository root:
+
+    python benchmarks/bench_analysis_engine.py --sizes 100000,1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+from analysis_engine import compute_all_analyses, load_repositories  # noqa: E402
+from bench_indexes import ANALYSES, TABLE, build_database  # noqa: E402
+from connection_pool import close_all_pools, get_pool  # noqa: E402
+from push_to_sqlite import create_repository_indexes  # noqa: E402
+
+
+def time_queries():
+    started = time.perf_counter()
+    results = {name: getattr(data_analysis, name).__wrapped__() for name in ANALYSES}
+    return time.perf_counter() - started, results
+
+
+def time_engine(db_path):
+    started = time.perf_counter()
+    with get_pool(db_path).connection() as connection:
+        frame = load_repositories(connection, TABLE)
+    loaded = time.perf_counter()
+    results = compute_all_analyses(frame)
+    return loaded - started, time.perf_counter() - loaded, results
+
+
+def mismatches(expected, actual):
+    different = []
+    for name in ANALYSES:
+        try:
+            pd.testing.assert_frame_equal(actual[name], expected[name], check_dtype=False)
+        except AssertionError:
+            different.append(name)
+    return different
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000", help="comma-separated table sizes")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    failures = []
+    print(f"{'rows':>10} {'13 queries':>12} {'engine load':>12} {'engine compute':>15} {'engine total':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            db_path = os.path.join(directory, f"bench_{size}.db")
+            conn = build_database(db_path, size)
+            create_repository_indexes(conn, TABLE)
+            conn.close()
+            data_analysis.DB_PATH = db_path
+
+            queries_seconds, expected = time_queries()
+            load_seconds, compute_seconds, actual = time_engine(db_path)
+            close_all_pools()
+            print(f"{size:>10} {queries_seconds * 1000:>10.1f}ms {load_seconds * 1000:>10.1f}ms "
+                  f"{compute_seconds * 1000:>13.1f}ms {(load_seconds + compute_seconds) * 1000:>11.1f}ms")
+            failures.extend(f"{name} at {size} rows" for name in mismatches(expected, actual))
+
+    if failures:
+        print("\nEngine results differing from the queries:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nAll engine results match the analysis queries.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Load-tests the read-only HTTP JSON API.
+
+The API server is started in a background thread on a free port, over a synthetic
+database (or the database given with --db). Concurrent keep-alive clients then request
+the 13 analysis endpoints and pages of /api/repositories for a fixed duration, in three
+modes: every response served in full, full responses with gzip, and revalidation with
+`If-None-Match` (answered 304 from the ETag). The script reports requests/s and the
+p50/p99 latency of each mode, and fails if any request gets an unexpected status.
+Run from the repository root:
+
+    python benchmarks/bench_api.py --clients 32 --seconds 10
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+from api_server import ANALYSES, start_server  # noqa: E402
+from bench_indexes import TABLE, build_database  # noqa: E402
+from push_to_sqlite import create_repository_indexes  # noqa: E402
+
+TARGETS = [f"/api/{name}" for name in ANALYSES] + [
+    "/api/repositories?sort=stars&limit=50",
+    "/api/repositories?sort=forks&limit=50&language=Python",
+    "/api/repositories?sort=updated&limit=20&year_from=2015&year_to=2020",
+    "/api/top_repositories_per_language?metric=forks&k=5",
+]
+
+
+def run_server(workers):
+    """Starts the API server on its own event loop thread and returns its port."""
+    ready = threading.Event()
+    state = {}
+
+    def main():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(start_server("127.0.0.1", 0, workers=workers))
+        state["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=main, daemon=True).start()
+    ready.wait()
+    return state["port"]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, body
+
+
+async def client(port, deadline, mode, etags, latencies, errors, index):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = index
+    try:
+        while time.perf_counter() < deadline:
+            target = TARGETS[request % len(TARGETS)]
+            request += 1
+            headers = ["Host: localhost"]
+            if mode in ("gzip", "revalidate"):
+                headers.append("Accept-Encoding: gzip")
+            if mode == "revalidate" and target in etags:
+                headers.append(f"If-None-Match: {etags[target]}")
+            started = time.perf_counter()
+            writer.write((f"GET {target} HTTP/1.1\r\n" + "".join(f"{header}\r\n" for header in headers)
+                          + "\r\n").encode())
+            await writer.drain()
+            status, response_headers, _ = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            expected = 304 if mode == "revalidate" and target in etags else 200
+            if status != expected:
+                errors.append(f"{target}: {status} in {mode} mode")
+            etags.setdefault(target, response_headers.get("etag"))
+    finally:
+        writer.close()
+
+
+async def load(port, clients, seconds, mode, etags):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(port, deadline, mode, etags, latencies, errors, index)
+                           for index in range(clients)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="serve this database instead of a synthetic one")
+    parser.add_argument("--rows", type=int, default=200_000, help="rows of the synthetic database")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.db:
+            data_analysis.DB_PATH = args.db
+        else:
+            data_analysis.DB_PATH = os.path.join(directory, "bench.db")
+            conn = build_database(data_analysis.DB_PATH, args.rows)
+            create_repository_indexes(conn, TABLE)
+            conn.close()
+        port = run_server(args.workers)
+
+        failures, etags = [], {}
+        print(f"{args.clients} keep-alive clients, {args.seconds:.0f}s per mode, {len(TARGETS)} endpoints")
+        print(f"{'mode':<12}{'requests/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+        for mode in ("full", "gzip", "revalidate"):
+            latencies, errors = asyncio.run(load(port, args.clients, args.seconds, mode, etags))
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(f"{mode:<12}{len(latencies) / args.seconds:>12.0f}{quantiles[49] * 1000:>10.2f}"
+                  f"{quantiles[98] * 1000:>10.2f}")
+            failures.extend(errors[:5])
+
+    if failures:
+        print("\nUnexpected responses:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nAll requests answered as expected.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares the latency of the analysis backends across data sizes.
+
+For every size one synthetic cleaned dataset (with a `Topics` column) is loaded into
+SQLite and written to the Parquet store with its Arrow snapshot. The 13 `data_analysis`
+functions are then run, bypassing the result cache, on the SQLite backend, on the DuckDB
+backend over the Parquet store and over the cleaned CSV file, and on the Arrow backend
+over the snapshot. The first run of each backend and
+the best of the following runs are reported. That every backend returns the SQLite
+results is checked by `tests/test_analysis_backends.py`. Run from the repository root:
+
+    python benchmarks/bench_backends.py --sizes 100000,1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+import parquet_store  # noqa: E402
+from analysis_backends import close_all_backends  # noqa: E402
+from bench_indexes import ANALYSES  # noqa: E402
+from bench_storage import TABLE, write_cleaned_csv  # noqa: E402
+from connection_pool import close_all_pools  # noqa: E402
+from push_to_sqlite import push_data_to_sqlite  # noqa: E402
+
+
+def run_analyses(backend, source, repeat):
+    """Runs the 13 analyses on a backend; returns the first and best timings (per analysis)."""
+    data_analysis.BACKEND = backend
+    data_analysis.SOURCE = source
+    runs = []
+    for _ in range(1 + repeat):
+        timings = {}
+        for name in ANALYSES:
+            started = time.perf_counter()
+            getattr(data_analysis, name).__wrapped__()
+            timings[name] = time.perf_counter() - started
+        runs.append(timings)
+    best = {name: min(run[name] for run in runs[1:] or runs) for name in ANALYSES}
+    return runs[0], best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000", help="comma-separated dataset sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs after the first one")
+    parser.add_argument("--per-analysis", action="store_true", help="print the latency of every analysis")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'rows':>10} {'backend':<16}{'first run ms':>14}{'best run ms':>13}{'slowest analysis':>44}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in [int(size) for size in args.sizes.split(",")]:
+            csv_path = os.path.join(directory, f"cleaned_{size}.csv")
+            db_path = os.path.join(directory, f"github_{size}.db")
+            store_dir = os.path.join(directory, f"parquet_{size}")
+            write_cleaned_csv(size, csv_path)
+            push_data_to_sqlite(csv_path, db_path, TABLE, batch_size=50000)
+            parquet_store.write_parquet_store(csv_path, store_dir, harvest_date="2024-10-06")
+            parquet_store.write_snapshot(store_dir)
+            data_analysis.DB_PATH = db_path
+
+            backends = {"sqlite": ("sqlite", None), "duckdb parquet": ("duckdb", store_dir),
+                        "duckdb csv": ("duckdb", csv_path), "arrow snapshot": ("arrow", store_dir)}
+            for label, (backend, source) in backends.items():
+                first, best = run_analyses(backend, source, args.repeat)
+                slowest = max(best, key=best.get)
+                print(f"{size:>10} {label:<16}{sum(first.values()) * 1000:>14.1f}{sum(best.values()) * 1000:>13.1f}"
+                      f"{slowest:>35} {best[slowest] * 1000:>6.1f}ms")
+                if args.per_analysis:
+                    for name in ANALYSES:
+                        print(f"{'':>28}{name:<34}{best[name] * 1000:>8.2f}ms")
+            close_all_backends()
+            close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
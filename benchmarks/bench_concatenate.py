@@ -0,0 +1,56 @@
+"""
+Shows the row and time savings of the deduplicating concatenation on the `data/` corpus.
+
+The baseline reproduces the original behaviour: every file matching `data/*.csv`
+(including the derived `data.csv` and `cleaned_data.csv`) is read serially and
+concatenated without deduplication. Run from the repository root:
+
+    python benchmarks/bench_concatenate.py
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from concatenate_csv_files import concatenate_csv_files  # noqa: E402
+
+
+def baseline(pattern):
+    return pd.concat([pd.read_csv(file, index_col=None) for file in glob.glob(pattern)], ignore_index=True)
+
+
+def best_of(repeat, function, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    pattern = os.path.join(args.data_dir, "*.csv")
+    old, old_time = best_of(args.repeat, baseline, pattern)
+    new, new_time = best_of(args.repeat, concatenate_csv_files, pattern)
+    topics_per_repo = new["Topics"].str.count(";") + 1
+
+    print(f"{'baseline (data/*.csv, serial)':<34} {len(old):>7} rows {old_time * 1000:>8.1f} ms")
+    print(f"{'deduplicated (parallel)':<34} {len(new):>7} rows {new_time * 1000:>8.1f} ms")
+    print(f"rows saved: {len(old) - len(new)} ({1 - len(new) / len(old):.1%}), "
+          f"repositories in several topics: {(topics_per_repo > 1).sum()}")
+
+
+if __name__ == "__main__":
+    main()
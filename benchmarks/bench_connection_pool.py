@@ -0,0 +1,98 @@
+"""
+Stress-tests the analysis queries under N concurrent dashboard sessions.
+
+Every simulated session runs the 13 analysis queries (bypassing the result cache)
+a number of times, either opening a new connection per query as the module used
+to do, or through the shared read-only connection pool. Run from the repository root:
+
+    python benchmarks/bench_connection_pool.py --sessions 32 --rounds 5
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+from analysis_backends import paginate  # noqa: E402
+
+ANALYSES = [
+    "most_starred_repositories", "most_forked_repositories", "most_updated_repositories",
+    "most_popular_languages", "most_popular_licenses", "most_popular_contributors",
+    "average_stars_by_language", "average_forks_by_language", "repos_with_OpenIssues",
+    "repo_created_each_year", "most_recently_updated_repo", "distribution_of_licenses",
+    "popular_repo_for_each_language",
+]
+
+
+def read_query_unpooled(query, analysis=None, params=(), limit=None, offset=0):
+    """The original access pattern: a fresh connection per query."""
+    query, params = paginate(query, params, limit, offset)
+    connection = sqlite3.connect(data_analysis.DB_PATH)
+    try:
+        return pd.read_sql(query, connection, params=params)
+    finally:
+        connection.close()
+
+
+def run_sessions(sessions, rounds):
+    latencies = []
+    lock = threading.Lock()
+    functions = [getattr(data_analysis, name).__wrapped__ for name in ANALYSES]
+
+    def session():
+        local = []
+        for _ in range(rounds):
+            for function in functions:
+                started = time.perf_counter()
+                function()
+                local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def open_file_handles():
+    try:
+        return len(os.listdir(f"/proc/{os.getpid()}/fd"))
+    except FileNotFoundError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=data_analysis.DB_PATH)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    data_analysis.DB_PATH = args.db
+
+    pooled_read_query = data_analysis.read_query
+    for label, read_query in (("connection per query", read_query_unpooled), ("pooled", pooled_read_query)):
+        data_analysis.read_query = read_query
+        elapsed, latencies = run_sessions(args.sessions, args.rounds)
+        latencies.sort()
+        print(f"{label:<22} {len(latencies) / elapsed:>8.0f} queries/s  "
+              f"p50 {statistics.median(latencies) * 1000:>7.2f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:>7.2f} ms  "
+              f"open fds {open_file_handles()}")
+    data_analysis.read_query = pooled_read_query
+
+
+if __name__ == "__main__":
+    main()
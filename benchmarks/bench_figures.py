@@ -0,0 +1,99 @@
+"""
+Compares the per-view chart render time with and without the figure cache.
+
+A synthetic database is built with the loader's indexes and rollup tables, and every
+analysis frame is fetched once. For each chart the script times what a
+Streamlit rerun does to render it: building the Plotly figure (skipped on a cache
+hit) and then what `st.plotly_chart` does with it, validating the figure and
+serializing it to JSON. A cache hit is timed both ways the figures are read: as a copy
+rebuilt from the cached spec, and as the shared figure that the charts render. The
+cached figures must hold the same values as a freshly built one.
+Run from the repository root:
+
+    python benchmarks/bench_figures.py --rows 100000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import plotly.io  # noqa: E402
+import plotly.tools  # noqa: E402
+
+import data_analysis  # noqa: E402
+import data_visualization  # noqa: E402
+from bench_indexes import build_database  # noqa: E402
+from connection_pool import close_all_pools  # noqa: E402
+from push_to_sqlite import create_repository_indexes  # noqa: E402
+
+TABLE = "github_repositories"
+
+
+def serialize(figure):
+    """What `st.plotly_chart` does with a figure before sending it to the browser."""
+    figure = plotly.tools.return_figure_from_figure_or_data(figure, validate_figure=True)
+    return plotly.io.to_json(figure, validate=False)
+
+
+def timed(function, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "bench.db")
+        conn = build_database(db_path, args.rows)
+        create_repository_indexes(conn, TABLE)
+        conn.close()
+        data_analysis.DB_PATH = db_path
+
+        print(f"{'figure':<42}{'uncached ms':>13}{'copy ms':>9}{'shared ms':>11}{'speedup':>9}")
+        totals, timed_views = [0.0, 0.0, 0.0], 0
+        for build in data_visualization.FIGURES:
+            # The analysis frame is fetched once, as the view does for its table
+            frame = build.provider()
+            try:
+                uncached, expected = timed(lambda: serialize(build.__wrapped__(frame)), args.repeat)
+            except ValueError as e:
+                # e.g. Plotly rejects the empty license of synthetic rows as a sunburst leaf
+                print(f"{build.__name__:<42}{'not buildable from this data: ' + str(e).splitlines()[0][:40]}")
+                continue
+            build(frame)
+            copied, spec = timed(lambda: serialize(build(frame)), args.repeat)
+            cached, shared = timed(lambda: serialize(build(frame, shared=True)), args.repeat)
+            totals = [totals[0] + uncached, totals[1] + copied, totals[2] + cached]
+            timed_views += 1
+            print(f"{build.__name__:<42}{uncached * 1000:>13.2f}{copied * 1000:>9.2f}{cached * 1000:>11.2f}"
+                  f"{uncached / cached:>8.1f}x")
+            # Cached figures are rebuilt from their spec, so only the key order of their JSON may differ
+            if json.loads(spec) != json.loads(expected) or json.loads(shared) != json.loads(expected):
+                failures.append(build.__name__)
+        close_all_pools()
+
+    print(f"{f'all {timed_views} views':<42}{totals[0] * 1000:>13.2f}{totals[1] * 1000:>9.2f}{totals[2] * 1000:>11.2f}"
+          f"{totals[0] / totals[2]:>8.1f}x")
+    if failures:
+        print("\nCached figures differing from freshly built ones:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nAll cached figures match freshly built ones.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compares the request count and wall time of REST and GraphQL harvests of the same repositories.
+
+The harvester runs against the local stub of the GitHub API in corpus mode (topics above
+the 1000-result cap, so they are sharded). Three harvests are compared:
+
+- REST search only, which gives the `github_repositories` columns;
+- REST search plus one `releases/latest` request per repository, the least it takes
+  over REST to get one of the extras the GraphQL query returns;
+- GraphQL search, which returns the columns, topics and releases of up to 100
+  repositories per request; and GraphQL again under a `--max-nodes` budget per query,
+  which shrinks its pages.
+
+The GraphQL records must hold the same column values as the REST records for every
+repository, and their latest releases must match the per-repository REST requests; the
+script exits with an error otherwise. Run from the repository root:
+
+    python benchmarks/bench_graphql.py --topics 2 --repos 2000 --latency 0.05
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fetch_github_data import create_session, harvest_topics  # noqa: E402
+from fetch_github_graphql import iter_graphql_pages, page_size, query_cost  # noqa: E402
+from push_to_sqlite import COLUMN_NAMES  # noqa: E402
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+
+def latest_release(session, api_url, owner, name):
+    response = session.get(f"{api_url}/repos/{owner}/{name}/releases/latest", timeout=30)
+    return response.json()["tag_name"] if response.status_code == 200 else None
+
+
+def rows(frame):
+    """The `github_repositories` values of a frame, per repository."""
+    return {(row["Owner"], row["Repository_Name"]): tuple(row[name] for name in COLUMN_NAMES)
+            for row in frame.astype(object).where(frame.notna(), None).to_dict("records")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=2, help="number of topics to harvest")
+    parser.add_argument("--repos", type=int, default=2000, help="repositories per topic")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency per request in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--max-nodes", type=int, default=500, help="node budget of the budgeted GraphQL harvest")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    topics = [f"topic {index}" for index in range(args.topics)]
+    failures = []
+    print(f"{args.topics} topics of {args.repos} repositories, {args.workers} workers, "
+          f"{args.latency * 1000:.0f}ms per request")
+    print(f"{'harvest':<32}{'requests':>10}{'per repo':>10}{'seconds':>9}")
+    with StubGitHubAPI(latency=args.latency, corpus_size=args.repos) as api:
+        def report(label, requests_before, started, repositories):
+            requests = api.requests - requests_before
+            print(f"{label:<32}{requests:>10}{requests / max(repositories, 1):>10.3f}"
+                  f"{time.perf_counter() - started:>9.2f}")
+
+        requests_before, started = api.requests, time.perf_counter()
+        rest = harvest_topics(topics, max_workers=args.workers, api_url=api.url)
+        repositories = sum(len(frame) for frame in rest.values())
+        report("REST search", requests_before, started, repositories)
+
+        session = create_session(pool_size=args.workers)
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            releases = {topic: dict(zip(zip(frame["Owner"], frame["Repository_Name"]),
+                                        executor.map(lambda key: latest_release(session, api.url, *key),
+                                                     zip(frame["Owner"], frame["Repository_Name"]))))
+                        for topic, frame in rest.items()}
+        report("REST search + releases", requests_before, started, repositories)
+
+        requests_before, started = api.requests, time.perf_counter()
+        graphql = harvest_topics(topics, max_workers=args.workers, api_url=api.url, graphql=True)
+        report("GraphQL search", requests_before, started, repositories)
+
+        first = page_size(max_nodes=args.max_nodes)
+        requests_before, started = api.requests, time.perf_counter()
+        budgeted = sum(len(items) for *_, items in iter_graphql_pages(topics, max_workers=args.workers,
+                                                                      api_url=api.url, max_nodes=args.max_nodes)
+                       if items)
+        report(f"GraphQL, {args.max_nodes}-node budget", requests_before, started, budgeted)
+        print(f"\n{args.max_nodes}-node budget: {first} repositories per page, "
+              f"{query_cost(first)[0]} nodes per query (100 per page: {query_cost(100)[0]} nodes)")
+
+        for topic in topics:
+            expected, harvested = rows(rest[topic]), rows(graphql[topic])
+            if harvested != expected:
+                failures.append(f"'{topic}': GraphQL has {len(harvested)} repositories for {len(expected)}, "
+                                f"{sum(harvested.get(key) != value for key, value in expected.items())} differing")
+            graphql_releases = dict(zip(zip(graphql[topic]["Owner"], graphql[topic]["Repository_Name"]),
+                                        graphql[topic]["Latest_Release"].astype(object).where(
+                                            graphql[topic]["Latest_Release"].notna(), None)))
+            if graphql_releases != releases[topic]:
+                failures.append(f"'{topic}': latest releases differ between GraphQL and REST")
+        if budgeted != repositories:
+            failures.append(f"the budgeted GraphQL harvest got {budgeted} of {repositories} repositories")
+
+    if failures:
+        print("\nGraphQL and REST harvests differ:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nThe GraphQL harvest matches the REST columns and per-repository releases.")
+
+
+if __name__ == "__main__":
+    main()
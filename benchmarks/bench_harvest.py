@@ -0,0 +1,67 @@
+"""
+Benchmarks the concurrent harvester against the old serial page loop.
+
+Both variants run against a local stub of the search API, so no GitHub quota is
+used. Run from the repository root:
+
+    python benchmarks/bench_harvest.py --topics 15 --latency 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fetch_github_data import harvest_topics  # noqa: E402
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+
+def serial_baseline(api_url, topics, per_page=30, pages=5):
+    """Fetches pages one at a time with plain `requests.get`, like the original loop."""
+    fetched = 0
+    for topic in topics:
+        for page in range(1, pages + 1):
+            response = requests.get(f"{api_url}/search/repositories?q={topic}&per_page={per_page}&page={page}",
+                                    timeout=30)
+            if response.ok:
+                fetched += 1
+    return fetched
+
+
+def report(label, pages, repositories, elapsed):
+    print(f"{label:<28} {pages:>6} pages {repositories:>7} repos {elapsed:>8.2f}s "
+          f"{pages / elapsed:>8.1f} pages/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=15, help="number of topics to harvest")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency per request in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests for the harvester")
+    parser.add_argument("--quota", type=int, default=None, help="stub requests allowed per second")
+    args = parser.parse_args()
+
+    topics = [f"topic {index}" for index in range(args.topics)]
+
+    with StubGitHubAPI(latency=args.latency, quota=args.quota) as api:
+        started = time.perf_counter()
+        pages = serial_baseline(api.url, topics)
+        report("serial, per_page=30, 5 pages", pages, pages * 30, time.perf_counter() - started)
+
+        requests_before, rejected_before = api.requests, api.rejected
+        started = time.perf_counter()
+        results = harvest_topics(topics, pages=10, per_page=100, max_workers=args.workers, api_url=api.url)
+        elapsed = time.perf_counter() - started
+        repositories = sum(len(frame) for frame in results.values())
+        rejected = api.rejected - rejected_before
+        report(f"harvester, {args.workers} workers", api.requests - requests_before - rejected,
+               repositories, elapsed)
+        if args.quota:
+            print(f"stub rejected {rejected} harvester request(s) with 403, all retried")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Measures the latency of the dashboard queries with and without indexes.
+
+For every table size a synthetic database is built, the 13 analysis queries are
+timed on the bare table, the loader's indexes are created and the queries are
+timed again. Their query plans are checked by tests/test_indexes.py. Run from the
+repository root:
+
+    python benchmarks/bench_indexes.py --sizes 10000,1000000,10000000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+from bench_pipeline import synthetic_records  # noqa: E402
+from pipeline import batched  # noqa: E402
+from push_to_sqlite import (COLUMN_NAMES, create_repositories_table, create_repository_indexes,  # noqa: E402
+                            create_rollups, create_topics_table, upsert_statement)
+
+TABLE = "github_repositories"
+ANALYSES = [
+    "most_starred_repositories", "most_forked_repositories", "most_updated_repositories",
+    "most_popular_languages", "most_popular_licenses", "most_popular_contributors",
+    "average_stars_by_language", "average_forks_by_language", "repos_with_OpenIssues",
+    "repo_created_each_year", "most_recently_updated_repo", "distribution_of_licenses",
+    "popular_repo_for_each_language",
+]
+
+
+def analysis_queries():
+    """Captures the SQL text each analysis function runs."""
+    queries = {}
+    read_query = data_analysis.read_query
+    for name in ANALYSES:
+        data_analysis.read_query = lambda query, analysis=None, name=name, **options: queries.setdefault(name, query) and pd.DataFrame()
+        getattr(data_analysis, name).__wrapped__()
+    data_analysis.read_query = read_query
+    return queries
+
+
+def build_database(path, rows):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    create_repositories_table(conn, TABLE)
+    create_topics_table(conn)
+    statement = upsert_statement(TABLE)
+    conn.execute("BEGIN")
+    for batch in batched(synthetic_records(rows), 50000):
+        conn.executemany(statement, [tuple(record[name] for name in COLUMN_NAMES) for record in batch])
+    create_rollups(conn, TABLE)
+    conn.execute("COMMIT")
+    return conn
+
+
+def time_query(conn, query, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(query).fetchall()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,1000000,10000000", help="comma-separated table sizes")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    queries = analysis_queries()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            conn = build_database(os.path.join(directory, f"bench_{size}.db"), size)
+            before = {name: time_query(conn, query, repeat=1) for name, query in queries.items()}
+            started = time.perf_counter()
+            create_repository_indexes(conn, TABLE)
+            index_seconds = time.perf_counter() - started
+            after = {name: time_query(conn, query) for name, query in queries.items()}
+            results[size] = (before, after)
+            print(f"{size} rows: indexes built in {index_seconds:.2f}s")
+            conn.close()
+
+    header = "".join(f"{size:>14} rows" for size in sizes)
+    print(f"\n{'query (ms, scan -> indexed)':<32}{header}")
+    for name in ANALYSES:
+        cells = "".join(f"{results[size][0][name] * 1000:>9.1f} ->{results[size][1][name] * 1000:>7.2f}"
+                        for size in sizes)
+        print(f"{name:<32}{cells}")
+
+
+if __name__ == "__main__":
+    main()
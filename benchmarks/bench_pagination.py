@@ -0,0 +1,107 @@
+"""
+Compares keyset and OFFSET pagination of `browse_repositories` on every analysis backend.
+
+A synthetic cleaned dataset is loaded into SQLite and written to the Parquet store.
+For each backend and sort key the script times the page at increasing depths, once
+reached through the cursor of the previous page (keyset) and once with an OFFSET,
+and checks that both return the same rows. It then walks a filtered listing page by
+page and checks it against the same listing fetched in one query. The script exits
+with an error if any page differs. Run from the repository root:
+
+    python benchmarks/bench_pagination.py --rows 1000000
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+import parquet_store  # noqa: E402
+from analysis_backends import close_all_backends  # noqa: E402
+from bench_storage import TABLE, write_cleaned_csv  # noqa: E402
+from connection_pool import close_all_pools  # noqa: E402
+from push_to_sqlite import push_data_to_sqlite  # noqa: E402
+
+PAGE_SIZE = 50
+
+
+def browse(**options):
+    return data_analysis.browse_repositories.__wrapped__(limit=PAGE_SIZE, **options)
+
+
+def timed(function, repeat=3):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--depths", default="0,100,1000,10000", help="comma-separated page numbers")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    depths = [int(depth) for depth in args.depths.split(",")]
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "cleaned_data.csv")
+        db_path = os.path.join(directory, "github_data.db")
+        store_dir = os.path.join(directory, "parquet")
+        write_cleaned_csv(args.rows, csv_path)
+        push_data_to_sqlite(csv_path, db_path, TABLE, batch_size=50000)
+        parquet_store.write_parquet_store(csv_path, store_dir, harvest_date="2024-10-06")
+        data_analysis.DB_PATH = db_path
+
+        print(f"{args.rows} rows, {PAGE_SIZE} repositories per page")
+        print(f"{'backend':<10}{'sort':<8}{'page':>8}{'keyset ms':>12}{'offset ms':>12}")
+        for backend, source in (("sqlite", None), ("duckdb", store_dir)):
+            data_analysis.BACKEND, data_analysis.SOURCE = backend, source
+            for sort in ("stars", "updated"):
+                # The cursor of the page before each measured depth comes from the previous page's last row
+                for depth in depths:
+                    cursor = None
+                    if depth:
+                        previous = browse(sort=sort, offset=(depth - 1) * PAGE_SIZE)
+                        cursor = data_analysis.next_cursor(previous, sort)
+                    keyset_seconds, keyset_page = timed(lambda: browse(sort=sort, after=cursor))
+                    offset_seconds, offset_page = timed(lambda: browse(sort=sort, offset=depth * PAGE_SIZE))
+                    print(f"{backend:<10}{sort:<8}{depth:>8}{keyset_seconds * 1000:>12.2f}"
+                          f"{offset_seconds * 1000:>12.2f}")
+                    if not keyset_page.equals(offset_page):
+                        failures.append(f"page {depth} by {sort} on {backend}")
+
+            # A filtered listing walked page by page must match the listing fetched at once
+            filters = {"language": "Python", "years": (2015, 2020), "topic": "topic3"}
+            whole = data_analysis.browse_repositories.__wrapped__(sort="forks", limit=None, **filters)
+            pages, cursor = [], None
+            while True:
+                page = browse(sort="forks", after=cursor, **filters)
+                if page.empty:
+                    break
+                pages.append(page)
+                cursor = data_analysis.next_cursor(page, "forks")
+            walked = pd.concat(pages, ignore_index=True) if pages else whole.iloc[:0]
+            print(f"{backend:<10}filtered listing of {len(whole)} repositories walked in {len(pages)} pages")
+            if whole.empty or not walked.equals(whole):
+                failures.append(f"filtered listing on {backend}")
+            close_all_backends()
+        close_all_pools()
+
+    if failures:
+        print("\nPages differing between keyset and offset pagination:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nKeyset and offset pages match.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Compares the streaming fetch -> SQLite pipeline with the CSV round-trips.
+
+The CSV path writes one CSV per topic, then runs `concatenate_csv_files`,
+`preprocess_github_data` and `push_data_to_sqlite`. The streaming path feeds the
+same synthetic records through `clean_records` and `load_records`. Each path runs
+in its own process so that its peak resident memory can be reported:
+
+    python benchmarks/bench_pipeline.py --rows 1000000
+"""
+import argparse
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+TOPICS = 15
+TABLE = "github_repositories"
+
+
+def synthetic_records(rows):
+    """Yields `rows` raw repository records with unique (Owner, Repository_Name) pairs."""
+    languages = ["Python", "Jupyter Notebook", "C++", "JavaScript", "Rust", None]
+    licenses = ["MIT License", "Apache License 2.0", "Other", None]
+    for index in range(rows):
+        yield {
+            "Repository_Name": f"repo-{index}",
+            "Owner": f"owner-{index % 50000}",
+            "Description": None if index % 7 == 0 else f"Synthetic repository number {index}",
+            "URL": f"https://github.com/owner-{index % 50000}/repo-{index}",
+            "Programming_Language": languages[index % len(languages)],
+            "Creation_Date": f"20{10 + index % 14:02d}-{1 + index % 12:02d}-{1 + index % 28:02d}T10:20:30Z",
+            "Last_Updated_Date": f"2024-{1 + index % 12:02d}-{1 + index % 28:02d}T08:00:00Z",
+            "Number_of_Stars": (index * 7919) % 200000,
+            "Number_of_Forks": (index * 104729) % 30000,
+            "Number_of_Open_Issues": index % 500,
+            "License_Type": licenses[index % len(licenses)],
+        }
+
+
+def write_topic_csvs(rows, directory):
+    """Writes the synthetic corpus as one CSV file per topic, like `data/repo_*.csv`."""
+    from push_to_sqlite import COLUMN_NAMES
+
+    files = [open(os.path.join(directory, f"repo_topic{topic}.csv"), "w", newline="") for topic in range(TOPICS)]
+    writers = [csv.writer(file) for file in files]
+    for writer in writers:
+        writer.writerow(COLUMN_NAMES)
+    for index, record in enumerate(synthetic_records(rows)):
+        writers[index % TOPICS].writerow([record[name] for name in COLUMN_NAMES])
+    for file in files:
+        file.close()
+
+
+def run_csv_path(rows, directory, batch_size):
+    from concatenate_csv_files import concatenate_csv_files
+    from data_preprocessing import preprocess_github_data
+    from push_to_sqlite import push_data_to_sqlite
+
+    write_topic_csvs(rows, directory)
+    started = time.perf_counter()
+    data_csv = os.path.join(directory, "data.csv")
+    cleaned_csv = os.path.join(directory, "cleaned_data.csv")
+    concatenate_csv_files(os.path.join(directory, "repo_*.csv")).to_csv(data_csv, index=False)
+    preprocess_github_data(data_csv, cleaned_csv)
+    push_data_to_sqlite(cleaned_csv, os.path.join(directory, "csv.db"), TABLE)
+    return time.perf_counter() - started
+
+
+def run_stream_path(rows, directory, batch_size):
+    from data_preprocessing import clean_records
+    from pipeline import load_records
+
+    started = time.perf_counter()
+    load_records(clean_records(synthetic_records(rows)), os.path.join(directory, "stream.db"), TABLE,
+                 batch_size=batch_size)
+    return time.perf_counter() - started
+
+
+PATHS = {"csv": run_csv_path, "stream": run_stream_path}
+
+
+def child(path, rows, batch_size):
+    import logging
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        elapsed = PATHS[path](rows, directory, batch_size)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--path", choices=sorted(PATHS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.path:
+        child(args.path, args.rows, args.batch_size)
+        return
+
+    print(f"{args.rows} synthetic rows, batch size {args.batch_size}")
+    for path in ("csv", "stream"):
+        output = subprocess.run([sys.executable, __file__, "--path", path, "--rows", str(args.rows),
+                                 "--batch-size", str(args.batch_size)],
+                                check=True, capture_output=True, text=True).stdout.split()
+        elapsed, peak_mb = float(output[-2]), float(output[-1])
+        print(f"{path:<8} {elapsed:>8.2f}s {args.rows / elapsed:>10.0f} rows/s  peak RSS {peak_mb:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compares the typed, chunked `preprocess_github_data` (in memory and streaming) with the original implementation.
+
+A raw CSV of synthetic repositories (ISO 8601 dates, missing descriptions,
+languages and licenses) is written once, then each implementation preprocesses
+it in its own process so that its peak resident memory can be reported. The
+original columns of every output must be identical. Run from the repository root:
+
+    python benchmarks/bench_preprocessing.py --rows 5000000
+"""
+import argparse
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from bench_pipeline import synthetic_records  # noqa: E402
+
+
+def legacy_preprocess_github_data(input_csv, output_csv):
+    """The original implementation: untyped read, then datetime parse and strftime round-trips."""
+    import pandas as pd
+
+    data = pd.read_csv(input_csv)
+    if 'Unnamed: 0' in data.columns:
+        data = data.drop(columns=['Unnamed: 0'])
+    data['Creation_Date'] = pd.to_datetime(data['Creation_Date']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    data['Last_Updated_Date'] = pd.to_datetime(data['Last_Updated_Date']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    data['Description'] = data['Description'].fillna("No description provided")
+    data['Programming_Language'] = data['Programming_Language'].fillna(data['Programming_Language'].mode()[0])
+    data['License_Type'] = data['License_Type'].fillna(data['License_Type'].mode()[0])
+    data.to_csv(output_csv, index=False)
+
+
+def typed_preprocess_github_data(input_csv, output_csv):
+    from data_preprocessing import preprocess_github_data
+
+    preprocess_github_data(input_csv, output_csv)
+
+
+def streaming_preprocess_github_data(input_csv, output_csv):
+    from data_preprocessing import preprocess_github_data
+
+    preprocess_github_data(input_csv, output_csv, streaming=True)
+
+
+IMPLEMENTATIONS = {
+    "original": legacy_preprocess_github_data,
+    "typed": typed_preprocess_github_data,
+    "streaming": streaming_preprocess_github_data,
+}
+
+
+def write_raw_csv(rows, path):
+    from push_to_sqlite import COLUMN_NAMES
+
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Unnamed: 0"] + COLUMN_NAMES)
+        for index, record in enumerate(synthetic_records(rows)):
+            writer.writerow([index] + [record[name] for name in COLUMN_NAMES])
+
+
+def child(implementation, input_csv, output_csv):
+    import logging
+    logging.disable(logging.INFO)
+    started = time.perf_counter()
+    IMPLEMENTATIONS[implementation](input_csv, output_csv)
+    elapsed = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_mb:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--implementation", choices=sorted(IMPLEMENTATIONS), help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.implementation:
+        child(args.implementation, args.input, args.output)
+        return
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_csv = os.path.join(directory, "data.csv")
+        write_raw_csv(args.rows, input_csv)
+        print(f"{args.rows} synthetic rows, {os.path.getsize(input_csv) / 1e6:.0f} MB of CSV")
+        outputs = {}
+        for implementation in IMPLEMENTATIONS:
+            outputs[implementation] = os.path.join(directory, f"{implementation}.csv")
+            output = subprocess.run([sys.executable, __file__, "--implementation", implementation,
+                                     "--input", input_csv, "--output", outputs[implementation]],
+                                    check=True, capture_output=True, text=True).stdout.split()
+            elapsed, peak_mb = float(output[-2]), float(output[-1])
+            print(f"{implementation:<10} {elapsed:>8.2f}s {args.rows / elapsed:>10.0f} rows/s  "
+                  f"peak RSS {peak_mb:>8.1f} MB")
+
+        original = pd.read_csv(outputs["original"])
+        for implementation in ("typed", "streaming"):
+            output = pd.read_csv(outputs[implementation])
+            pd.testing.assert_frame_equal(original, output[original.columns])
+        print("Outputs match on the original columns.")
+
+
+if __name__ == "__main__":
+    main()
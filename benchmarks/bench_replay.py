@@ -0,0 +1,95 @@
+"""
+Measures the offline replay of archived harvests against harvesting from the API.
+
+The pipeline harvests the topics twice from the local stub of the search API in corpus
+mode, archiving the raw pages in a `ResponseArchive`; identical pages of the second
+harvest must not add any object to the archive. With the stub shut down, the archive is
+then replayed into new databases with one worker process and with `--workers`, and one
+historical harvest is replayed on its own. The script reports the archive's
+compression ratio and the replay throughput, and exits with an error if a replayed
+database differs from the harvested one. Run from the repository root:
+
+    python benchmarks/bench_replay.py --topics 4 --repos 5000 --workers 4
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from pipeline import replay_archive, run_pipeline  # noqa: E402
+from push_to_sqlite import COLUMN_NAMES  # noqa: E402
+from response_archive import ResponseArchive, read_object  # noqa: E402
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+TABLE = "github_repositories"
+
+
+def contents(path):
+    """The repositories and topic rows of a database, sorted."""
+    columns = ", ".join(f'"{name}"' for name in COLUMN_NAMES)
+    with sqlite3.connect(path) as conn:
+        return (conn.execute(f'SELECT {columns} FROM "{TABLE}" ORDER BY "Owner", "Repository_Name"').fetchall(),
+                conn.execute("SELECT * FROM repository_topics ORDER BY 1, 2, 3").fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=4, help="number of topics to harvest")
+    parser.add_argument("--repos", type=int, default=5000, help="repositories per topic")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency per request in seconds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="replay worker processes")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    topics = {f"topic-{index}": f"topic {index}" for index in range(args.topics)}
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(os.path.join(directory, "archive"))
+        harvested = os.path.join(directory, "harvested.db")
+        print(f"{args.topics} topics of {args.repos} repositories, {archive.codec} archive")
+        print(f"{'run':<30}{'pages':>8}{'rows':>9}{'seconds':>9}{'rows/s':>10}")
+        with StubGitHubAPI(latency=args.latency, corpus_size=args.repos) as api:
+            for run in ("harvest", "harvest again"):
+                started = time.perf_counter()
+                stats = run_pipeline(topics, harvested, TABLE, api_url=api.url, archive=archive)
+                elapsed = time.perf_counter() - started
+                print(f"{run:<30}{archive.harvests()[-1][5]:>8}{stats['rows']:>9}{elapsed:>9.2f}"
+                      f"{stats['rows'] / elapsed:>10.0f}")
+                if run == "harvest":
+                    first_objects = archive.stats()["objects"]
+        archive_stats = archive.stats()
+        if archive_stats["objects"] != first_objects:
+            failures.append(f"the second harvest added {archive_stats['objects'] - first_objects} object(s)")
+        expected = contents(harvested)
+
+        runs = [("replay, 1 process", None, 1), (f"replay, {args.workers} processes", None, args.workers),
+                ("replay of harvest 1 only", [archive.harvests()[0][0]], args.workers)]
+        for label, harvest_ids, workers in runs:
+            replayed = os.path.join(directory, f"replayed-{len(os.listdir(directory))}.db")
+            pages = len(archive.pages(harvest_ids))
+            started = time.perf_counter()
+            stats = replay_archive(archive, replayed, TABLE, harvest_ids=harvest_ids, topics=topics, workers=workers)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<30}{pages:>8}{stats['rows']:>9}{elapsed:>9.2f}{stats['rows'] / elapsed:>10.0f}")
+            if contents(replayed) != expected:
+                failures.append(f"{label}: the replayed database differs from the harvested one")
+
+        raw_bytes = sum(len(read_object(path)) for *_, path in archive.pages(archive.harvests()[0][:1]))
+        print(f"\narchive: {archive_stats['pages']} pages in {archive_stats['objects']} objects, "
+              f"{archive_stats['bytes'] / 1e6:.2f} MB for {raw_bytes / 1e6:.2f} MB of JSON "
+              f"({raw_bytes / archive_stats['bytes']:.1f}x)")
+        archive.close()
+
+    if failures:
+        print("\nReplay failed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nEvery replay rebuilt the harvested database.")
+
+
+if __name__ == "__main__":
+    main()
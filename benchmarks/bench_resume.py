@@ -0,0 +1,96 @@
+"""
+Checks that a harvest job recorded in a journal resumes without fetching any page twice.
+
+The harvester runs against the local stub of the search API in corpus mode (topics
+above the 1000-result cap, so they are sharded). A first run answers some page numbers
+with 502s, which fail after their retries, and is interrupted after `--crash-after`
+pages. A second run of the same job, with the stub healthy again, must replay the
+committed pages from the journal, fetch only the failed and missing ones, complete the
+job and return every repository exactly once. The script exits with an error if a page
+was served in full twice, a repository is missing or duplicated, or the job is left
+unfinished. Run from the repository root:
+
+    python benchmarks/bench_resume.py --topics 3 --repos 3000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import fetch_github_data  # noqa: E402
+from fetch_github_data import harvest_topics, iter_search_pages  # noqa: E402
+from harvest_jobs import HarvestJournal  # noqa: E402
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=3, help="number of topics to harvest")
+    parser.add_argument("--repos", type=int, default=3000, help="repositories per topic")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub latency per request in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--crash-after", type=int, default=40, help="pages yielded before the first run stops")
+    parser.add_argument("--failing-page", type=int, default=4, help="page number answered with 502s in the first run")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+    # Retries back off from 10ms instead of 1s, so the failing pages give up quickly
+    fetch_github_data.RETRY_BASE_DELAY = 0.01
+
+    topics = [f"topic {index}" for index in range(args.topics)]
+    failures = []
+    with tempfile.TemporaryDirectory() as directory, StubGitHubAPI(latency=args.latency,
+                                                                   corpus_size=args.repos) as api:
+        harvest_topics(topics, max_workers=args.workers, api_url=api.url)
+        uninterrupted = sum(api.served.values())
+        api.served.clear()
+
+        journal = HarvestJournal(os.path.join(directory, "harvest_jobs.db"))
+        api.failing_pages.add(args.failing_page)
+        started = time.perf_counter()
+        yielded = 0
+        for _ in iter_search_pages(topics, max_workers=args.workers, api_url=api.url, journal=journal):
+            yielded += 1
+            if yielded == args.crash_after:
+                break
+        first_run = sum(api.served.values())
+        with sqlite3.connect(journal.path) as conn:
+            failed = conn.execute("SELECT COUNT(*) FROM harvest_pages WHERE status = 'failed'").fetchone()[0]
+        print(f"uninterrupted harvest: {uninterrupted} pages")
+        print(f"first run: {first_run} pages fetched, {failed} failed, stopped after {yielded} pages "
+              f"in {time.perf_counter() - started:.2f}s")
+
+        api.failing_pages.clear()
+        started = time.perf_counter()
+        results = harvest_topics(topics, max_workers=args.workers, api_url=api.url, journal=journal)
+        second_run = sum(api.served.values()) - first_run
+        print(f"resumed run: {second_run} pages fetched in {time.perf_counter() - started:.2f}s, "
+              f"{first_run + second_run} in total")
+
+        twice = [f"{query!r} page {page}" for (query, page), count in api.served.items() if count > 1]
+        if twice:
+            failures.append(f"{len(twice)} page(s) fetched twice, e.g. {twice[0]}")
+        for topic in topics:
+            frame = results[topic]
+            harvested = list(zip(frame["Owner"], frame["Repository_Name"])) if not frame.empty else []
+            expected = {(repo["owner"]["login"], repo["name"]) for repo in api.corpus(topic)}
+            if len(harvested) != len(set(harvested)) or set(harvested) != expected:
+                failures.append(f"'{topic}' has {len(harvested)} rows for {len(expected)} repositories")
+        journal.close()
+        with sqlite3.connect(journal.path) as conn:
+            statuses = conn.execute("SELECT status FROM harvest_jobs").fetchall()
+        if statuses != [("complete",)]:
+            failures.append(f"harvest jobs left as {statuses}")
+
+    if failures:
+        print("\nResumed harvest failed:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nThe resumed job completed every topic without fetching any page twice.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures sharded harvesting of topics above the 1000-result search cap.
+
+The harvester runs against the local stub of the search API in corpus mode, where every
+topic has `--repos` repositories and, like GitHub, no query returns more than 1000 of
+them. Harvested without shards each topic stops at the cap; with shards, the topics are
+split into disjoint `created:`/`stars:` shards fetched concurrently. The sharded
+harvest is timed with one worker and with `--workers`. That every repository comes
+back exactly once is checked by `tests/test_fetch_github_data.py`. Run from the
+repository root:
+
+    python benchmarks/bench_shards.py --topics 3 --repos 5000 --latency 0.05
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from fetch_github_data import SEARCH_RESULT_CAP, harvest_topics  # noqa: E402
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+
+def harvest(api, topics, workers, shard):
+    requests_before = api.requests
+    started = time.perf_counter()
+    results = harvest_topics(topics, pages=10, per_page=100, max_workers=workers, api_url=api.url, shard=shard)
+    return results, api.requests - requests_before, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=3, help="number of topics to harvest")
+    parser.add_argument("--repos", type=int, default=5000, help="repositories per topic")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency per request in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests for the sharded harvest")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    topics = [f"topic {index}" for index in range(args.topics)]
+    print(f"{args.topics} topics of {args.repos} repositories, search cap {SEARCH_RESULT_CAP}")
+    print(f"{'harvest':<24}{'requests':>10}{'repos':>9}{'seconds':>9}")
+    with StubGitHubAPI(latency=args.latency, corpus_size=args.repos) as api:
+        results, requests, elapsed = harvest(api, topics, args.workers, shard=False)
+        print(f"{f'unsharded, {args.workers} workers':<24}{requests:>10}"
+              f"{sum(len(frame) for frame in results.values()):>9}{elapsed:>9.2f}")
+
+        for workers in (1, args.workers):
+            results, requests, elapsed = harvest(api, topics, workers, shard=True)
+            print(f"{f'sharded, {workers} workers':<24}{requests:>10}"
+                  f"{sum(len(frame) for frame in results.values()):>9}{elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
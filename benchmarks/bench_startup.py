@@ -0,0 +1,92 @@
+"""
+Guards the cold start of the Streamlit app and the command line against import-time regressions.
+
+Each entry point's modules are imported in a fresh interpreter under `python -X importtime`,
+from an empty working directory, after the framework they run in (Streamlit for the app).
+The script reports the import time of the entry point's own modules and of their slowest
+imports, and fails (exit status 1) when an import takes longer than its budget,
+pulls in a module that should only load on demand (plotly.express before a chart
+renders, DuckDB before it is selected, the data stack for the command line's help),
+or writes files such as a `logs/` directory as a side effect. Run from the repository root:
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Entry point -> (framework setup run first and not counted, the entry point's own modules,
+#                 modules they must not import, budget in ms for the own modules).
+# Streamlit loads plotly.graph_objects with its elements, plotly.express is the app's own cost.
+ENTRY_POINTS = {
+    "app": ("import streamlit; streamlit.set_page_config", ("data_analysis", "views"),
+            ("plotly.express", "duckdb"), 1000),
+    "cli": ("pass", ("cli",), ("pandas", "numpy", "requests", "sqlite3", "plotly", "duckdb", "pyarrow"), 100),
+}
+
+
+def import_times(statement, directory):
+    """
+    Runs import statements in a fresh interpreter under `-X importtime`.
+
+    Returns:
+        dict: The cumulative microseconds per imported module, nested modules keeping their indentation.
+    """
+    environment = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONDONTWRITEBYTECODE="1")
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=directory,
+                            env=environment, check=True, capture_output=True, text=True).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name[1:].rstrip()] = int(cumulative)
+    return times
+
+
+def imports_module(names, module):
+    """Tells whether a module or one of its submodules is among the imported names."""
+    return any(name == module or name.startswith(module + ".") for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per entry point, the best run counts")
+    parser.add_argument("--top", type=int, default=8, help="slowest imports listed per entry point")
+    args = parser.parse_args()
+
+    failures = []
+    for entry_point, (framework, modules, forbidden, budget_ms) in ENTRY_POINTS.items():
+        statement = f"{framework}; import {', '.join(modules)}"
+        with tempfile.TemporaryDirectory() as directory:
+            # Everything the interpreter and the framework import anyway is not the entry point's cost
+            baseline = {name.strip() for name in import_times(framework, directory)}
+            runs = [import_times(statement, directory) for _ in range(args.runs)]
+            left_behind = sorted(os.listdir(directory))
+        own = {name: min(run.get(name, 0) for run in runs) for name in runs[0] if name.strip() not in baseline}
+        total_ms = sum(own.get(module, 0) for module in modules) / 1000
+        print(f"{entry_point}: import {', '.join(modules)} in {total_ms:.1f} ms (budget {budget_ms} ms)")
+        for name, value in sorted(own.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {value / 1000:>9.1f} ms  {name.strip()}")
+
+        if total_ms > budget_ms:
+            failures.append(f"{entry_point} imports in {total_ms:.1f} ms, over its {budget_ms} ms budget")
+        imported = {name.strip() for name in own}
+        failures.extend(f"{entry_point} imports {module} at startup"
+                        for module in forbidden if imports_module(imported, module))
+        if left_behind:
+            failures.append(f"{entry_point} creates {', '.join(left_behind)} on import")
+
+    if failures:
+        print("\nStartup regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nNo startup regressions.")
+
+
+if __name__ == "__main__":
+    main()
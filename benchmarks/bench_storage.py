@@ -0,0 +1,152 @@
+"""
+Compares the cleaned CSV file, the SQLite database and the Parquet store (and its Arrow snapshot).
+
+One synthetic cleaned dataset with a `Topics` column is written to every format,
+then the script reports the size on disk, the time to parse the analysed columns,
+the latency of the 13 analyses and of a single-topic top-10 query. The analyses
+run as indexed SQL queries on SQLite and through `compute_all_analyses` on the
+other formats; every result must match the SQL one. Run from the repository root:
+
+    python benchmarks/bench_storage.py --rows 1000000
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+import parquet_store  # noqa: E402
+from analysis_engine import ANALYSIS_COLUMNS, compute_all_analyses, load_repositories  # noqa: E402
+from bench_indexes import ANALYSES  # noqa: E402
+from bench_pipeline import synthetic_records  # noqa: E402
+from connection_pool import close_all_pools, get_pool  # noqa: E402
+from data_preprocessing import CSV_DTYPES, clean_records  # noqa: E402
+from push_to_sqlite import COLUMN_NAMES, push_data_to_sqlite  # noqa: E402
+
+TABLE = "github_repositories"
+TOPICS = 15
+QUERY_TOPIC = "topic3"
+
+
+def write_cleaned_csv(rows, path):
+    """Writes cleaned synthetic records, every fifth repository being found under two topics."""
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMN_NAMES + ["Topics"])
+        for index, record in enumerate(clean_records(synthetic_records(rows))):
+            topics = [f"topic{index % TOPICS}"] + ([f"topic{(index + 1) % TOPICS}"] if index % 5 == 0 else [])
+            writer.writerow([record[name] for name in COLUMN_NAMES] + [";".join(sorted(topics))])
+
+
+def size_of(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def timed(function, repeat=3):
+    timings, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "cleaned_data.csv")
+        db_path = os.path.join(directory, "github_data.db")
+        store_dir = os.path.join(directory, "parquet")
+        write_cleaned_csv(args.rows, csv_path)
+        push_data_to_sqlite(csv_path, db_path, TABLE, batch_size=50000)
+        started = time.perf_counter()
+        parquet_store.write_parquet_store(csv_path, store_dir, harvest_date="2024-10-06")
+        print(f"{args.rows} rows, Parquet store written in {time.perf_counter() - started:.2f}s")
+        snapshot = parquet_store.write_snapshot(store_dir)
+        data_analysis.DB_PATH = db_path
+
+        def csv_frame():
+            frame = pd.read_csv(csv_path, usecols=ANALYSIS_COLUMNS,
+                                dtype={name: CSV_DTYPES[name] for name in ANALYSIS_COLUMNS if name in CSV_DTYPES})
+            return frame[ANALYSIS_COLUMNS]
+
+        def sqlite_frame():
+            with get_pool(db_path).connection() as connection:
+                return load_repositories(connection, TABLE)
+
+        def parquet_frame():
+            return parquet_store.read_repositories(store_dir, columns=ANALYSIS_COLUMNS).to_pandas()
+
+        def snapshot_frame():
+            return parquet_store.read_snapshot(snapshot).to_pandas()
+
+        loaders = {"csv": csv_frame, "sqlite": sqlite_frame, "parquet": parquet_frame, "arrow snapshot": snapshot_frame}
+        sizes = {"csv": size_of(csv_path), "sqlite": size_of(db_path), "parquet": size_of(store_dir) - size_of(snapshot),
+                 "arrow snapshot": size_of(snapshot)}
+
+        def sqlite_analyses():
+            return {name: getattr(data_analysis, name).__wrapped__() for name in ANALYSES}
+
+        parse_times = {name: timed(loader, repeat=1)[0] for name, loader in loaders.items()}
+        expected = sqlite_analyses()
+        analyses = {"sqlite": timed(sqlite_analyses)}
+        for name, loader in loaders.items():
+            if name != "sqlite":
+                analyses[name] = timed(lambda: compute_all_analyses(loader()), repeat=1)
+
+        def sqlite_topic_query():
+            with get_pool(db_path).connection() as connection:
+                return pd.read_sql(f"""
+                    SELECT r.Repository_Name, r.Number_of_Stars FROM {TABLE} AS r
+                    JOIN repository_topics AS t USING (Owner, Repository_Name)
+                    WHERE t.Topic = ? ORDER BY r.Number_of_Stars DESC LIMIT 10
+                """, connection, params=(QUERY_TOPIC,))
+
+        def parquet_topic_query():
+            table = parquet_store.read_repositories(store_dir, columns=["Repository_Name", "Number_of_Stars"],
+                                                    topics=[QUERY_TOPIC], latest_only=False)
+            return table.to_pandas().nlargest(10, "Number_of_Stars")
+
+        def csv_topic_query():
+            frame = pd.read_csv(csv_path, usecols=["Repository_Name", "Number_of_Stars", "Topics"])
+            frame = frame[frame["Topics"].str.split(";").apply(lambda topics: QUERY_TOPIC in topics)]
+            return frame.nlargest(10, "Number_of_Stars")
+
+        topic_queries = {"csv": timed(csv_topic_query, repeat=1), "sqlite": timed(sqlite_topic_query),
+                         "parquet": timed(parquet_topic_query)}
+        close_all_pools()
+
+    print(f"\n{'format':<16}{'size MB':>10}{'parse ms':>12}{'13 analyses ms':>17}{'topic top-10 ms':>18}")
+    for name in loaders:
+        topic = f"{topic_queries[name][0] * 1000:>18.1f}" if name in topic_queries else f"{'-':>18}"
+        print(f"{name:<16}{sizes[name] / 1e6:>10.1f}{parse_times[name] * 1000:>12.1f}"
+              f"{analyses[name][0] * 1000:>17.1f}{topic}")
+
+    failures = []
+    for name, (_, results) in analyses.items():
+        for analysis in ANALYSES:
+            try:
+                pd.testing.assert_frame_equal(results[analysis], expected[analysis], check_dtype=False)
+            except AssertionError:
+                failures.append(f"{analysis} on {name}")
+    if failures:
+        print("\nResults differing from the SQL queries:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nAll formats give the same analysis results.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Measures the top-k repositories per language against the number of languages, k and the table size.
+
+Synthetic databases are built with the loader's indexes and rollup tables. For each one
+the script times the index 'seek' plan of `top_repositories_per_language` (k entries
+read per language) and the 'window' plan (every row ranked with ROW_NUMBER), for each
+metric. The seek plan should stay flat as the table grows and grow with languages x k;
+the window plan grows with the table. Both plans must return the same rows as the
+pandas `top_k_per_group` over the whole table; the script exits with an error
+otherwise. Run from the repository root:
+
+    python benchmarks/bench_top_k.py --sizes 10000,100000,1000000 --groups 10,100,1000
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import data_analysis  # noqa: E402
+from analysis_backends import SQLiteBackend  # noqa: E402
+from analysis_engine import load_repositories, top_k_per_group  # noqa: E402
+from bench_pipeline import synthetic_records  # noqa: E402
+from pipeline import batched  # noqa: E402
+from push_to_sqlite import (COLUMN_NAMES, create_repositories_table, create_repository_indexes,  # noqa: E402
+                            create_rollups, create_topics_table, upsert_statement)
+
+TABLE = "github_repositories"
+
+
+def build_database(path, rows, groups):
+    """Builds a synthetic database whose repositories are spread over `groups` languages (one of them missing)."""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    create_repositories_table(conn, TABLE)
+    create_topics_table(conn)
+    statement = upsert_statement(TABLE)
+    conn.execute("BEGIN")
+    for batch in batched(synthetic_records(rows), 50000):
+        values = []
+        for record in batch:
+            index = int(record["Repository_Name"].removeprefix("repo-"))
+            language = index % groups
+            record["Programming_Language"] = f"language-{language}" if language else None
+            values.append(tuple(record[name] for name in COLUMN_NAMES))
+        conn.executemany(statement, values)
+    create_rollups(conn, TABLE)
+    conn.execute("COMMIT")
+    create_repository_indexes(conn, TABLE)
+    return conn
+
+
+def time_query(conn, query, params, repeat=5):
+    timings, rows = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = conn.execute(query, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return min(timings), rows
+
+
+def records(frame):
+    """The rows of a frame as plain lists, with missing values as None."""
+    return [[None if value != value else value for value in row] for row in frame.astype(object).values.tolist()]
+
+
+def measure(conn, backend, label, ks, frame, failures):
+    """Times both plans for every metric and k, checking them against the pandas result."""
+    for metric, (column, ties) in data_analysis.TOP_K_METRICS.items():
+        seek = data_analysis.top_repositories_query(backend, metric, plan="seek")
+        window = data_analysis.top_repositories_query(backend, metric, plan="window")
+        for k in ks:
+            seek_seconds, seek_rows = time_query(conn, seek, (k,))
+            window_seconds, window_rows = time_query(conn, window, (k,), repeat=1)
+            expected = records(top_k_per_group(frame, "Programming_Language", column, k=k, ties=ties,
+                                               columns=["Repository_Name", "Owner", column]))
+            print(f"{label:<30}{metric:<13}{k:>5}{len(seek_rows):>8}{seek_seconds * 1000:>10.2f}"
+                  f"{window_seconds * 1000:>12.2f}")
+            if [list(row) for row in seek_rows] != expected:
+                failures.append(f"seek plan, {metric}, k={k}, {label}")
+            if [list(row) for row in window_rows] != expected:
+                failures.append(f"window plan, {metric}, k={k}, {label}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="table sizes at 20 languages")
+    parser.add_argument("--groups", default="10,100,1000", help="numbers of languages at the largest size")
+    parser.add_argument("--ks", default="1,10,100", help="comma-separated values of k")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    ks = [int(k) for k in args.ks.split(",")]
+
+    failures = []
+    print(f"{'database':<30}{'metric':<13}{'k':>5}{'rows':>8}{'seek ms':>10}{'window ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        configurations = [(size, 20) for size in sizes] + [(sizes[-1], int(groups)) for groups in args.groups.split(",")]
+        for rows, groups in dict.fromkeys(configurations):
+            path = os.path.join(directory, f"bench-{rows}-{groups}.db")
+            conn = build_database(path, rows, groups)
+            frame = load_repositories(conn, TABLE)
+            measure(conn, SQLiteBackend(path), f"{rows} rows, {groups} languages", ks, frame, failures)
+            conn.close()
+
+    if failures:
+        print("\nResults differing from the pandas top-k per group:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nBoth plans match the pandas top-k per group.")
+
+
+if __name__ == "__main__":
+    main()
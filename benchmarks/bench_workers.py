@@ -0,0 +1,137 @@
+"""
+Measures how harvest throughput scales with the number of worker processes sharing a work queue.
+
+For each worker count, the topics are queued in a fresh `HarvestQueue` and that many
+processes run `run_harvest_worker` against the local stub of the search API in corpus
+mode (topics above the 1000-result cap, so they are sharded), all storing into the same
+SQLite database. Every worker has its own token and the stub gives each token a quota
+of `--quota` requests per second, as GitHub does, so the pages/s should grow close to
+linearly with the workers, as long as the quota keeps the stub and the workers, which
+share this machine's cores, from saturating them. A last run terminates one of two
+workers mid-harvest: its leases expire and the other worker must finish its tasks.
+
+After every run the queue must be drained with every task done, and the database must
+hold every repository of the corpus exactly once, under its topic; the script exits
+with an error otherwise. Run from the repository root:
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --topics 6 --repos 3000 --quota 8
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import fetch_github_data  # noqa: E402
+from harvest_jobs import HarvestQueue  # noqa: E402
+from pipeline import enqueue_topics, run_harvest_worker  # noqa: E402
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+TABLE = "github_repositories"
+
+
+def worker_process(index, queue_path, db_path, api_url, threads, lease_seconds, ready, start):
+    logging.disable(logging.ERROR)
+    fetch_github_data.RETRY_BASE_DELAY = 0.01
+    queue = HarvestQueue(queue_path, lease_seconds=lease_seconds)
+    # Process start-up and imports are left out of the timings
+    ready.release()
+    start.wait()
+    try:
+        run_harvest_worker(queue, db_path, TABLE, worker=f"worker-{index}", threads=threads,
+                           token=f"token-{index}", api_url=api_url, poll_interval=0.05)
+    finally:
+        queue.close()
+
+
+def harvest(api, directory, label, topics, workers, args, kill_after=None):
+    """Runs `workers` worker processes on a fresh queue and database, returning the queue counts and seconds."""
+    queue_path = os.path.join(directory, f"queue-{label}.db")
+    db_path = os.path.join(directory, f"store-{label}.db")
+    queue = HarvestQueue(queue_path, lease_seconds=args.lease)
+    enqueue_topics(queue, {topic: topic for topic in topics})
+    context = multiprocessing.get_context("spawn")
+    ready, start = context.Semaphore(0), context.Event()
+    processes = [context.Process(target=worker_process,
+                                 args=(index, queue_path, db_path, api.url, args.threads, args.lease, ready, start))
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+    started = time.perf_counter()
+    start.set()
+    if kill_after is not None:
+        time.sleep(kill_after)
+        processes[0].terminate()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    counts = queue.counts()
+    queue.close()
+    return db_path, counts, elapsed
+
+
+def check_store(api, db_path, topics, counts, label, failures):
+    if counts["done"] == 0 or any(counts[status] for status in ("queued", "leased", "failed")):
+        failures.append(f"{label}: queue left as {counts}")
+    with sqlite3.connect(db_path) as conn:
+        for topic in topics:
+            stored = conn.execute("SELECT Owner, Repository_Name FROM repository_topics WHERE topic = ?",
+                                  (topic,)).fetchall()
+            expected = {(repo["owner"]["login"], repo["name"]) for repo in api.corpus(topic)}
+            if len(stored) != len(set(stored)) or set(stored) != expected:
+                failures.append(f"{label}: '{topic}' has {len(stored)} rows for {len(expected)} repositories")
+        rows = conn.execute(f'SELECT COUNT(*) FROM "{TABLE}"').fetchone()[0]
+    if rows != len(topics) * api.corpus_size:
+        failures.append(f"{label}: {rows} repositories stored for {len(topics) * api.corpus_size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated numbers of worker processes")
+    parser.add_argument("--topics", type=int, default=6, help="number of topics to harvest")
+    parser.add_argument("--repos", type=int, default=3000, help="repositories per topic")
+    parser.add_argument("--threads", type=int, default=4, help="concurrent requests per worker")
+    parser.add_argument("--quota", type=int, default=8, help="requests per second allowed to each token")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub latency per request in seconds")
+    parser.add_argument("--lease", type=float, default=2.0, help="lease of a claimed task in seconds")
+    parser.add_argument("--kill-after", type=float, default=2.0,
+                        help="seconds after which one of two workers is terminated in the last run")
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    topics = [f"topic {index}" for index in range(args.topics)]
+    failures = []
+    print(f"{args.topics} topics of {args.repos} repositories, {args.threads} threads per worker, "
+          f"{args.quota} requests/s per token")
+    print(f"{'workers':<24}{'pages':>8}{'seconds':>9}{'pages/s':>9}{'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory, StubGitHubAPI(latency=args.latency, corpus_size=args.repos,
+                                                                   quota=args.quota, quota_per_token=True) as api:
+        baseline = None
+        for workers in (int(count) for count in args.workers.split(",")):
+            label = f"{workers} worker(s)"
+            db_path, counts, elapsed = harvest(api, directory, workers, topics, workers, args)
+            rate = counts["done"] / elapsed
+            baseline = baseline or rate
+            print(f"{label:<24}{counts['done']:>8}{elapsed:>9.2f}{rate:>9.1f}{rate / baseline:>8.2f}x")
+            check_store(api, db_path, topics, counts, label, failures)
+
+        label = "2, one terminated"
+        db_path, counts, elapsed = harvest(api, directory, "killed", topics, 2, args, kill_after=args.kill_after)
+        print(f"{label:<24}{counts['done']:>8}{elapsed:>9.2f}{counts['done'] / elapsed:>9.1f}")
+        check_store(api, db_path, topics, counts, label, failures)
+
+    if failures:
+        print("\nIncomplete distributed harvests:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nEvery run drained the queue and stored every repository exactly once.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+A local stand-in for the GitHub search API used by the harvesting benchmarks.
+
+The stub serves deterministic fake repositories, adds a configurable latency to
+every request and enforces a request quota through the same headers GitHub uses
+(`X-RateLimit-Remaining`, `X-RateLimit-Reset` and `Retry-After`). Responses
+carry an `ETag` and conditional requests are answered with `304 Not Modified`.
+
+Given a `corpus_size`, every topic instead has that many repositories and the stub
+behaves like GitHub search on them: `created:` and `stars:` qualifiers filter the
+results, `total_count` is the true number of matches and no result past the first
+1000 is ever returned (such pages get a 422).
+
+Pages whose number is in `failing_pages` are answered with a 502 until they are
+removed, and `served` counts the pages answered in full per query and page.
+
+With `quota_per_token`, each `Authorization` token has a quota of its own, as on
+GitHub, so that workers with different tokens add up their budgets.
+
+`POST /graphql` answers the repository search query of `fetch_github_graphql` (only
+its variables are read) from the same repositories, with cursor pagination, and
+`GET /repos/{owner}/{name}/releases/latest` serves the REST view of their releases.
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SEARCH_RESULT_CAP = 1000
+
+
+def fake_repository(topic, index):
+    """Builds a deterministic fake repository item for a topic."""
+    slug = topic.replace(" ", "-")
+    return {
+        "name": f"{slug}-repo-{index}",
+        "owner": {"login": f"owner-{index % 97}"},
+        "description": f"Fake repository {index} about {topic}",
+        "html_url": f"https://github.com/owner-{index % 97}/{slug}-repo-{index}",
+        "language": ["Python", "Jupyter Notebook", "C++", None][index % 4],
+        "created_at": f"20{10 + index % 14:02d}-0{1 + index % 9}-1{index % 10}T10:00:00Z",
+        "updated_at": f"2024-0{1 + index % 9}-1{index % 10}T12:00:00Z",
+        "stargazers_count": (index * 7919) % 50000,
+        "forks_count": (index * 104729) % 9000,
+        "open_issues_count": index % 120,
+        "license": {"name": "MIT License"} if index % 3 else None,
+    }
+
+
+def fake_extras(repo):
+    """Returns the deterministic topics and releases of a fake repository."""
+    index = int(repo["name"].rsplit("-", 1)[1])
+    releases = index % 25
+    topics = [f"topic-{index % 13}"] + ([repo["language"].lower().replace(" ", "-")] if repo["language"] else [])
+    return {"topics": topics, "releases": releases,
+            "latest_release": f"v{index % 7}.{index % 10}.{releases}" if releases else None}
+
+
+def graphql_node(repo, topics_first):
+    """Converts a fake repository item into the repository node of the GraphQL search."""
+    extras = fake_extras(repo)
+    open_pull_requests = repo["open_issues_count"] // 3
+    return {
+        "name": repo["name"],
+        "owner": {"login": repo["owner"]["login"]},
+        "description": repo["description"],
+        "url": repo["html_url"],
+        "primaryLanguage": {"name": repo["language"]} if repo["language"] else None,
+        "createdAt": repo["created_at"],
+        "updatedAt": repo["updated_at"],
+        "stargazerCount": repo["stargazers_count"],
+        "forkCount": repo["forks_count"],
+        "issues": {"totalCount": repo["open_issues_count"] - open_pull_requests},
+        "pullRequests": {"totalCount": open_pull_requests},
+        "licenseInfo": {"name": repo["license"]["name"]} if repo["license"] else None,
+        "repositoryTopics": {"nodes": [{"topic": {"name": name}} for name in extras["topics"][:topics_first]]},
+        "releases": {"totalCount": extras["releases"]},
+        "latestRelease": {"tagName": extras["latest_release"]} if extras["latest_release"] else None,
+    }
+
+
+def parse_range(value):
+    """Parses the value of a range qualifier (`a..b`, `>=a`, `<=b`, `>a`, `<b` or `a`) into inclusive bounds."""
+    if ".." in value:
+        low, high = value.split("..", 1)
+        return (None if low == "*" else low), (None if high == "*" else high)
+    for prefix, bounds in ((">=", lambda v: (v, None)), ("<=", lambda v: (None, v)),
+                           (">", lambda v: (v, None)), ("<", lambda v: (None, v))):
+        if value.startswith(prefix):
+            return bounds(value[len(prefix):])
+    return value, value
+
+
+def parse_query(query):
+    """Splits a search query into its text and its `created:`/`stars:` bounds."""
+    words, bounds = [], {}
+    for word in query.split():
+        name, _, value = word.partition(":")
+        if value and name in ("created", "stars"):
+            low, high = parse_range(value)
+            convert = int if name == "stars" else str
+            bounds[name] = (None if low is None else convert(low), None if high is None else convert(high))
+        elif not value:
+            words.append(word)
+    return " ".join(words), bounds
+
+
+def within(value, bounds):
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class StubGitHubAPI:
+    """
+    Runs the stub API in a background thread.
+
+    Args:
+        latency (float, optional): Seconds added to every response. Defaults to 0.05.
+        total_count (int, optional): Number of results each query claims to have. Defaults to 1000.
+        quota (int, optional): Requests allowed per window, or None for no limit. Defaults to None.
+        window (float, optional): Length of a quota window in seconds. Defaults to 1.0.
+        corpus_size (int, optional): Repositories per topic, searched with GitHub's result cap,
+            instead of `total_count` results for any query. Defaults to None.
+        quota_per_token (bool, optional): Apply the quota to each token separately. Defaults to False.
+    """
+
+    def __init__(self, latency=0.05, total_count=1000, quota=None, window=1.0, corpus_size=None,
+                 quota_per_token=False):
+        self.latency = latency
+        self.total_count = total_count
+        self.corpus_size = corpus_size
+        self._corpora = {}
+        self.failing_pages = set()
+        self.served = Counter()
+        self.quota = quota
+        self.window = window
+        self.quota_per_token = quota_per_token
+        self.requests = 0
+        self.rejected = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _take_quota(self, token=None):
+        """Returns `(allowed, remaining, reset_at)` for one incoming request made with a token."""
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            key = token if self.quota_per_token else None
+            window_start, used = self._windows.get(key, (now, 0))
+            if now - window_start >= self.window:
+                window_start, used = now, 0
+            reset_at = window_start + self.window
+            if self.quota is None:
+                return True, 5000, reset_at
+            if used >= self.quota:
+                self.rejected += 1
+                return False, 0, reset_at
+            self._windows[key] = (window_start, used + 1)
+            return True, self.quota - used - 1, reset_at
+
+    def corpus(self, topic):
+        """Returns all the repositories of a topic in corpus mode."""
+        with self._lock:
+            if topic not in self._corpora:
+                self._corpora[topic] = [fake_repository(topic, index) for index in range(self.corpus_size)]
+            return self._corpora[topic]
+
+    def search(self, query, page, per_page):
+        """Returns the JSON payload of one search page, or None past the result cap in corpus mode."""
+        start = (page - 1) * per_page
+        if self.corpus_size is not None:
+            topic, bounds = parse_query(query)
+            matches = [repo for repo in self.corpus(topic)
+                       if within(repo["created_at"][:10], bounds.get("created", (None, None)))
+                       and within(repo["stargazers_count"], bounds.get("stars", (None, None)))]
+            if start >= SEARCH_RESULT_CAP:
+                return None
+            return {
+                "total_count": len(matches),
+                "incomplete_results": False,
+                "items": matches[start:min(start + per_page, SEARCH_RESULT_CAP)],
+            }
+        stop = min(start + per_page, self.total_count)
+        return {
+            "total_count": self.total_count,
+            "incomplete_results": False,
+            "items": [fake_repository(query, index) for index in range(start, stop)],
+        }
+
+    def search_graphql(self, variables, remaining=5000):
+        """Returns the `data` of the GraphQL repository search for its variables."""
+        first = variables["first"]
+        offset = int(base64.b64decode(variables["after"]).decode().split(":")[1]) if variables.get("after") else 0
+        page = self.search(variables["query"], offset // first + 1, first) or {"total_count": 0, "items": []}
+        end = offset + len(page["items"])
+        with self._lock:
+            self.served[variables["query"], offset // first + 1] += 1
+        # One request for the search, and one per repository for each of its four connections
+        return {
+            "rateLimit": {"cost": max(1, round((1 + 4 * first) / 100)), "remaining": remaining, "resetAt": None},
+            "search": {
+                "repositoryCount": page["total_count"],
+                "pageInfo": {"hasNextPage": end < min(page["total_count"], SEARCH_RESULT_CAP),
+                             "endCursor": base64.b64encode(f"cursor:{end}".encode()).decode()},
+                "nodes": [graphql_node(repo, variables.get("topics", 0)) for repo in page["items"]],
+            },
+        }
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, headers):
+                body = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                time.sleep(api.latency)
+                allowed, remaining, reset_at = api._take_quota(self.headers.get("Authorization"))
+                headers = {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": f"{reset_at:.3f}"}
+                if not allowed:
+                    headers["Retry-After"] = f"{max(reset_at - time.time(), 0):.3f}"
+                    self._send(403, {"message": "API rate limit exceeded"}, headers)
+                    return
+
+                parsed = urlparse(self.path)
+                params = parse_qs(parsed.query)
+                parts = parsed.path.strip("/").split("/")
+                if len(parts) == 5 and parts[0] == "repos" and parts[3:] == ["releases", "latest"]:
+                    extras = fake_extras({"name": parts[2], "language": None})
+                    if extras["latest_release"] is None:
+                        self._send(404, {"message": "Not Found"}, headers)
+                    else:
+                        self._send(200, {"tag_name": extras["latest_release"]}, headers)
+                    return
+                if parsed.path != "/search/repositories":
+                    self._send(404, {"message": "Not Found"}, headers)
+                    return
+                query = params.get("q", [""])[0]
+                page = int(params.get("page", ["1"])[0])
+                if page in api.failing_pages:
+                    self._send(502, {"message": "Server Error"}, headers)
+                    return
+                per_page = int(params.get("per_page", ["30"])[0])
+                payload = api.search(query, page, per_page)
+                if payload is None:
+                    self._send(422, {"message": "Only the first 1000 search results are available"}, headers)
+                    return
+                etag = '"' + hashlib.sha1(json.dumps(payload).encode()).hexdigest() + '"'
+                headers["ETag"] = etag
+                if self.headers.get("If-None-Match") == etag:
+                    with api._lock:
+                        api.not_modified += 1
+                    self._send(304, None, headers)
+                    return
+                with api._lock:
+                    api.served[query, page] += 1
+                self._send(200, payload, headers)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                time.sleep(api.latency)
+                allowed, remaining, reset_at = api._take_quota(self.headers.get("Authorization"))
+                headers = {"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": f"{reset_at:.3f}"}
+                if not allowed:
+                    headers["Retry-After"] = f"{max(reset_at - time.time(), 0):.3f}"
+                    self._send(403, {"message": "API rate limit exceeded"}, headers)
+                    return
+                if urlparse(self.path).path != "/graphql":
+                    self._send(404, {"message": "Not Found"}, headers)
+                    return
+                self._send(200, {"data": api.search_graphql(body.get("variables") or {}, remaining)}, headers)
+
+        return Handler
@@ -0,0 +1,434 @@
+import os
+import threading
+import pandas as pd
+from analysis_engine import ANALYSIS_COLUMNS
+from analysis_engine import load_repositories as load_sqlite_repositories
+from connection_pool import get_pool
+from parquet_store import load_repository_table
+from push_to_sqlite import OutdatedSchemaError, schema_is_outdated
+from query_cache import dataset_version
+from utils import logger
+
+DEFAULT_BACKEND = "sqlite"
+
+
+def paginate(query, params=(), limit=None, offset=0, no_limit=-1):
+    """
+    Appends bound LIMIT and OFFSET clauses to a query.
+
+    The clause text only depends on whether a page is requested, so every page of a query
+    runs the same statement, which the connection prepares once and then reuses.
+
+    Args:
+        query (str): The query, without a trailing semicolon.
+        params (tuple, optional): The parameters of the query. Defaults to none.
+        limit (int, optional): The maximum number of rows. Defaults to all rows.
+        offset (int, optional): The number of rows to skip. Defaults to 0.
+        no_limit (optional): The LIMIT value meaning all rows in the SQL dialect. Defaults to SQLite's -1.
+
+    Returns:
+        tuple: The query and its parameters.
+    """
+    if limit is None and not offset:
+        return query, tuple(params)
+    return (f"{query.rstrip()}\n        LIMIT ? OFFSET ?",
+            (*params, no_limit if limit is None else int(limit), int(offset)))
+
+# The dashboard analyses on the base table of a backend, aliased as `r`, in SQL that SQLite and
+# DuckDB both run. DuckDB runs them for the 13 analyses, and both backends run them when the
+# analyses are filtered, which the SQLite rollups cannot serve. They return the same rows, in the
+# same order, as the SQLite queries in data_analysis; NULL ordering is spelled out because DuckDB
+# sorts NULLs last where SQLite sorts them first. `{filters}` holds the filter conditions.
+BASE_TABLE_QUERIES = {
+    "most_starred_repositories": """
+        SELECT r.Repository_Name, r.Owner, r.Number_of_Stars
+        FROM {table} AS r
+        WHERE {filters}
+        ORDER BY r.Number_of_Stars DESC, r.Repository_Name DESC, r.Owner DESC
+    """,
+    "most_forked_repositories": """
+        SELECT r.Repository_Name, r.Owner, r.Number_of_Forks
+        FROM {table} AS r
+        WHERE {filters}
+        ORDER BY r.Number_of_Forks DESC, r.Repository_Name DESC, r.Owner DESC
+    """,
+    "most_popular_languages": """
+        SELECT r.Programming_Language, COUNT(*) AS Count
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY r.Programming_Language
+        ORDER BY Count DESC, r.Programming_Language NULLS FIRST
+    """,
+    "most_updated_repositories": """
+        SELECT r.Repository_Name, r.Owner, r.Last_Updated_Date
+        FROM {table} AS r
+        WHERE {filters}
+        ORDER BY r.Last_Updated_Date DESC, r.Repository_Name DESC, r.Owner DESC
+    """,
+    "most_popular_licenses": """
+        SELECT r.License_Type, COUNT(*) AS Count
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY r.License_Type
+        ORDER BY Count DESC, r.License_Type NULLS FIRST
+    """,
+    "most_popular_contributors": """
+        SELECT r.Owner, COUNT(*) AS Count
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY r.Owner
+        ORDER BY Count DESC, r.Owner NULLS FIRST
+    """,
+    "average_stars_by_language": """
+        SELECT r.Programming_Language, AVG(r.Number_of_Stars) AS Average_Stars
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY r.Programming_Language
+        ORDER BY Average_Stars DESC, r.Programming_Language NULLS FIRST
+    """,
+    "average_forks_by_language": """
+        SELECT r.Programming_Language, AVG(r.Number_of_Forks) AS Average_Forks
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY r.Programming_Language
+        ORDER BY Average_Forks DESC, r.Programming_Language NULLS FIRST
+    """,
+    "repos_with_OpenIssues": """
+        SELECT r.Repository_Name, r.Number_of_Open_Issues
+        FROM {table} AS r
+        WHERE r.Number_of_Open_Issues > 0 AND {filters}
+        ORDER BY r.Number_of_Open_Issues DESC, r.Repository_Name DESC
+    """,
+    "repo_created_each_year": """
+        SELECT substr(r.Creation_Date, 1, 4) AS year, COUNT(*) AS count
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY year
+        ORDER BY year DESC NULLS LAST
+    """,
+    "most_recently_updated_repo": """
+        SELECT r.Repository_Name, r.Last_Updated_Date
+        FROM {table} AS r
+        WHERE {filters}
+        ORDER BY r.Last_Updated_Date DESC, r.Repository_Name DESC, r.Owner DESC
+    """,
+    "distribution_of_licenses": """
+        SELECT r.License_Type, COUNT(*) AS Count
+        FROM {table} AS r
+        WHERE {filters}
+        GROUP BY r.License_Type
+        ORDER BY Count DESC, r.License_Type NULLS FIRST
+    """,
+    "popular_repo_for_each_language": """
+        SELECT Programming_Language, Repository_Name, max_stars
+        FROM (
+            SELECT r.Programming_Language, r.Repository_Name, r.Number_of_Stars AS max_stars,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY r.Programming_Language
+                       ORDER BY r.Number_of_Stars DESC, r.Number_of_Forks DESC, r.Repository_Name DESC
+                   ) AS language_rank
+            FROM {table} AS r
+            WHERE {filters}
+        ) AS ranked
+        WHERE language_rank = 1
+        ORDER BY max_stars DESC, Programming_Language NULLS FIRST
+    """,
+}
+
+
+def base_table_query(backend, analysis, conditions=()):
+    """
+    Returns the query of an analysis on the base table of a backend (see `BASE_TABLE_QUERIES`).
+
+    Args:
+        backend (SQLiteBackend | DuckDBBackend): The backend, which provides the table name.
+        analysis (str): The name of the `data_analysis` function.
+        conditions (list, optional): Filter conditions on the table aliased as `r`. Defaults to none.
+
+    Returns:
+        str: The query.
+    """
+    return BASE_TABLE_QUERIES[analysis].format(table=backend.table, filters=" AND ".join(conditions) or "TRUE")
+
+
+class SQLiteBackend:
+    """
+    Runs the analysis queries on the SQLite database through the shared read-only connection pool.
+
+    The backend never writes to the database: one written by an older version has to be
+    migrated first, with `cli.py migrate` or by the next load (see `upgrade_database`).
+
+    Args:
+        db_path (str): The path to the SQLite database file.
+        immutable (bool, optional): Open the database as immutable (see `ReadOnlyConnectionPool`). Defaults to False.
+
+    Raises:
+        OutdatedSchemaError: If the database lacks parts of the current schema.
+    """
+
+    name = "sqlite"
+    table = "github_repositories"
+    year_column = "r.Creation_Year"
+    topic_filter = ("EXISTS (SELECT 1 FROM repository_topics AS t "
+                    "WHERE t.Owner = r.Owner AND t.Repository_Name = r.Repository_Name AND t.Topic = ?)")
+
+    def __init__(self, db_path, immutable=False):
+        self.db_path = db_path
+        self.immutable = immutable
+        if os.path.exists(db_path):
+            with get_pool(db_path, immutable=immutable).connection() as connection:
+                if schema_is_outdated(connection, self.table):
+                    raise OutdatedSchemaError(f"{db_path} was written by an older version, "
+                                              f"migrate it with `python src/cli.py migrate --db {db_path}`")
+
+    def version(self):
+        """Returns the dataset version stamp of the database (see `query_cache.dataset_version`)."""
+        return dataset_version(self.db_path)
+
+    def run(self, analysis, query, params=(), limit=None, offset=0):
+        """
+        Runs the SQLite query of an analysis with bound parameters.
+
+        Args:
+            analysis (str): The name of the `data_analysis` function, or None for an ad hoc query.
+            query (str): The SQL query of that function.
+            params (tuple, optional): The parameters of the query. Defaults to none.
+            limit (int, optional): The maximum number of rows. Defaults to all rows.
+            offset (int, optional): The number of rows to skip. Defaults to 0.
+
+        Returns:
+            pd.DataFrame: The query result.
+        """
+        query, params = paginate(query, params, limit, offset)
+        with get_pool(self.db_path, immutable=self.immutable).connection() as connection:
+            return pd.read_sql(query, connection, params=params)
+
+    def load_repositories(self):
+        """Loads the analysed columns of every repository (see `analysis_engine.load_repositories`)."""
+        with get_pool(self.db_path, immutable=self.immutable).connection() as connection:
+            return load_sqlite_repositories(connection)
+
+
+class DuckDBBackend:
+    """
+    Runs the analyses with DuckDB directly on the cleaned data, without loading it into a database.
+
+    The source is either the Parquet store (see `parquet_store`), read with partition and
+    column pruning and keeping the latest harvest of every repository, or a cleaned CSV file.
+    The files are scanned in place by every query, so a new harvest or a rewritten CSV is
+    picked up without a reload.
+
+    Args:
+        source (str): The Parquet store directory or the cleaned CSV file.
+        threads (int, optional): The number of DuckDB worker threads. Defaults to DuckDB's choice.
+    """
+
+    name = "duckdb"
+    table = "repositories"
+    year_column = "CAST(substr(r.Creation_Date, 1, 4) AS INTEGER)"
+
+    def __init__(self, source, threads=None):
+        self.source = source
+        self.threads = threads
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def topic_filter(self):
+        """The condition on a repository `r` to be found under a topic, bound as one parameter."""
+        path = self.source.replace("'", "''")
+        if os.path.isdir(self.source):
+            # Only the files of the topic's partitions are read
+            return (f"EXISTS (SELECT 1 FROM read_parquet('{path}/**/*.parquet', hive_partitioning = true) AS t "
+                    f"WHERE t.Topic = ? AND t.Owner = r.Owner AND t.Repository_Name = r.Repository_Name)")
+        return "list_contains(string_split(r.Topics, ';'), ?)"
+
+    def _source_relation(self):
+        """Returns the SQL relation of the source files."""
+        path = self.source.replace("'", "''")
+        if os.path.isdir(self.source):
+            # One row per (repository, topic, harvest): keep the repository's latest harvest once
+            return f"""
+                SELECT * EXCLUDE (Topic, Harvest_Date, row_number)
+                FROM (
+                    SELECT *, ROW_NUMBER() OVER (
+                        PARTITION BY Owner, Repository_Name ORDER BY Harvest_Date DESC
+                    ) AS row_number
+                    FROM read_parquet('{path}/**/*.parquet', hive_partitioning = true)
+                )
+                WHERE row_number = 1
+            """
+        return f"""
+            SELECT * FROM read_csv('{path}', header = true,
+                                   types = {{'Creation_Date': 'VARCHAR', 'Last_Updated_Date': 'VARCHAR'}})
+        """
+
+    def _create_relation(self, connection):
+        """Creates the `repositories` view of the source on a new connection."""
+        connection.execute(f"CREATE VIEW repositories AS {self._source_relation()}")
+
+    def connection(self):
+        """Returns the DuckDB connection, opening it and creating the `repositories` view on first use."""
+        with self._lock:
+            if self._connection is None:
+                try:
+                    import duckdb
+                except ImportError as e:
+                    raise ImportError("The DuckDB backend requires duckdb: pip install duckdb") from e
+                connection = duckdb.connect(":memory:")
+                if self.threads:
+                    connection.execute(f"SET threads = {int(self.threads)}")
+                self._create_relation(connection)
+                self._connection = connection
+                logger.info(f"Opened a DuckDB backend over {self.source}")
+            return self._connection
+
+    def version(self):
+        """
+        Returns a stamp of the source files, which changes whenever a file is added, removed or rewritten.
+
+        Returns:
+            tuple: The number of files, their total size and their latest modification time.
+        """
+        paths = [self.source]
+        if os.path.isdir(self.source):
+            paths = [os.path.join(root, name) for root, _, names in os.walk(self.source)
+                     for name in names if name.endswith(".parquet")]
+        count = size = latest = 0
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            count, size, latest = count + 1, size + stat.st_size, max(latest, stat.st_mtime_ns)
+        return count, size, latest
+
+    def run(self, analysis, query=None, params=(), limit=None, offset=0):
+        """
+        Runs the DuckDB query of an analysis with bound parameters.
+
+        Args:
+            analysis (str): The name of the `data_analysis` function, or None to run `query` itself.
+            query (str, optional): The SQLite query of that function, unused for the 13 analyses.
+                Ad hoc queries must be portable and read the `repositories` view. Defaults to None.
+            params (tuple, optional): The parameters of the query. Defaults to none.
+            limit (int, optional): The maximum number of rows. Defaults to all rows.
+            offset (int, optional): The number of rows to skip. Defaults to 0.
+
+        Returns:
+            pd.DataFrame: The query result.
+        """
+        if analysis in BASE_TABLE_QUERIES:
+            query = base_table_query(self, analysis)
+        query, params = paginate(query, params, limit, offset, no_limit=None)
+        # Each query gets its own cursor, so concurrent dashboard sessions do not share one
+        cursor = self.connection().cursor()
+        try:
+            return cursor.execute(query, list(params)).df()
+        finally:
+            cursor.close()
+
+    def load_repositories(self):
+        """Loads the analysed columns of every repository, shaped like `analysis_engine.load_repositories`."""
+        columns = ", ".join(f'"{name}"' for name in ANALYSIS_COLUMNS)
+        cursor = self.connection().cursor()
+        try:
+            frame = cursor.execute(f"SELECT {columns} FROM repositories").df()
+        finally:
+            cursor.close()
+        for column in ("Programming_Language", "License_Type", "Owner"):
+            frame[column] = frame[column].astype("category")
+        return frame
+
+    def close(self):
+        """Closes the DuckDB connection; it is reopened on the next query."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class ArrowBackend(DuckDBBackend):
+    """
+    Runs the analyses with DuckDB on the memory-mapped Arrow snapshot of the Parquet store.
+
+    The snapshot written by `cli.py parquet --snapshot` (or the partitions, when it is
+    missing or older than them; see `parquet_store.load_repository_table`) is loaded once
+    per version of the store and queried in place as the `repositories` relation, without
+    copying the mapped buffers. `warm_cache` computes the 13 analyses from the same table
+    in one pass. Topic filters read the topic partitions of the store.
+
+    Args:
+        source (str): The Parquet store directory.
+        threads (int, optional): The number of DuckDB worker threads. Defaults to DuckDB's choice.
+    """
+
+    name = "arrow"
+
+    def __init__(self, source, threads=None):
+        super().__init__(source, threads)
+        self._table = None
+        self._table_version = None
+
+    def arrow_table(self):
+        """Returns the Arrow table of the repositories, loading it again when the store has changed."""
+        version = self.version()
+        with self._lock:
+            if self._table is None or version != self._table_version:
+                self._table, self._table_version = load_repository_table(self.source), version
+                if self._connection is not None:
+                    self._create_relation(self._connection)
+            return self._table
+
+    def _create_relation(self, connection):
+        """Creates (or replaces) the `repositories` view over the loaded table, seen by every cursor."""
+        connection.from_arrow(self._table).create_view("repositories", replace=True)
+
+    def connection(self):
+        """Returns the DuckDB connection, with the `repositories` relation over the current snapshot."""
+        self.arrow_table()
+        return super().connection()
+
+    def load_repositories(self):
+        """Returns the analysed columns of every repository, shaped like `analysis_engine.load_repositories`."""
+        return self.arrow_table().to_pandas()
+
+
+BACKENDS = {backend.name: backend for backend in (SQLiteBackend, DuckDBBackend, ArrowBackend)}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=DEFAULT_BACKEND, **options):
+    """
+    Returns the shared analysis backend for a name and its options, creating it on first use.
+
+    Args:
+        name (str, optional): The backend name, one of `BACKENDS`. Defaults to 'sqlite'.
+        **options: The options of the backend class, e.g. `db_path` for SQLite or `source` for DuckDB.
+
+    Returns:
+        SQLiteBackend | DuckDBBackend | ArrowBackend: The backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown analysis backend {name!r}, expected one of {', '.join(sorted(BACKENDS))}")
+    key = (name, tuple(sorted(options.items())))
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = _backends[key] = BACKENDS[name](**options)
+        return backend
+
+
+def close_all_backends():
+    """Closes every shared backend that holds a connection of its own."""
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        if hasattr(backend, "close"):
+            backend.close()
@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+from utils import logger
+
+# Columns of github_repositories needed by the 13 dashboard analyses
+ANALYSIS_COLUMNS = [
+    "Repository_Name", "Owner", "Programming_Language", "Creation_Date", "Last_Updated_Date",
+    "Number_of_Stars", "Number_of_Forks", "Number_of_Open_Issues", "License_Type",
+]
+
+
+def load_repositories(connection, table_name="github_repositories"):
+    """
+    Loads the columns used by the analyses in a single scan of the repositories table.
+
+    Args:
+        connection (sqlite3.Connection): The connection to the GitHub database.
+        table_name (str, optional): The name of the repositories table. Defaults to 'github_repositories'.
+
+    Returns:
+        pd.DataFrame: One row per repository.
+    """
+    columns = ", ".join(f'"{name}"' for name in ANALYSIS_COLUMNS)
+    rows = connection.execute(f'SELECT {columns} FROM "{table_name}"').fetchall()
+    frame = pd.DataFrame.from_records(rows, columns=ANALYSIS_COLUMNS)
+    for column in ("Programming_Language", "License_Type", "Owner"):
+        frame[column] = frame[column].astype("category")
+    return frame
+
+
+def _ranked(frame):
+    """Gives a result frame the 1-based index used by the dashboard tables."""
+    frame = frame.reset_index(drop=True)
+    frame.index = frame.index + 1
+    return frame
+
+
+def top_k(frame, column, k=10, ties=("Repository_Name", "Owner"), columns=None):
+    """
+    Returns the `k` rows with the largest values of a column, largest first.
+
+    The k-th largest value is found with `np.partition` in linear time (over the
+    distinct values for text columns), so only the rows at or above it are ever
+    sorted. Ties are broken like the SQL queries, by the `ties` columns in
+    descending order.
+
+    Args:
+        frame (pd.DataFrame): The rows to rank.
+        column (str): The column to rank by.
+        k (int, optional): The number of rows to return. Defaults to 10.
+        ties (tuple, optional): The columns breaking ties. Defaults to ('Repository_Name', 'Owner').
+        columns (list, optional): The columns to return. Defaults to all columns.
+
+    Returns:
+        pd.DataFrame: The top rows, ranked from 1.
+    """
+    values = frame[column]
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.fillna("")
+    if len(values) > k:
+        distinct = values.to_numpy() if pd.api.types.is_numeric_dtype(values) else pd.unique(values.to_numpy())
+        threshold = np.partition(distinct, max(len(distinct) - k, 0))[max(len(distinct) - k, 0)]
+        frame = frame[(values >= threshold).to_numpy()]
+    order = [column, *ties]
+    top = frame.sort_values(order, ascending=False, kind="stable").head(k)
+    return _ranked(top[columns] if columns else top)
+
+
+def top_k_per_group(frame, group, column, k=3, ties=("Repository_Name", "Owner"), columns=None):
+    """
+    Returns the `k` rows with the largest values of a column in every group.
+
+    Rows are ranked like `top_k` within each group and listed by group (missing group
+    first) and rank, with the rank in a `Rank` column, like
+    `data_analysis.top_repositories_per_language`. Rows without a value are left out.
+
+    Args:
+        frame (pd.DataFrame): The rows to rank.
+        group (str): The column defining the groups.
+        column (str): The column to rank by.
+        k (int, optional): The number of rows per group. Defaults to 3.
+        ties (tuple, optional): The columns breaking ties. Defaults to ('Repository_Name', 'Owner').
+        columns (list, optional): The columns to return after the group and the rank. Defaults to
+            the ties and the ranked column.
+
+    Returns:
+        pd.DataFrame: The top rows of every group, ranked from 1.
+    """
+    ranked = frame[frame[column].notna().to_numpy()].sort_values([column, *ties], ascending=False, kind="stable")
+    top = ranked.groupby(group, dropna=False, observed=True, sort=False).head(k)
+    top = top.assign(Rank=top.groupby(group, dropna=False, observed=True, sort=False).cumcount() + 1)
+    top = top.sort_values([group, "Rank"], na_position="first", kind="stable")
+    return _ranked(top[[group, "Rank", *(columns or [*ties, column])]])
+
+
+def _by_count(frame, column, count="Count"):
+    """Orders group rows by count, largest first, with ties in ascending group order like SQL."""
+    return frame.sort_values([count, column], ascending=[False, True], na_position="first", kind="stable")
+
+
+def _count_by(frame, column, k=None):
+    counts = frame[column].value_counts(dropna=False, sort=False).rename_axis(column).reset_index(name="Count")
+    counts = _by_count(counts, column)
+    return _ranked(counts if k is None else counts.head(k))
+
+
+def compute_all_analyses(frame):
+    """
+    Computes all 13 dashboard analyses from one in-memory copy of the repositories table.
+
+    Every top-N, group-by and histogram is computed with vectorized operations on the
+    same frame, and the per-language aggregates share a single group-by pass.
+
+    Args:
+        frame (pd.DataFrame): The repositories, as returned by `load_repositories`.
+
+    Returns:
+        dict: A DataFrame per `data_analysis` function name, shaped like that function's result.
+    """
+    logger.info(f"Computing all analyses over {len(frame)} repositories in one pass...")
+    results = {}
+
+    results["most_starred_repositories"] = top_k(
+        frame, "Number_of_Stars", columns=["Repository_Name", "Owner", "Number_of_Stars"])
+    results["most_forked_repositories"] = top_k(
+        frame, "Number_of_Forks", columns=["Repository_Name", "Owner", "Number_of_Forks"])
+    results["most_updated_repositories"] = top_k(
+        frame, "Last_Updated_Date", columns=["Repository_Name", "Owner", "Last_Updated_Date"])
+    results["most_recently_updated_repo"] = results["most_updated_repositories"][
+        ["Repository_Name", "Last_Updated_Date"]].copy()
+    results["repos_with_OpenIssues"] = top_k(
+        frame[frame["Number_of_Open_Issues"] > 0], "Number_of_Open_Issues", ties=("Repository_Name",),
+        columns=["Repository_Name", "Number_of_Open_Issues"])
+
+    by_language = frame.groupby("Programming_Language", dropna=False, observed=True).agg(
+        Count=("Repository_Name", "size"),
+        Average_Stars=("Number_of_Stars", "mean"),
+        Average_Forks=("Number_of_Forks", "mean"),
+    ).reset_index()
+    results["most_popular_languages"] = _ranked(
+        _by_count(by_language, "Programming_Language").head(10)[["Programming_Language", "Count"]])
+    results["average_stars_by_language"] = _ranked(
+        by_language.sort_values(["Average_Stars", "Programming_Language"], ascending=[False, True],
+                                na_position="first", kind="stable")[
+            ["Programming_Language", "Average_Stars"]])
+    results["average_forks_by_language"] = _ranked(
+        by_language.sort_values(["Average_Forks", "Programming_Language"], ascending=[False, True],
+                                na_position="first", kind="stable")[
+            ["Programming_Language", "Average_Forks"]])
+
+    # Only the repositories holding their language's maximum star count can be its top repository
+    language_max = frame.groupby("Programming_Language", dropna=False, observed=True)["Number_of_Stars"].transform("max")
+    candidates = frame[(frame["Number_of_Stars"] == language_max).to_numpy()]
+    popular = candidates.sort_values(
+        ["Number_of_Stars", "Number_of_Forks", "Repository_Name"], ascending=False, kind="stable"
+    ).drop_duplicates("Programming_Language", keep="first")
+    popular = popular.sort_values(["Number_of_Stars", "Programming_Language"], ascending=[False, True],
+                                  na_position="first", kind="stable")
+    results["popular_repo_for_each_language"] = _ranked(
+        popular[["Programming_Language", "Repository_Name", "Number_of_Stars"]]
+        .rename(columns={"Number_of_Stars": "max_stars"}))
+
+    results["distribution_of_licenses"] = _count_by(frame, "License_Type")
+    results["most_popular_licenses"] = _ranked(results["distribution_of_licenses"].head(10))
+    results["most_popular_contributors"] = _count_by(frame, "Owner", k=10)
+
+    # Count the distinct creation dates first, so that only those are cut down to their year
+    dates = frame["Creation_Date"].value_counts(dropna=False)
+    years = dates.groupby(dates.index.str.slice(0, 4), dropna=False).sum().rename_axis("year")
+    results["repo_created_each_year"] = _ranked(
+        years.reset_index(name="count").sort_values("year", ascending=False, kind="stable"))
+
+    for name, result in results.items():
+        for column in result.columns:
+            if isinstance(result[column].dtype, pd.CategoricalDtype):
+                result[column] = result[column].astype(object)
+    return results
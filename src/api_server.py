@@ -0,0 +1,364 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+import data_analysis
+from query_cache import QueryCache
+from utils import logger
+
+# The analyses served under /api/<name>, with the default `limit` of each
+ANALYSES = {
+    "most_starred_repositories": 10,
+    "most_forked_repositories": 10,
+    "most_updated_repositories": 10,
+    "most_popular_languages": 10,
+    "most_popular_licenses": 10,
+    "most_popular_contributors": 10,
+    "average_stars_by_language": None,
+    "average_forks_by_language": None,
+    "repos_with_OpenIssues": 10,
+    "repo_created_each_year": None,
+    "most_recently_updated_repo": 10,
+    "distribution_of_licenses": None,
+    "popular_repo_for_each_language": None,
+}
+
+MAX_LIMIT = 1000
+# Responses shorter than this are sent uncompressed, gzip would not make them smaller
+GZIP_MIN_BYTES = 512
+MAX_HEADERS = 100
+IDLE_TIMEOUT = 15.0
+# Request bodies, which no endpoint reads, are discarded up to this size; the connection is
+# closed after a request with a larger or chunked body
+MAX_DISCARDED_BODY = 64 * 1024
+
+
+class BadRequest(ValueError):
+    """A request parameter is missing or invalid."""
+
+
+class NotFound(Exception):
+    """No analysis is served at the requested path."""
+
+
+def encode_cursor(cursor):
+    """Encodes a `next_cursor` tuple as an opaque URL-safe string."""
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(text):
+    """Decodes a cursor string produced by `encode_cursor`."""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(text + "=" * (-len(text) % 4)))
+    except ValueError as e:
+        raise BadRequest(f"invalid cursor: {e}") from e
+    if not isinstance(cursor, list) or len(cursor) != 3:
+        raise BadRequest("invalid cursor")
+    return tuple(cursor)
+
+
+def accepts_gzip(accept_encoding):
+    """Tells whether an `Accept-Encoding` header accepts gzip, which `gzip;q=0` refuses."""
+    qualities = {}
+    for coding in accept_encoding.lower().split(","):
+        name, _, parameters = coding.partition(";")
+        quality = parameters.strip().removeprefix("q=")
+        try:
+            qualities[name.strip()] = float(quality) if quality else 1.0
+        except ValueError:
+            qualities[name.strip()] = 0.0
+    return qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0))) > 0
+
+
+def _integer(params, name, default=None, minimum=0, maximum=None):
+    value = params.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer") from None
+    if number < minimum:
+        raise BadRequest(f"{name} must be at least {minimum}")
+    if maximum is not None and number > maximum:
+        raise BadRequest(f"{name} must be at most {maximum}")
+    return number
+
+
+class AnalysisAPI:
+    """
+    Answers the HTTP requests of the read-only JSON API over the analysis layer.
+
+    Every `data_analysis` analysis is served at `/api/<name>?limit=&offset=`,
+    `browse_repositories` at `/api/repositories` and `top_repositories_per_language` at
+    `/api/top_repositories_per_language?metric=&k=`. The analyses and the repositories take
+    the `language`, `license`, `year_from`, `year_to` and `topic` filters. The queries
+    share the configured backend, its pooled connections and the query cache. Serialized
+    (and gzipped) responses are cached per request and dataset version. ETags derive from the dataset version alone,
+    so a client revalidating with `If-None-Match` gets a `304` without any query
+    until the next load. Gzipped responses carry their own tag, with a `-gzip` suffix,
+    and every response varies on `Accept-Encoding`.
+
+    Args:
+        max_age (int, optional): The `Cache-Control` max-age of the responses in seconds. Defaults to 60.
+        cache_size (int, optional): The maximum number of cached responses. Defaults to 512.
+    """
+
+    def __init__(self, max_age=60, cache_size=512):
+        self.max_age = max_age
+        self.responses = QueryCache(version=data_analysis.query_cache.version, maxsize=cache_size)
+
+    def etag(self, version, target, coding=None):
+        """Returns the entity tag of a request target under a dataset version, sent with a content coding."""
+        digest = hashlib.sha1(f"{version}:{target}".encode()).hexdigest()[:24]
+        return f'"{digest}-{coding}"' if coding else f'"{digest}"'
+
+    def respond(self, method, target, headers):
+        """
+        Answers one request.
+
+        Args:
+            method (str): The request method.
+            target (str): The request target, path and query string.
+            headers (dict): The request headers, with lower-case names.
+
+        Returns:
+            tuple: The status code, the response headers and the body.
+        """
+        if method not in ("GET", "HEAD"):
+            return self.error(HTTPStatus.METHOD_NOT_ALLOWED, "only GET and HEAD are supported", {"Allow": "GET, HEAD"})
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        # Parameters in a canonical order, so that equivalent URLs share their cache entry and ETag
+        canonical = url.path + "?" + "&".join(f"{name}={value}" for name, value in sorted(params.items()))
+        try:
+            # Unknown paths are refused before revalidation, so that they never get a 304
+            name = self.endpoint(url.path)
+            version = data_analysis.query_cache.version()
+            cache_headers = {"Cache-Control": f"public, max-age={self.max_age}", "Vary": "Accept-Encoding"}
+            # Short responses are sent uncompressed whatever the client accepts, so a client accepting
+            # gzip may hold either representation
+            gzip_accepted = accepts_gzip(headers.get("accept-encoding", ""))
+            etags = [self.etag(version, canonical)] + ([self.etag(version, canonical, "gzip")] if gzip_accepted else [])
+            if_none_match = [tag.strip().removeprefix("W/") for tag in headers.get("if-none-match", "").split(",")]
+            matched = [etag for etag in etags if etag in if_none_match]
+            if matched:
+                return HTTPStatus.NOT_MODIFIED, {"ETag": matched[0], **cache_headers}, b""
+
+            key = self.responses.key(canonical)
+            cached = self.responses.get(key)
+            if cached is None:
+                body, complete = self.render(name, params, version)
+                cached = (body, gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None)
+                # Failed analyses return empty frames, their responses are not kept
+                if complete:
+                    self.responses.put(key, cached)
+        except BadRequest as e:
+            return self.error(HTTPStatus.BAD_REQUEST, str(e))
+        except NotFound as e:
+            return self.error(HTTPStatus.NOT_FOUND, str(e))
+        except Exception as e:
+            logger.error(f"Error answering {target}: {e}")
+            return self.error(HTTPStatus.INTERNAL_SERVER_ERROR, "the analysis failed")
+
+        body, compressed = cached
+        response_headers = {"Content-Type": "application/json", "ETag": etags[0], **cache_headers}
+        if compressed is not None and gzip_accepted:
+            response_headers.update({"Content-Encoding": "gzip", "ETag": etags[1]})
+            body = compressed
+        return HTTPStatus.OK, response_headers, body
+
+    def endpoint(self, path):
+        """Returns the name of the endpoint served at a path, or raises NotFound."""
+        name = path.removeprefix("/api").strip("/")
+        if name not in ("", "repositories", "top_repositories_per_language") and name not in ANALYSES:
+            raise NotFound(f"no analysis at {path}")
+        return name
+
+    def render(self, name, params, version):
+        """Runs the analysis of an endpoint and returns the JSON body, and whether it holds any result to cache."""
+        document = {"version": str(version)}
+        if name == "":
+            document["endpoints"] = ["/api/repositories", "/api/top_repositories_per_language"] + [
+                f"/api/{analysis}" for analysis in ANALYSES]
+            return json.dumps(document).encode(), True
+        if name == "repositories":
+            frame, cursor = self.browse(params)
+            document["next"] = encode_cursor(cursor) if cursor is not None and len(frame) else None
+        elif name == "top_repositories_per_language":
+            metric = params.get("metric", "stars")
+            if metric not in data_analysis.TOP_K_METRICS:
+                raise BadRequest(f"metric must be one of {', '.join(data_analysis.TOP_K_METRICS)}")
+            k = _integer(params, "k", 3, minimum=1, maximum=MAX_LIMIT)
+            frame = data_analysis.top_repositories_per_language(metric=metric, k=k)
+        else:
+            limit = _integer(params, "limit", ANALYSES[name], minimum=1, maximum=MAX_LIMIT)
+            offset = _integer(params, "offset", 0)
+            frame = getattr(data_analysis, name)(limit=limit, offset=offset, **self.filters(params))
+        if frame is None:
+            raise RuntimeError(f"{name} returned no result")
+        document["analysis"] = name
+        # The frame serializes itself, the rows are spliced in without a second JSON round-trip
+        rows = frame.to_json(orient="records", date_format="iso")
+        return (json.dumps(document)[:-1] + ', "rows": ' + rows + "}").encode(), not frame.empty
+
+    def filters(self, params):
+        """Returns the `language`, `license`, `years` and `topic` filters given in the request parameters."""
+        year_from = _integer(params, "year_from")
+        year_to = _integer(params, "year_to")
+        years = None
+        if year_from is not None or year_to is not None:
+            years = (year_from if year_from is not None else 0, year_to if year_to is not None else 9999)
+        filters = {"language": params.get("language"), "license": params.get("license"), "years": years,
+                   "topic": params.get("topic")}
+        # Unfiltered calls hit the query cache entries of `warm_cache`, keyed by their default arguments
+        return {name: value for name, value in filters.items() if value is not None}
+
+    def browse(self, params):
+        """Runs `browse_repositories` with the request parameters, returning the page and its next cursor."""
+        sort = params.get("sort", "stars")
+        if sort not in data_analysis.SORT_KEYS:
+            raise BadRequest(f"sort must be one of {', '.join(data_analysis.SORT_KEYS)}")
+        order = params.get("order", "desc")
+        if order not in ("asc", "desc"):
+            raise BadRequest("order must be asc or desc")
+        limit = _integer(params, "limit", 10, minimum=1, maximum=MAX_LIMIT)
+        frame = data_analysis.browse_repositories(
+            sort=sort, limit=limit, after=decode_cursor(params["after"]) if params.get("after") else None,
+            offset=_integer(params, "offset", 0), descending=order == "desc", **self.filters(params))
+        cursor = data_analysis.next_cursor(frame, sort) if frame is not None and len(frame) == limit else None
+        return frame, cursor
+
+    def error(self, status, message, headers=None):
+        body = json.dumps({"error": message}).encode()
+        return status, {"Content-Type": "application/json", **(headers or {})}, body
+
+
+async def _read_headers(reader):
+    """Reads the headers of a request, up to `MAX_HEADERS` of them."""
+    headers = {}
+    for _ in range(MAX_HEADERS + 1):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    raise ValueError(f"More than {MAX_HEADERS} request headers")
+
+
+async def _read_request(reader):
+    """Reads a request line and its headers, returning None when the client closed the connection."""
+    line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+    if not line:
+        return None
+    parts = line.decode("latin-1").strip().split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise BadRequest("malformed request line")
+    method, target, version = parts
+    # A client sending its headers slowly cannot hold the connection longer than an idle one
+    headers = await asyncio.wait_for(_read_headers(reader), IDLE_TIMEOUT)
+    return method, target, version, headers
+
+
+async def _discard_body(reader, headers):
+    """
+    Reads and drops the body of a request, so that the next request starts after it.
+
+    Returns:
+        bool: False if the body was left unread and the connection must be closed after the response.
+    """
+    if "transfer-encoding" in headers:
+        return False
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise BadRequest("invalid Content-Length") from None
+    if length < 0:
+        raise BadRequest("invalid Content-Length")
+    if length > MAX_DISCARDED_BODY:
+        return False
+    if length:
+        await asyncio.wait_for(reader.readexactly(length), IDLE_TIMEOUT)
+    return True
+
+
+async def _write_response(writer, method, status, headers, body, keep_alive):
+    """Writes a response, without its body for a HEAD request."""
+    head = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    head.extend(f"{name}: {value}" for name, value in headers.items())
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+    if method != "HEAD":
+        writer.write(body)
+    await writer.drain()
+
+
+async def handle_connection(api, executor, reader, writer):
+    """Answers the requests of one (keep-alive) client connection."""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                body_read = await _discard_body(reader, request[3])
+            except BadRequest as e:
+                await _write_response(writer, "GET", *api.error(HTTPStatus.BAD_REQUEST, str(e)), keep_alive=False)
+                break
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError,
+                    ConnectionError):
+                break
+            method, target, http_version, headers = request
+            # The queries block, they run on the worker threads and the event loop keeps serving sockets
+            status, response_headers, body = await loop.run_in_executor(
+                executor, api.respond, method, target, headers)
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" if http_version == "HTTP/1.1" else connection == "keep-alive"
+            keep_alive = keep_alive and body_read
+            await _write_response(writer, method, status, response_headers, body, keep_alive)
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(host="127.0.0.1", port=8000, workers=8, max_age=60):
+    """
+    Starts the JSON API server on the running event loop.
+
+    Args:
+        host (str, optional): The interface to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The port to listen on, 0 for any free port. Defaults to 8000.
+        workers (int, optional): The number of query threads, best kept at the connection pool size. Defaults to 8.
+        max_age (int, optional): The `Cache-Control` max-age of the responses in seconds. Defaults to 60.
+
+    Returns:
+        asyncio.Server: The listening server.
+    """
+    api = AnalysisAPI(max_age=max_age)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(api, executor, reader, writer), host, port)
+    address = server.sockets[0].getsockname()
+    logger.info(f"Serving the analysis API on http://{address[0]}:{address[1]}/api")
+    return server
+
+
+def serve(host="127.0.0.1", port=8000, workers=8, max_age=60):
+    """Runs the JSON API server until interrupted (see `start_server` for the arguments)."""
+    async def main():
+        server = await start_server(host, port, workers, max_age)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Analysis API stopped.")
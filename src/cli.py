@@ -0,0 +1,333 @@
+import argparse
+import os
+from utils import logger, setup_logging
+
+DATA_DIR = "data"
+DEFAULT_DB = os.path.join("database", "github_data.db")
+DEFAULT_TABLE = "github_repositories"
+
+# Topic name (as used in the data/repo_<name>.csv files) -> GitHub search query
+DEFAULT_TOPICS = {
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "genai": "generative ai",
+    "llm": "llm",
+    "llmops": "llmops",
+    "mlops": "mlops",
+    "langchain": "langchain",
+    "langgraph": "langgraph",
+    "huggingface": "huggingface",
+    "matplotlib": "matplotlib",
+    "seaborn": "seaborn",
+    "sql": "sql",
+    "nosql": "nosql",
+    "graphdatabase": "graph database",
+}
+
+
+def selected_topics(names):
+    """Returns the search query per topic for the given topic names, or all default topics."""
+    if not names:
+        return dict(DEFAULT_TOPICS)
+    return {name: DEFAULT_TOPICS.get(name, name) for name in names}
+
+
+def response_cache(args):
+    """Opens the response cache requested on the command line, if any."""
+    if not args.cache and not args.since_last_harvest:
+        return None
+    from http_cache import ResponseCache, DEFAULT_CACHE_PATH
+    return ResponseCache(args.cache or DEFAULT_CACHE_PATH)
+
+
+def harvest_journal(args):
+    """Opens the journal of resumable harvest jobs requested on the command line, if any."""
+    if not args.journal:
+        return None
+    from harvest_jobs import HarvestJournal
+    return HarvestJournal(args.journal)
+
+
+def response_archive(args):
+    """Opens the archive of raw pages requested on the command line, if any."""
+    if not args.archive:
+        return None
+    from response_archive import ResponseArchive
+    return ResponseArchive(args.archive)
+
+
+def merge_harvest(csv_path, data):
+    """
+    Merges the repositories of an incremental harvest into a topic's CSV file.
+
+    The harvest only holds the repositories pushed since the previous one, so they
+    replace their older rows, on (Owner, Repository_Name), and the other rows are kept.
+
+    Args:
+        csv_path (str): The existing topic CSV file.
+        data (pd.DataFrame): The repositories of the incremental harvest.
+
+    Returns:
+        pd.DataFrame: The rows of the file updated with the harvest.
+    """
+    import pandas as pd
+
+    previous = pd.read_csv(csv_path)
+    merged = pd.concat([previous, data], ignore_index=True)
+    merged = merged.drop_duplicates(subset=["Owner", "Repository_Name"], keep="last").reset_index(drop=True)
+    logger.info(f"Merged {len(data)} updated repositories into the {len(previous)} rows of {csv_path}")
+    return merged
+
+
+def fetch_command(args):
+    from fetch_github_data import harvest_topics
+
+    topics = selected_topics(args.topics)
+    results = harvest_topics(list(topics.values()), pages=args.pages, max_workers=args.workers,
+                             cache=response_cache(args), since_last_harvest=args.since_last_harvest,
+                             shard=not args.no_shards, journal=harvest_journal(args), graphql=args.graphql,
+                             archive=response_archive(args))
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, query in topics.items():
+        data = results[query]
+        if data.empty:
+            logger.warning(f"No repositories fetched for topic '{name}', nothing saved.")
+            continue
+        output_path = os.path.join(args.output_dir, f"repo_{name}.csv")
+        if args.since_last_harvest and os.path.exists(output_path):
+            data = merge_harvest(output_path, data)
+        data.to_csv(output_path, index=False)
+        logger.info(f"Fetched data for topic '{name}' saved successfully at: {output_path}")
+
+
+def concat_command(args):
+    from concatenate_csv_files import concatenate_csv_files
+
+    data = concatenate_csv_files(args.pattern)
+    if data.empty:
+        logger.warning("No data to save as the concatenated DataFrame is empty.")
+        return
+    data.to_csv(args.output, index=False)
+    logger.info(f"Concatenated data saved successfully at: {args.output}")
+
+
+def preprocess_command(args):
+    from data_preprocessing import preprocess_github_data
+
+    preprocess_github_data(args.input, args.output, chunksize=args.chunk_size, streaming=args.streaming,
+                           per_topic_modes=args.per_topic_modes)
+
+
+def push_command(args):
+    from push_to_sqlite import push_data_to_sqlite
+
+    push_data_to_sqlite(args.input, args.db, args.table)
+
+
+def migrate_command(args):
+    from push_to_sqlite import upgrade_database
+
+    if not upgrade_database(args.db, args.table):
+        logger.info(f"{args.db} needs no migration")
+
+
+def parquet_command(args):
+    from parquet_store import write_parquet_store, write_snapshot
+
+    write_parquet_store(args.input, args.store, harvest_date=args.harvest_date)
+    if args.snapshot:
+        write_snapshot(args.store)
+
+
+def run_command(args):
+    from pipeline import run_pipeline
+
+    run_pipeline(selected_topics(args.topics), args.db, args.table, batch_size=args.batch_size,
+                 pages=args.pages, max_workers=args.workers, cache=response_cache(args),
+                 since_last_harvest=args.since_last_harvest, per_topic_modes=args.per_topic_modes,
+                 shard=not args.no_shards, journal=harvest_journal(args), graphql=args.graphql,
+                 archive=response_archive(args))
+
+
+def queue_command(args):
+    from harvest_jobs import HarvestQueue
+    from pipeline import enqueue_topics
+
+    queue = HarvestQueue(args.queue)
+    try:
+        enqueue_topics(queue, selected_topics(args.topics))
+    finally:
+        queue.close()
+
+
+def work_command(args):
+    from harvest_jobs import HarvestQueue
+    from pipeline import run_harvest_worker
+
+    queue = HarvestQueue(args.queue, lease_seconds=args.lease)
+    try:
+        run_harvest_worker(queue, args.db, args.table, worker=args.name, threads=args.threads, token=args.token,
+                           pages=args.pages, shard=not args.no_shards, per_topic_modes=args.per_topic_modes)
+    finally:
+        queue.close()
+
+
+def replay_command(args):
+    from datetime import datetime
+    from pipeline import replay_archive
+    from response_archive import ResponseArchive
+
+    archive = ResponseArchive(args.archive)
+    try:
+        if args.list:
+            for harvest_id, api, topics, started_at, finished_at, pages in archive.harvests():
+                started = datetime.fromtimestamp(started_at).strftime("%Y-%m-%d %H:%M")
+                state = "" if finished_at else " (interrupted)"
+                print(f"{harvest_id:>5}  {started}  {api:<8}{pages:>6} pages  {', '.join(topics)}{state}")
+            return
+        replay_archive(archive, args.db, args.table, harvest_ids=args.harvests, topics=selected_topics(None),
+                       workers=args.workers, batch_size=args.batch_size, per_topic_modes=args.per_topic_modes)
+    finally:
+        archive.close()
+
+
+def serve_command(args):
+    import data_analysis
+    from api_server import serve
+
+    data_analysis.DB_PATH = args.db
+    serve(args.host, args.port, workers=args.workers, max_age=args.max_age)
+
+
+def build_parser():
+    """Builds the argument parser of the `GitHub Data Dive` command line."""
+    parser = argparse.ArgumentParser(description="GitHub Data Dive data pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_harvest_arguments(command):
+        command.add_argument("--topics", nargs="*", help="topic names to harvest (default: all known topics)")
+        command.add_argument("--pages", type=int, default=10, help="maximum pages of 100 results per topic or shard")
+        command.add_argument("--workers", type=int, default=8, help="number of concurrent requests")
+        command.add_argument("--cache", help="path of the HTTP response cache (enables conditional requests)")
+        command.add_argument("--since-last-harvest", action="store_true",
+                             help="only fetch repositories pushed since the last harvest")
+        command.add_argument("--no-shards", action="store_true",
+                             help="stop at the first 1000 results of each topic instead of splitting it")
+        command.add_argument("--journal", nargs="?", const=os.path.join("cache", "harvest_jobs.db"),
+                             help="record the harvest's pages in this SQLite file (default: cache/harvest_jobs.db) "
+                                  "so that an interrupted or failed harvest resumes where it stopped")
+        command.add_argument("--archive", nargs="?", const=os.path.join(DATA_DIR, "archive"),
+                             help="archive the raw pages, compressed, in this directory (default: data/archive) "
+                                  "so that the data can be rebuilt offline with `replay`")
+        command.add_argument("--graphql", action="store_true",
+                             help="harvest through the GraphQL API, 100 repositories with their topics and "
+                                  "releases per request")
+
+    fetch = commands.add_parser("fetch", help="fetch each topic into data/repo_<topic>.csv")
+    add_harvest_arguments(fetch)
+    fetch.add_argument("--output-dir", default=DATA_DIR)
+    fetch.set_defaults(handler=fetch_command)
+
+    concat = commands.add_parser("concat", help="concatenate and deduplicate the topic CSV files")
+    concat.add_argument("--pattern", default=os.path.join(DATA_DIR, "repo_*.csv"))
+    concat.add_argument("--output", default=os.path.join(DATA_DIR, "data.csv"))
+    concat.set_defaults(handler=concat_command)
+
+    preprocess = commands.add_parser("preprocess", help="clean the concatenated CSV file")
+    preprocess.add_argument("--input", default=os.path.join(DATA_DIR, "data.csv"))
+    preprocess.add_argument("--output", default=os.path.join(DATA_DIR, "cleaned_data.csv"))
+    preprocess.add_argument("--chunk-size", type=int, default=250000, help="rows read at a time")
+    preprocess.add_argument("--streaming", action="store_true",
+                            help="count the fill values in a first pass instead of holding the file in memory")
+    preprocess.add_argument("--per-topic-modes", action="store_true",
+                            help="fill languages and licenses with the most common value of each topic")
+    preprocess.set_defaults(handler=preprocess_command)
+
+    push = commands.add_parser("push", help="load the cleaned CSV file into SQLite")
+    push.add_argument("--input", default=os.path.join(DATA_DIR, "cleaned_data.csv"))
+    push.add_argument("--db", default=DEFAULT_DB)
+    push.add_argument("--table", default=DEFAULT_TABLE)
+    push.set_defaults(handler=push_command)
+
+    migrate = commands.add_parser("migrate", help="upgrade a database written by an older version in place")
+    migrate.add_argument("--db", default=DEFAULT_DB)
+    migrate.add_argument("--table", default=DEFAULT_TABLE)
+    migrate.set_defaults(handler=migrate_command)
+
+    parquet = commands.add_parser("parquet", help="write the cleaned CSV file to the Parquet store")
+    parquet.add_argument("--input", default=os.path.join(DATA_DIR, "cleaned_data.csv"))
+    parquet.add_argument("--store", default=os.path.join(DATA_DIR, "parquet"))
+    parquet.add_argument("--harvest-date", help="harvest date partition as YYYY-MM-DD (default: today)")
+    parquet.add_argument("--snapshot", action="store_true",
+                         help="also write the memory-mappable Arrow snapshot read by the arrow analysis backend")
+    parquet.set_defaults(handler=parquet_command)
+
+    queue = commands.add_parser("queue", help="queue topics for the harvest workers of a shared work queue")
+    queue.add_argument("--topics", nargs="*", help="topic names to harvest (default: all known topics)")
+    queue.add_argument("--queue", default=os.path.join("cache", "harvest_queue.db"),
+                       help="SQLite file of the work queue shared by the workers")
+    queue.set_defaults(handler=queue_command)
+
+    work = commands.add_parser("work", help="harvest queued pages into SQLite until the work queue is drained")
+    work.add_argument("--queue", default=os.path.join("cache", "harvest_queue.db"),
+                      help="SQLite file of the work queue shared by the workers")
+    work.add_argument("--db", default=DEFAULT_DB)
+    work.add_argument("--table", default=DEFAULT_TABLE)
+    work.add_argument("--name", help="name of the worker (default: host name and process id)")
+    work.add_argument("--threads", type=int, default=4, help="number of concurrent requests of this worker")
+    work.add_argument("--token", help="GitHub API token of this worker, so that workers can split the quota "
+                                       "of several tokens (default: GITHUB_API_TOKEN)")
+    work.add_argument("--pages", type=int, default=10, help="maximum pages of 100 results per topic or shard")
+    work.add_argument("--lease", type=float, default=60.0,
+                      help="seconds a claimed page stays reserved without a heartbeat")
+    work.add_argument("--no-shards", action="store_true",
+                      help="stop at the first 1000 results of each topic instead of splitting it")
+    work.add_argument("--per-topic-modes", action="store_true",
+                      help="fill languages and licenses with the most common value of each topic")
+    work.set_defaults(handler=work_command)
+
+    replay = commands.add_parser("replay", help="rebuild the SQLite table offline from the archived raw pages")
+    replay.add_argument("--archive", default=os.path.join(DATA_DIR, "archive"))
+    replay.add_argument("--db", default=DEFAULT_DB)
+    replay.add_argument("--table", default=DEFAULT_TABLE)
+    replay.add_argument("--harvests", nargs="*", type=int, help="ids of the harvests to replay (default: all)")
+    replay.add_argument("--list", action="store_true", help="list the archived harvests instead")
+    replay.add_argument("--workers", type=int, help="decompression processes (default: one per CPU)")
+    replay.add_argument("--batch-size", type=int, default=5000, help="rows per upsert batch")
+    replay.add_argument("--per-topic-modes", action="store_true",
+                        help="fill languages and licenses with the most common value of each topic")
+    replay.set_defaults(handler=replay_command)
+
+    api = commands.add_parser("serve", help="serve the analyses as a read-only HTTP JSON API")
+    api.add_argument("--db", default=DEFAULT_DB)
+    api.add_argument("--host", default="127.0.0.1")
+    api.add_argument("--port", type=int, default=8000)
+    api.add_argument("--workers", type=int, default=8, help="query threads, best kept at the connection pool size")
+    api.add_argument("--max-age", type=int, default=60, help="Cache-Control max-age of the responses in seconds")
+    api.set_defaults(handler=serve_command)
+
+    run = commands.add_parser("run", help="stream fetch -> clean -> SQLite without intermediate files")
+    add_harvest_arguments(run)
+    run.add_argument("--db", default=DEFAULT_DB)
+    run.add_argument("--table", default=DEFAULT_TABLE)
+    run.add_argument("--batch-size", type=int, default=5000, help="rows per upsert batch")
+    run.add_argument("--per-topic-modes", action="store_true",
+                     help="fill languages and licenses with the most common value of each topic")
+    run.set_defaults(handler=run_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    try:
+        args.handler(args)
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while running '{args.command}': {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
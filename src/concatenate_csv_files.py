@@ -1,16 +1,87 @@
 import pandas as pd
 import glob
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from push_to_sqlite import TOPIC_SEPARATOR, TOPICS_COLUMN
 from utils import logger
 
-def concatenate_csv_files(path_pattern):
+# Files written by the later pipeline stages, which must never be read back as inputs
+DERIVED_OUTPUTS = ("data.csv", "cleaned_data.csv")
+REPOSITORY_KEY = ["Owner", "Repository_Name"]
+
+
+def topic_from_path(path):
+    """
+    Derives the topic name from a topic CSV file name, e.g. 'data/repo_llm.csv' -> 'llm'.
+
+    Parameters
+    ----------
+    path : str
+        The path of the CSV file.
+
+    Returns
+    -------
+    str
+        The topic name.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"^repo_", "", name)
+
+
+def read_topic_csv(path):
+    """Reads one topic CSV file and tags its rows with the topic name."""
+    data = pd.read_csv(path, index_col=None)
+    data["Topic"] = topic_from_path(path)
+    return data
+
+
+def deduplicate_repositories(data):
+    """
+    Collapses repositories that appear in several topic files into a single row.
+
+    Rows are hashed on `(Owner, Repository_Name)`; the row with the most recent
+    `Last_Updated_Date` is kept and every topic the repository was found under is
+    collected into a ';'-separated `Topics` column.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The concatenated topic data with a `Topic` column.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per repository with a `Topics` column instead of `Topic`.
+    """
+    pairs = data[REPOSITORY_KEY + ["Topic"]].drop_duplicates().sort_values("Topic", kind="stable")
+    shared = pairs.duplicated(REPOSITORY_KEY, keep=False)
+    # Only the few repositories listed under several topics need their topics joined
+    joined = pairs[shared].groupby(REPOSITORY_KEY, sort=False)["Topic"].agg(TOPIC_SEPARATOR.join)
+    topics = pd.concat([pairs[~shared].set_index(REPOSITORY_KEY)["Topic"], joined]).rename(TOPICS_COLUMN)
+
+    freshest = (data.sort_values("Last_Updated_Date", ascending=False, kind="stable")
+                .drop_duplicates(REPOSITORY_KEY, keep="first")
+                .drop(columns=["Topic"]))
+    return freshest.join(topics, on=REPOSITORY_KEY).sort_index().reset_index(drop=True)
+
+
+def concatenate_csv_files(path_pattern, max_workers=8, deduplicate=True):
     """
     Concatenates multiple CSV files into a single DataFrame based on a given path pattern.
 
+    The topic files are read in parallel. Derived outputs of the pipeline (`data.csv`,
+    `cleaned_data.csv`) are skipped even if they match the pattern, and repositories
+    found under several topics are merged into one row (see `deduplicate_repositories`).
+
     Parameters
     ----------
     path_pattern : str
         The path pattern to search for CSV files.
+    max_workers : int, optional
+        The number of files read concurrently. Defaults to 8.
+    deduplicate : bool, optional
+        Whether to merge repositories that appear in several files. Defaults to True.
 
     Returns
     -------
@@ -19,39 +90,35 @@ def concatenate_csv_files(path_pattern):
     """
     try:
         logger.info(f"Looking for CSV files with pattern: {path_pattern}")
-        csv_files = glob.glob(path_pattern)
-        
+        csv_files = sorted(file for file in glob.glob(path_pattern)
+                           if os.path.basename(file) not in DERIVED_OUTPUTS)
+
         if not csv_files:
             logger.warning(f"No CSV files found for the pattern: {path_pattern}")
             return pd.DataFrame()  # Return an empty DataFrame if no files found
-        
+
         logger.info(f"Found {len(csv_files)} CSV files. Starting concatenation...")
 
-        # Read and concatenate the CSV files
-        concatenated_df = pd.concat([pd.read_csv(file, index_col=None) for file in csv_files], ignore_index=True)
-        
+        # Read the CSV files in parallel and concatenate them
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(read_topic_csv, csv_files))
+        concatenated_df = pd.concat(frames, ignore_index=True)
+        if 'Unnamed: 0' in concatenated_df.columns:
+            concatenated_df = concatenated_df.drop(columns=['Unnamed: 0'])
         logger.info(f"Concatenation successfull. Shape of the concatenated dataframe: {concatenated_df.shape}")
+
+        if deduplicate:
+            rows_before = len(concatenated_df)
+            concatenated_df = deduplicate_repositories(concatenated_df)
+            logger.info(f"Removed {rows_before - len(concatenated_df)} duplicate repositories. "
+                        f"Shape of the deduplicated dataframe: {concatenated_df.shape}")
         return concatenated_df
-    
+
     except pd.errors.EmptyDataError as empty_data_err:
         logger.error(f"Empty data error occurred: {empty_data_err}")
     except FileNotFoundError as fnf_error:
         logger.error(f"File not found error: {fnf_error}")
     except Exception as e:
         logger.error(f"An unexpected error occurred during concatenation: {e}")
-    
-    return pd.DataFrame()  # Return an empty DataFrame in case of errors
 
-if __name__ == "__main__":
-    try:
-        data = concatenate_csv_files(os.path.join("data", "*.csv"))
-        
-        if not data.empty:
-            output_path = os.path.join("data", "data.csv")
-            data.to_csv(output_path, index=False)
-            logger.info(f"Concatenated data saved successfully at: {output_path}")
-        else:
-            logger.warning("No data to save as the concatenated DataFrame is empty.")
-    
-    except Exception as e:
-        logger.error(f"An unexpected error occurred in the main block: {e}")
+    return pd.DataFrame()  # Return an empty DataFrame in case of errors
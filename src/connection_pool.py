@@ -0,0 +1,134 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from utils import logger
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ReadOnlyConnectionPool:
+    """
+    A thread-safe pool of read-only SQLite connections.
+
+    Connections are opened lazily with `mode=ro` (and `immutable=1` when the database
+    file is known never to change while the pool is alive), tuned for read-heavy
+    dashboard queries, and handed out to one thread at a time.
+
+    Args:
+        db_path (str): The path to the SQLite database file.
+        size (int, optional): The maximum number of open connections. Defaults to 8.
+        immutable (bool, optional): Open the database as immutable, which skips all locking.
+            Only safe for database files that are not written while being served. Defaults to False.
+        mmap_size (int, optional): Bytes of the database to memory-map. Defaults to 256 MB.
+        cache_size_kib (int, optional): Page cache size per connection in KiB. Defaults to 16 MB.
+        timeout (float, optional): Seconds to wait for a free connection. Defaults to 30.
+    """
+
+    def __init__(self, db_path, size=8, immutable=False, mmap_size=256 * 1024 * 1024,
+                 cache_size_kib=16 * 1024, timeout=30.0):
+        self.db_path = db_path
+        self.size = size
+        self.immutable = immutable
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        uri = f"file:{self.db_path}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        # Analysis queries bind their values, so each query text is prepared once per connection
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+        connection.execute("PRAGMA query_only = ON")
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        connection.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        return connection
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    self._opened -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No connection to {self.db_path} became available within {self.timeout}s")
+
+    def _discard(self, connection):
+        with self._lock:
+            self._opened -= 1
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection from the pool for the duration of a `with` block.
+
+        Yields:
+            sqlite3.Connection: A read-only connection.
+        """
+        connection = self._acquire()
+        try:
+            yield connection
+        except sqlite3.DatabaseError:
+            # The connection may be unusable (e.g. the file was replaced), open a fresh one next time
+            self._discard(connection)
+            raise
+        except BaseException:
+            self._idle.put(connection)
+            raise
+        else:
+            self._idle.put(connection)
+
+    def close(self):
+        """Closes every idle connection of the pool."""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+
+def get_pool(db_path, **options):
+    """
+    Returns the shared connection pool of a database, creating it on first use.
+
+    Args:
+        db_path (str): The path to the SQLite database file.
+        **options: Options passed to `ReadOnlyConnectionPool` when the pool is created.
+
+    Returns:
+        ReadOnlyConnectionPool: The pool of the database.
+    """
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ReadOnlyConnectionPool(db_path, **options)
+            logger.info(f"Created a read-only connection pool for {db_path} (size {pool.size})")
+        return pool
+
+
+def close_all_pools():
+    """Closes the idle connections of every shared pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,352 +1,743 @@
 import pandas as pd
 import os
-import sqlite3
+import analysis_backends
+from analysis_engine import compute_all_analyses
+from query_cache import QueryCache
 from utils import logger
 
-# db_path = os.path.join("database", "github_data.db")
-# connection = sqlite3.connect(db_path)
+DB_PATH = os.path.join("database", "github_data.db")
 
-def most_starred_repositories():
+# Set to 1 when serving a database snapshot that is never written while the app runs
+IMMUTABLE_DB = os.getenv("GITHUB_DATA_DIVE_IMMUTABLE_DB") == "1"
+
+# Set to 1 to compute all analyses in one pass over the table (see warm_cache) instead of
+# running one indexed query per analysis on first use
+SINGLE_PASS_ANALYSES = os.getenv("GITHUB_DATA_DIVE_SINGLE_PASS") == "1"
+
+# The analyses run on the SQLite database by default; set to 'duckdb' to query the cleaned data
+# in place (the Parquet store or cleaned CSV named by GITHUB_DATA_DIVE_SOURCE) instead, or to
+# 'arrow' to query the memory-mapped snapshot of the Parquet store named by GITHUB_DATA_DIVE_SOURCE
+BACKEND = os.getenv("GITHUB_DATA_DIVE_BACKEND", analysis_backends.DEFAULT_BACKEND)
+SOURCE = os.getenv("GITHUB_DATA_DIVE_SOURCE", os.path.join("data", "parquet"))
+
+# The per-language, per-license and per-year analyses read the summary tables that the
+# loader maintains (see push_to_sqlite.create_rollups) instead of aggregating the base table.
+
+# Results are cached per dataset version, so a reload of the database invalidates them
+query_cache = QueryCache(version=lambda: get_backend().version())
+
+
+def get_backend():
     """
-    Retrieves the top 10 most starred repositories from the GitHub database.
+    Returns the configured analysis backend (see `analysis_backends`).
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most starred repositories.
+        SQLiteBackend | DuckDBBackend | ArrowBackend: The backend selected by `BACKEND`.
+    """
+    if BACKEND in ("duckdb", "arrow"):
+        return analysis_backends.get_backend(BACKEND, source=SOURCE)
+    return analysis_backends.get_backend(BACKEND, db_path=DB_PATH, immutable=IMMUTABLE_DB)
+
+
+def read_query(query, analysis=None, params=(), limit=None, offset=0):
+    """
+    Runs an analysis query on the configured backend and returns the result as a DataFrame.
+
+    On SQLite the query runs on a pooled read-only connection that is returned to the pool
+    afterwards; other backends run their own query for the named analysis. Values are
+    always bound as parameters, so each query text is prepared once per connection.
+
+    Args:
+        query (str): The SQLite query to run.
+        analysis (str, optional): The name of the analysis function running the query. Defaults to None.
+        params (tuple, optional): The parameters of the query. Defaults to none.
+        limit (int, optional): The maximum number of rows. Defaults to all rows.
+        offset (int, optional): The number of rows to skip. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    return get_backend().run(analysis, query, params, limit=limit, offset=offset)
+
+
+def filter_conditions(backend, language=None, license=None, years=None, topic=None):
+    """
+    Builds the filter conditions of an analysis on the table of a backend, aliased as `r`.
+
+    Args:
+        backend: The analysis backend, which provides the creation year and topic conditions.
+        language, license, years, topic: See `browse_repositories`.
+
+    Returns:
+        tuple: The list of conditions and their parameters.
+    """
+    conditions, params = [], []
+    if language is not None:
+        conditions.append("r.Programming_Language = ?")
+        params.append(language)
+    if license is not None:
+        conditions.append("r.License_Type = ?")
+        params.append(license)
+    if years is not None:
+        conditions.append(f"{backend.year_column} BETWEEN ? AND ?")
+        params.extend(years)
+    if topic is not None:
+        conditions.append(backend.topic_filter)
+        params.append(topic)
+    return conditions, params
+
+
+def read_analysis(query, analysis, limit=None, offset=0, language=None, license=None, years=None, topic=None):
+    """
+    Runs one of the 13 analyses, filtered or not, and returns the result as a DataFrame.
+
+    The rollup tables hold every repository, so a filtered analysis aggregates the base
+    table instead (see `analysis_backends.BASE_TABLE_QUERIES`). On SQLite the language and
+    creation year filters read the table through the indexes leading with those columns,
+    unless the index of the sort order is cheaper.
+
+    Args:
+        query (str): The SQLite query of the analysis, run when there is no filter.
+        analysis (str): The name of the analysis function.
+        limit, offset: See `read_query`.
+        language, license, years, topic: See `browse_repositories`.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    backend = get_backend()
+    conditions, params = filter_conditions(backend, language, license, years, topic)
+    if conditions:
+        query = analysis_backends.base_table_query(backend, analysis, conditions)
+        return read_query(query, params=tuple(params), limit=limit, offset=offset)
+    return read_query(query, analysis, limit=limit, offset=offset)
+
+
+_warmed_version = None
+
+
+def warm_cache():
+    """
+    Fills the query cache for all 13 analyses with a single pass over the repositories table.
+
+    The table is read once and every analysis is computed from it by `compute_all_analyses`,
+    so the analysis functions become cache lookups. Calling this again is a no-op until the
+    dataset version changes.
+
+    Returns:
+        bool: True if the cache was filled, False if it was already warm or the pass failed.
+    """
+    global _warmed_version
+    backend = get_backend()
+    version = backend.version()
+    if version is not None and version == _warmed_version:
+        return False
+    try:
+        frame = backend.load_repositories()
+        for name, result in compute_all_analyses(frame).items():
+            # Under the keys of the default arguments, which the API also passes explicitly
+            query_cache.put(globals()[name].cache_key(), result)
+        _warmed_version = version
+        logger.info(f"Query cache warmed for dataset version {version}.")
+        return True
+    except Exception as e:
+        logger.error(f"Error warming the query cache: {e}")
+        return False
+
+
+def cache_info():
+    """
+    Returns the hit and miss counters of the query result cache.
+
+    Returns:
+        dict: The cache statistics.
+    """
+    return query_cache.info()
+
+
+@query_cache.cached
+def most_starred_repositories(limit=10, offset=0, language=None, license=None, years=None, topic=None):
+    """
+    Retrieves the top `limit` most starred repositories from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of repositories to return. Defaults to 10.
+        offset (int, optional): The number of repositories to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the top `limit` most starred repositories.
     """
-    
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
         SELECT Repository_Name, Owner, Number_of_Stars
         FROM github_repositories
-        ORDER BY Number_of_Stars DESC
-        LIMIT 10;
+        ORDER BY Number_of_Stars DESC, Repository_Name DESC, Owner DESC
     """
     try:
         logger.info("Querying most starred repositories...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "most_starred_repositories", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} most starred repositories.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching most starred repositories: {e}")
         return pd.DataFrame()
 
-def most_forked_repositories():
+@query_cache.cached
+def most_forked_repositories(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 most forked repositories from the GitHub database.
+    Retrieves the top `limit` most forked repositories from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of repositories to return. Defaults to 10.
+        offset (int, optional): The number of repositories to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most forked repositories.
+        pd.DataFrame: A DataFrame containing the top `limit` most forked repositories.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
         SELECT Repository_Name, Owner, Number_of_Forks
         FROM github_repositories
-        ORDER BY Number_of_Forks DESC
-        LIMIT 10;
+        ORDER BY Number_of_Forks DESC, Repository_Name DESC, Owner DESC
     """
     try:
         logger.info("Querying most forked repositories...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "most_forked_repositories", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} most forked repositories.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching most forked repositories: {e}")
         return pd.DataFrame()
 
-def most_updated_repositories():
+@query_cache.cached
+def most_updated_repositories(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 most recently updated repositories from the GitHub database.
+    Retrieves the top `limit` most recently updated repositories from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of repositories to return. Defaults to 10.
+        offset (int, optional): The number of repositories to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most recently updated repositories.
+        pd.DataFrame: A DataFrame containing the top `limit` most recently updated repositories.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
         SELECT Repository_Name, Owner, Last_Updated_Date
         FROM github_repositories
-        ORDER BY Last_Updated_Date DESC
-        LIMIT 10;
+        ORDER BY Last_Updated_Date DESC, Repository_Name DESC, Owner DESC
     """
     try:
         logger.info("Querying most recently updated repositories...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "most_updated_repositories", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} most updated repositories.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching most updated repositories: {e}")
 
-def most_popular_languages():
+@query_cache.cached
+def most_popular_languages(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 most popular programming languages from the GitHub database.
+    Retrieves the top `limit` most popular programming languages from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of languages to return. Defaults to 10.
+        offset (int, optional): The number of languages to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most popular programming languages.
+        pd.DataFrame: A DataFrame containing the top `limit` most popular programming languages.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT Programming_Language, Count(*) AS Count
-        FROM github_repositories
-        GROUP BY Programming_Language
-        ORDER BY Count DESC
-        LIMIT 10;
+        SELECT NULLIF(Programming_Language, '') AS Programming_Language, Repository_Count AS Count
+        FROM summary_languages
+        ORDER BY Count DESC, Programming_Language
     """
     try:
         logger.info("Querying most popular programming languages...")
-        top_languages = pd.read_sql(query, connection)
+        top_languages = read_analysis(query, "most_popular_languages", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_languages.shape[0]} popular programming languages.")
         top_languages = top_languages.reset_index(drop=True)
-        top_languages.index = top_languages.index + 1
+        top_languages.index = top_languages.index + 1 + offset
         return top_languages
     except Exception as e:
         logger.error(f"Error fetching popular languages: {e}")
 
-def most_popular_licenses():
+@query_cache.cached
+def most_popular_licenses(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 most popular licenses from the GitHub database.
+    Retrieves the top `limit` most popular licenses from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of licenses to return. Defaults to 10.
+        offset (int, optional): The number of licenses to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most popular licenses.
+        pd.DataFrame: A DataFrame containing the top `limit` most popular licenses.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT License_Type, Count(*) AS Count
-        FROM github_repositories
-        GROUP BY License_Type
-        ORDER BY Count DESC
-        LIMIT 10;
+        SELECT NULLIF(License_Type, '') AS License_Type, Repository_Count AS Count
+        FROM summary_licenses
+        ORDER BY Count DESC, License_Type
     """
     try:
         logger.info("Querying most popular licenses...")
-        top_licenses = pd.read_sql(query, connection)
+        top_licenses = read_analysis(query, "most_popular_licenses", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_licenses.shape[0]} popular licenses.")
         top_licenses = top_licenses.reset_index(drop=True)
-        top_licenses.index = top_licenses.index + 1
+        top_licenses.index = top_licenses.index + 1 + offset
         return top_licenses
     except Exception as e:
         logger.error(f"Error fetching popular licenses: {e}")
 
-def most_popular_contributors():
+@query_cache.cached
+def most_popular_contributors(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 most popular contributors from the GitHub database.
+    Retrieves the top `limit` most popular contributors from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of contributors to return. Defaults to 10.
+        offset (int, optional): The number of contributors to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most popular contributors.
+        pd.DataFrame: A DataFrame containing the top `limit` most popular contributors.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
         SELECT Owner, Count(*) AS Count
         FROM github_repositories
         GROUP BY Owner
-        ORDER BY Count DESC
-        LIMIT 10;
+        ORDER BY Count DESC, Owner
     """
     try:
         logger.info("Querying most popular contributors...")
-        top_contributors = pd.read_sql(query, connection)
+        top_contributors = read_analysis(query, "most_popular_contributors", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_contributors.shape[0]} popular contributors.")
         top_contributors = top_contributors.reset_index(drop=True)
-        top_contributors.index = top_contributors.index + 1
+        top_contributors.index = top_contributors.index + 1 + offset
         return top_contributors
     except Exception as e:
         logger.error(f"Error fetching popular contributors: {e}")
 
-def average_stars_by_language():
+@query_cache.cached
+def average_stars_by_language(limit=None, offset=0, language=None, license=None, years=None, topic=None):
     """
     Retrieves the average number of stars for each programming language from the GitHub database.
 
+    Args:
+        limit (int, optional): The maximum number of languages to return. Defaults to all.
+        offset (int, optional): The number of languages to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
+
     Returns:
         pd.DataFrame: A DataFrame containing the average number of stars for each programming language.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT Programming_Language, AVG(Number_of_Stars) AS Average_Stars
-        FROM github_repositories
-        GROUP BY Programming_Language
-        ORDER BY Average_Stars DESC;
+        SELECT NULLIF(Programming_Language, '') AS Programming_Language,
+               CAST(Total_Stars AS REAL) / NULLIF(Stars_Count, 0) AS Average_Stars
+        FROM summary_languages
+        ORDER BY Average_Stars DESC, Programming_Language
     """
     try:
         logger.info("Querying average stars by programming language...")
-        top_languages = pd.read_sql(query, connection)
+        top_languages = read_analysis(query, "average_stars_by_language", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_languages.shape[0]} languages with average stars.")
         top_languages = top_languages.reset_index(drop=True)
-        top_languages.index = top_languages.index + 1
+        top_languages.index = top_languages.index + 1 + offset
         return top_languages
     except Exception as e:
         logger.error(f"Error fetching average stars by language: {e}")
 
-def average_forks_by_language():
+@query_cache.cached
+def average_forks_by_language(limit=None, offset=0, language=None, license=None, years=None, topic=None):
     """
     Retrieves the average number of forks for each programming language from the GitHub database.
 
+    Args:
+        limit (int, optional): The maximum number of languages to return. Defaults to all.
+        offset (int, optional): The number of languages to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
+
     Returns:
         pd.DataFrame: A DataFrame containing the average number of forks for each programming language.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT Programming_Language, AVG(Number_of_Forks) AS Average_Forks
-        FROM github_repositories
-        GROUP BY Programming_Language
-        ORDER BY Average_Forks DESC;
+        SELECT NULLIF(Programming_Language, '') AS Programming_Language,
+               CAST(Total_Forks AS REAL) / NULLIF(Forks_Count, 0) AS Average_Forks
+        FROM summary_languages
+        ORDER BY Average_Forks DESC, Programming_Language
     """
     try:
         logger.info("Querying average forks by programming language...")
-        top_languages = pd.read_sql(query, connection)
+        top_languages = read_analysis(query, "average_forks_by_language", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_languages.shape[0]} languages with average forks.")
         top_languages = top_languages.reset_index(drop=True)
-        top_languages.index = top_languages.index + 1
+        top_languages.index = top_languages.index + 1 + offset
         return top_languages
     except Exception as e:
         logger.error(f"Error fetching average forks by language: {e}")
 
-def repos_with_OpenIssues():
+@query_cache.cached
+def repos_with_OpenIssues(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 repositories with open issues from the GitHub database.
+    Retrieves the top `limit` repositories with open issues from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of repositories to return. Defaults to 10.
+        offset (int, optional): The number of repositories to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 repositories with open issues.
+        pd.DataFrame: A DataFrame containing the top `limit` repositories with open issues.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
         SELECT Repository_Name, Number_of_Open_Issues
         FROM github_repositories
         WHERE Number_of_Open_Issues > 0
-        ORDER BY Number_of_Open_Issues DESC
-        LIMIT 10;
+        ORDER BY Number_of_Open_Issues DESC, Repository_Name DESC
     """
     try:
         logger.info("Querying repositories with open issues...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "repos_with_OpenIssues", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} repositories with open issues.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching repositories with open issues: {e}")
 
-def repo_created_each_year():
+@query_cache.cached
+def repo_created_each_year(limit=None, offset=0, language=None, license=None, years=None, topic=None):
     """
     Retrieves the number of repositories created each year from the GitHub database.
 
+    Args:
+        limit (int, optional): The maximum number of years to return. Defaults to all.
+        offset (int, optional): The number of years to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
+
     Returns:
         pd.DataFrame: A DataFrame containing the number of repositories created each year.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT strftime('%Y', Creation_Date) AS year, COUNT(*) AS count
-        FROM github_repositories
-        GROUP BY year
-        ORDER BY year DESC;
+        SELECT NULLIF(Year, '') AS year, Repository_Count AS count
+        FROM summary_years
+        ORDER BY Year DESC
     """
     try:
         logger.info("Querying number of repositories created each year...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "repo_created_each_year", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} years of repository creation data.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching repository creation data by year: {e}")
 
-def most_recently_updated_repo():
+@query_cache.cached
+def most_recently_updated_repo(limit=10, offset=0, language=None, license=None, years=None, topic=None):
     """
-    Retrieves the top 10 most recently updated repositories from the GitHub database.
+    Retrieves the top `limit` most recently updated repositories from the GitHub database.
+
+    Args:
+        limit (int, optional): The number of repositories to return. Defaults to 10.
+        offset (int, optional): The number of repositories to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the top 10 most recently updated repositories.
+        pd.DataFrame: A DataFrame containing the top `limit` most recently updated repositories.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
         SELECT Repository_Name, Last_Updated_Date
         FROM github_repositories
-        ORDER BY Last_Updated_Date DESC
-        LIMIT 10;
+        ORDER BY Last_Updated_Date DESC, Repository_Name DESC, Owner DESC
     """
     try:
         logger.info("Querying most recently updated repositories...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "most_recently_updated_repo", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} most recently updated repositories.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching most recently updated repositories: {e}")
 
-def distribution_of_licenses():
+@query_cache.cached
+def distribution_of_licenses(limit=None, offset=0, language=None, license=None, years=None, topic=None):
     """
     Retrieves the distribution of licenses from the GitHub database.
 
+    Args:
+        limit (int, optional): The maximum number of licenses to return. Defaults to all.
+        offset (int, optional): The number of licenses to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
+
     Returns:
         pd.DataFrame: A DataFrame containing the license distribution records.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT License_Type, Count(*) AS Count
-        FROM github_repositories
-        GROUP BY License_Type
-        ORDER BY Count DESC;
+        SELECT NULLIF(License_Type, '') AS License_Type, Repository_Count AS Count
+        FROM summary_licenses
+        ORDER BY Count DESC, License_Type
     """
     try:
         logger.info("Querying distribution of licenses...")
-        top_licenses = pd.read_sql(query, connection)
+        top_licenses = read_analysis(query, "distribution_of_licenses", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_licenses.shape[0]} license distribution records.")
         top_licenses = top_licenses.reset_index(drop=True)
-        top_licenses.index = top_licenses.index + 1
+        top_licenses.index = top_licenses.index + 1 + offset
         return top_licenses
     except Exception as e:
         logger.error(f"Error fetching distribution of licenses: {e}")
 
-def popular_repo_for_each_language():
+@query_cache.cached
+def popular_repo_for_each_language(limit=None, offset=0, language=None, license=None, years=None, topic=None):
     """
     Retrieves the most popular repository for each programming language from the GitHub database.
 
+    Args:
+        limit (int, optional): The maximum number of languages to return. Defaults to all.
+        offset (int, optional): The number of languages to skip. Defaults to 0.
+        language, license, years, topic (optional): Only count the repositories matching these
+            filters (see `browse_repositories`). Defaults to all repositories.
+
     Returns:
         pd.DataFrame: A DataFrame containing the most popular repository for each programming language.
     """
-    db_path = os.path.join("database", "github_data.db")
-    connection = sqlite3.connect(db_path)
-    
     query = """
-        SELECT Programming_Language, Repository_Name, MAX(Number_of_Stars) AS max_stars
-        FROM github_repositories
-        GROUP BY Programming_Language
-        ORDER BY max_stars DESC;
+        SELECT NULLIF(Programming_Language, '') AS Programming_Language, Repository_Name,
+               Number_of_Stars AS max_stars
+        FROM summary_top_repository_by_language
+        ORDER BY max_stars DESC, Programming_Language
     """
     try:
         logger.info("Querying most popular repository for each language...")
-        top_repositories = pd.read_sql(query, connection)
+        top_repositories = read_analysis(query, "popular_repo_for_each_language", limit, offset, language, license, years, topic)
         logger.info(f"Retrieved {top_repositories.shape[0]} popular repositories for each language.")
         top_repositories = top_repositories.reset_index(drop=True)
-        top_repositories.index = top_repositories.index + 1
+        top_repositories.index = top_repositories.index + 1 + offset
         return top_repositories
     except Exception as e:
         logger.error(f"Error fetching popular repository for each language: {e}")
+
+
+# Metrics of top_repositories_per_language -> (column, tie-breaking columns). The ties match
+# the loader's (language, metric, ...) indexes, so each language is one index range read.
+TOP_K_METRICS = {
+    "stars": ("Number_of_Stars", ("Number_of_Forks", "Repository_Name", "Owner")),
+    "forks": ("Number_of_Forks", ("Number_of_Stars", "Repository_Name", "Owner")),
+    "open_issues": ("Number_of_Open_Issues", ("Repository_Name", "Owner")),
+}
+
+
+def top_repositories_query(backend, metric="stars", plan=None):
+    """
+    Builds the query of the top-k repositories of every programming language for a backend.
+
+    The 'seek' plan lists the languages from the `summary_languages` rollup and, for each,
+    reads its first k entries of the (language, metric) index, so its cost grows with the
+    number of languages times k, not with the table. The 'window' plan ranks every row with
+    `ROW_NUMBER()` per language; it is used where there is no such index (DuckDB scans its
+    columns anyway).
+
+    Args:
+        backend: The analysis backend, which provides the table name.
+        metric (str, optional): The ranking metric, one of `TOP_K_METRICS`. Defaults to 'stars'.
+        plan (str, optional): 'seek' or 'window'. Defaults to 'seek' on SQLite and 'window' elsewhere.
+
+    Returns:
+        str: The query, whose single parameter is k.
+
+    Raises:
+        ValueError: If the metric or the plan is unknown.
+    """
+    if metric not in TOP_K_METRICS:
+        raise ValueError(f"Unknown metric {metric!r}, expected one of {', '.join(TOP_K_METRICS)}")
+    plan = plan or ("seek" if backend.name == "sqlite" else "window")
+    column, ties = TOP_K_METRICS[metric]
+    order = ", ".join(f"{{alias}}{name} DESC" for name in (column, *ties))
+    if plan == "seek":
+        ranked = f"""
+            SELECT NULLIF(l.Programming_Language, '') AS Programming_Language, r.Repository_Name, r.Owner,
+                   r.{column}, ROW_NUMBER() OVER (
+                       PARTITION BY l.Programming_Language ORDER BY {order.format(alias="r.")}) AS Rank
+            FROM summary_languages AS l
+            JOIN {backend.table} AS r ON r.rowid IN (
+                SELECT t.rowid FROM {backend.table} AS t
+                WHERE t.Programming_Language IS NULLIF(l.Programming_Language, '') AND t.{column} IS NOT NULL
+                ORDER BY {order.format(alias="t.")}
+                LIMIT ?
+            )
+        """
+        rank_filter = ""
+    elif plan == "window":
+        ranked = f"""
+            SELECT Programming_Language, Repository_Name, Owner, {column},
+                   ROW_NUMBER() OVER (PARTITION BY Programming_Language ORDER BY {order.format(alias="")}) AS Rank
+            FROM {backend.table}
+            WHERE {column} IS NOT NULL
+        """
+        rank_filter = "WHERE Rank <= ?"
+    else:
+        raise ValueError(f"Unknown plan {plan!r}, expected 'seek' or 'window'")
+    return f"""
+        SELECT Programming_Language, Rank, Repository_Name, Owner, {column}
+        FROM ({ranked}) AS ranked
+        {rank_filter}
+        ORDER BY Programming_Language NULLS FIRST, Rank
+    """
+
+
+@query_cache.cached
+def top_repositories_per_language(metric="stars", k=3):
+    """
+    Retrieves the k highest-ranked repositories of every programming language.
+
+    Ties are broken by the other count (stars or forks), then by name and owner in
+    descending order, so the result is deterministic for any k.
+
+    Args:
+        metric (str, optional): The ranking metric, one of `TOP_K_METRICS`. Defaults to 'stars'.
+        k (int, optional): The number of repositories per language. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: The repositories, by language and then rank within the language.
+    """
+    try:
+        query = top_repositories_query(get_backend(), metric)
+        logger.info(f"Querying the top {k} repositories by {metric} for each language...")
+        top_repositories = read_query(query, params=(k,))
+        logger.info(f"Retrieved {top_repositories.shape[0]} repositories.")
+        top_repositories.index = top_repositories.index + 1
+        return top_repositories
+    except Exception as e:
+        logger.error(f"Error fetching the top repositories for each language: {e}")
+        return pd.DataFrame()
+
+
+# Sort keys of browse_repositories -> column. Ties are broken by name and owner, as in the
+# top-N analyses, so that (key, name, owner) is unique and can serve as the page cursor.
+SORT_KEYS = {
+    "stars": "Number_of_Stars",
+    "forks": "Number_of_Forks",
+    "open_issues": "Number_of_Open_Issues",
+    "updated": "Last_Updated_Date",
+    "created": "Creation_Date",
+}
+
+BROWSE_COLUMNS = [
+    "Repository_Name", "Owner", "Programming_Language", "License_Type", "Number_of_Stars",
+    "Number_of_Forks", "Number_of_Open_Issues", "Creation_Date", "Last_Updated_Date",
+]
+
+
+def repository_page_query(backend, sort="stars", descending=True, after=None, language=None, license=None,
+                          years=None, topic=None):
+    """
+    Builds the keyset query of a page of repositories for a backend.
+
+    Args:
+        backend: The analysis backend, which provides the table name and the creation year and
+            topic conditions on that table aliased as `r`.
+        sort, descending, after, language, license, years, topic: See `browse_repositories`.
+
+    Returns:
+        tuple: The query (without LIMIT) and its parameters.
+
+    Raises:
+        ValueError: If the sort key is unknown.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key {sort!r}, expected one of {', '.join(SORT_KEYS)}")
+    key = SORT_KEYS[sort]
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+    conditions, params = [f"r.{key} IS NOT NULL"], []
+    if after is not None:
+        # Row values compare in index order, so a deep page is a range scan from the cursor
+        conditions.append(f"(r.{key}, r.Repository_Name, r.Owner) {comparison} (?, ?, ?)")
+        params.extend(after)
+    filters, filter_params = filter_conditions(backend, language, license, years, topic)
+    conditions.extend(filters)
+    params.extend(filter_params)
+    columns = ", ".join(f"r.{column}" for column in BROWSE_COLUMNS)
+    query = f"""
+        SELECT {columns}
+        FROM {backend.table} AS r
+        WHERE {" AND ".join(conditions)}
+        ORDER BY r.{key} {direction}, r.Repository_Name {direction}, r.Owner {direction}
+    """
+    return query, tuple(params)
+
+
+@query_cache.cached
+def browse_repositories(sort="stars", limit=10, after=None, offset=0, language=None, license=None, years=None,
+                        topic=None, descending=True):
+    """
+    Retrieves one page of repositories, filtered and sorted, with keyset pagination.
+
+    Pass the cursor of the previous page (see `next_cursor`) as `after` to get the next one:
+    the query then starts from the cursor in the sort index, so every page costs the same
+    whatever its depth. `offset` skips rows one by one and is meant for short jumps only.
+    Repositories without a value for the sort key are not listed.
+
+    Args:
+        sort (str, optional): The sort key, one of `SORT_KEYS`. Defaults to 'stars'.
+        limit (int, optional): The number of repositories per page. Defaults to 10.
+        after (tuple, optional): The cursor of the previous page. Defaults to the first page.
+        offset (int, optional): The number of repositories to skip after the cursor. Defaults to 0.
+        language (str, optional): Only list repositories in this programming language. Defaults to all.
+        license (str, optional): Only list repositories under this license. Defaults to all.
+        years (tuple, optional): Only list repositories created in this (first, last) year range. Defaults to all.
+        topic (str, optional): Only list repositories found under this topic. Defaults to all.
+        descending (bool, optional): Sort from the largest value. Defaults to True.
+
+    Returns:
+        pd.DataFrame: The page of repositories.
+    """
+    try:
+        backend = get_backend()
+        query, params = repository_page_query(backend, sort, descending, after, language, license, years, topic)
+        logger.info(f"Querying a page of repositories by {sort}...")
+        page = read_query(query, params=params, limit=limit, offset=offset)
+        logger.info(f"Retrieved {page.shape[0]} repositories.")
+        return page
+    except Exception as e:
+        logger.error(f"Error browsing repositories: {e}")
+        return pd.DataFrame()
+
+
+def next_cursor(page, sort="stars"):
+    """
+    Returns the cursor to pass as `after` to `browse_repositories` for the page following `page`.
+
+    Args:
+        page (pd.DataFrame): A page returned by `browse_repositories`.
+        sort (str, optional): The sort key the page was retrieved with. Defaults to 'stars'.
+
+    Returns:
+        tuple: The (sort value, name, owner) of the last repository, or None after the last page.
+    """
+    if page is None or page.empty:
+        return None
+    last = page.iloc[-1]
+    value = last[SORT_KEYS[sort]]
+    return (value.item() if hasattr(value, "item") else value), last["Repository_Name"], last["Owner"]
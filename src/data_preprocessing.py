@@ -1,61 +1,251 @@
 import pandas as pd
-import os
+from collections import Counter
+from pandas.api.types import union_categoricals
+from push_to_sqlite import TOPIC_SEPARATOR, TOPICS_COLUMN, TOPICS_TABLE
 from utils import logger
 
-def preprocess_github_data(input_csv, output_csv):
+DEFAULT_DESCRIPTION = "No description provided"
+MODE_FILLED_COLUMNS = ("Programming_Language", "License_Type")
+
+
+# Explicit dtypes of the raw CSV columns, so that no column is type-inferred or held as generic objects;
+# the counts are nullable, a repository whose count is missing keeps it missing
+CSV_DTYPES = {
+    "Repository_Name": "str",
+    "Owner": "category",
+    "Description": "str",
+    "URL": "str",
+    "Programming_Language": "category",
+    "Number_of_Stars": "Int32",
+    "Number_of_Forks": "Int32",
+    "Number_of_Open_Issues": "Int32",
+    "License_Type": "category",
+}
+DATE_COLUMNS = {"Creation_Date": "Creation_Epoch", "Last_Updated_Date": "Last_Updated_Epoch"}
+YEAR_COLUMN = "Creation_Year"
+TIMESTAMP_LENGTH = len("YYYY-MM-DD HH:MM:SS")
+
+
+def normalize_timestamps(values):
+    """
+    Vectorized `normalize_timestamp`: rewrites ISO 8601 timestamps as 'YYYY-MM-DD HH:MM:SS' strings.
+
+    Args:
+        values (pd.Series): Timestamps such as '2015-11-07T01:19:20Z'
+
+    Returns:
+        pd.Series: The normalized timestamps
+    """
+    return values.str.replace("T", " ", regex=False).str.slice(0, TIMESTAMP_LENGTH)
+
+
+def typed_chunk(chunk):
+    """
+    Applies the per-row preprocessing to one chunk read with `CSV_DTYPES`.
+
+    Each date is parsed once with the fixed ISO 8601 format to derive its epoch seconds
+    (and the creation year), while the text form is normalized with string operations
+    instead of being formatted back from the parsed value.
+
+    Args:
+        chunk (pd.DataFrame): A chunk of the raw CSV
+
+    Returns:
+        pd.DataFrame: The preprocessed chunk, with the epoch and year columns added
+    """
+    chunk = chunk.drop(columns=["Unnamed: 0"], errors="ignore")
+    for column, epoch_column in DATE_COLUMNS.items():
+        parsed = pd.to_datetime(chunk[column], format="ISO8601", utc=True)
+        chunk[column] = normalize_timestamps(chunk[column])
+        chunk[epoch_column] = ((parsed - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).astype("Int64")
+        if column == "Creation_Date":
+            chunk[YEAR_COLUMN] = parsed.dt.year.astype("Int16")
+    chunk["Description"] = chunk["Description"].fillna(DEFAULT_DESCRIPTION)
+    return chunk
+
+
+def read_typed_chunks(input_csv, chunksize=250000):
+    """
+    Reads a raw repositories CSV in chunks with explicit dtypes and preprocesses each chunk.
+
+    Args:
+        input_csv (str): The path to the input CSV file
+        chunksize (int): The number of rows per chunk
+
+    Yields:
+        pd.DataFrame: The preprocessed chunks (see `typed_chunk`)
+    """
+    for chunk in pd.read_csv(input_csv, dtype=CSV_DTYPES, chunksize=chunksize):
+        yield typed_chunk(chunk)
+
+
+def read_typed_csv(input_csv, chunksize=250000):
+    """
+    Reads a raw repositories CSV with `read_typed_chunks` into a single DataFrame.
+
+    Categorical chunks are combined with `union_categoricals`, so the combined frame
+    keeps compact codes instead of falling back to Python strings.
+
+    Args:
+        input_csv (str): The path to the input CSV file
+        chunksize (int): The number of rows per chunk
+
+    Returns:
+        pd.DataFrame: The preprocessed data
+    """
+    chunks = list(read_typed_chunks(input_csv, chunksize))
+    if len(chunks) == 1:
+        return chunks[0]
+    categorical = [column for column, dtype in chunks[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    data = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for column in categorical:
+        data[column] = union_categoricals([chunk[column] for chunk in chunks], sort_categories=True)
+    return data[chunks[0].columns]
+
+
+def primary_topic(topics):
+    """
+    Returns the first topic of each ';'-separated `Topics` value, the topic whose modes fill a repository.
+
+    Args:
+        topics (pd.Series): `Topics` values, with the topics of each repository in sorted order
+
+    Returns:
+        pd.Series: The first topic of each value
+    """
+    return topics.astype("str").str.split(TOPIC_SEPARATOR, n=1).str[0]
+
+
+def count_mode_values(chunks, columns=MODE_FILLED_COLUMNS, per_topic=False):
+    """
+    Counts the values of the mode-filled columns over a stream of chunks.
+
+    Only the per-value counters are kept, so memory is bounded by the chunk size and
+    the number of distinct values, not by the number of rows.
+
+    Args:
+        chunks (iterable): DataFrames holding the columns (and `Topics` when `per_topic` is set)
+        columns (tuple): The columns to count
+        per_topic (bool): Also count the values per primary topic
+
+    Returns:
+        dict: For each column, a `Counter` of values per topic, under None for the whole dataset
+    """
+    counts = {column: {None: Counter()} for column in columns}
+    for chunk in chunks:
+        topics = primary_topic(chunk[TOPICS_COLUMN]) if per_topic else None
+        for column in columns:
+            if column not in chunk.columns:
+                continue
+            values = chunk[column].value_counts()
+            counts[column][None].update(values[values > 0].to_dict())
+            if per_topic:
+                pairs = chunk.groupby([topics, chunk[column]], observed=True).size()
+                for (topic, value), count in pairs.items():
+                    counts[column].setdefault(topic, Counter())[value] += count
+    return counts
+
+
+def most_common_value(counter):
+    """
+    Returns the most common value of a `Counter`, like `pd.Series.mode()[0]`.
+
+    Ties are broken by the smallest value.
+
+    Args:
+        counter (Counter): Value counts
+
+    Returns:
+        The most common value, or None if the counter is empty
+    """
+    if not counter:
+        return None
+    highest = max(counter.values())
+    return min(value for value, count in counter.items() if count == highest)
+
+
+def fill_with_modes(chunk, modes):
+    """
+    Fills the missing values of a chunk with per-topic modes, falling back to the global mode.
+
+    Args:
+        chunk (pd.DataFrame): The chunk to fill
+        modes (dict): For each column, the modes per topic under None for the whole dataset
+
+    Returns:
+        pd.DataFrame: The filled chunk
+    """
+    for column, column_modes in modes.items():
+        values = chunk[column].astype(object)
+        if len(column_modes) > 1:
+            values = values.fillna(primary_topic(chunk[TOPICS_COLUMN]).map(column_modes))
+        if column_modes[None] is not None:
+            values = values.fillna(column_modes[None])
+        chunk[column] = values
+    return chunk
+
+
+def preprocess_github_data(input_csv, output_csv, chunksize=250000, streaming=False, per_topic_modes=False):
     """
     Preprocesses the GitHub data by performing the following operations:
 
-    1. Drop the 'Unnamed: 0' column if it exists
-    2. Convert 'Creation_Date' and 'Last_Updated_Date' to datetime
+    1. Read the CSV in chunks with explicit dtypes, dropping the 'Unnamed: 0' column if it exists
+    2. Normalize 'Creation_Date' and 'Last_Updated_Date' and add their epoch seconds and the creation year
     3. Fill missing values in 'Description' column with default text
     4. Fill missing values in 'Programming_Language' with the most common language
     5. Fill missing values in 'License_Type' with the most common license type
-    6. Save the preprocessed data to a new CSV file
+    6. Save the preprocessed data to a new CSV file, chunk by chunk
+
+    In streaming mode the file is read twice: a counting pass over the language and license
+    columns only, then a pass that preprocesses, fills and writes one chunk at a time, so
+    memory stays bounded by the chunk size.
 
     Args:
         input_csv (str): The path to the input CSV file
         output_csv (str): The path to the output CSV file
+        chunksize (int): The number of rows read at a time
+        streaming (bool): Read the file twice instead of holding every chunk in memory
+        per_topic_modes (bool): Fill with the most common value of each repository's primary topic
+            (see `primary_topic`), requires a `Topics` column
 
     Returns:
         None
     """
     try:
         logger.info(f"Starting preprocessing of data from {input_csv}")
+        if per_topic_modes and TOPICS_COLUMN not in pd.read_csv(input_csv, nrows=0).columns:
+            logger.warning(f"No '{TOPICS_COLUMN}' column in {input_csv}, filling with the global modes only.")
+            per_topic_modes = False
 
-        # Read the input CSV file
-        data = pd.read_csv(input_csv)
-        logger.info(f"Input file {input_csv} read successfully with {data.shape[0]} rows and {data.shape[1]} columns.")
-
-        # Drop the 'Unnamed: 0' column if it exists
-        if 'Unnamed: 0' in data.columns:
-            data = data.drop(columns=['Unnamed: 0'])
-            logger.info("Dropped 'Unnamed: 0' column.")
+        # Count the values of 'Programming_Language' and 'License_Type' to find their most common value
+        if streaming:
+            wanted = set(MODE_FILLED_COLUMNS) | {TOPICS_COLUMN}
+            counting_chunks = pd.read_csv(input_csv, usecols=lambda column: column in wanted,
+                                          dtype=CSV_DTYPES, chunksize=chunksize)
+            counts = count_mode_values(counting_chunks, per_topic=per_topic_modes)
+            chunks = read_typed_chunks(input_csv, chunksize)
+        else:
+            pending = list(read_typed_chunks(input_csv, chunksize))
+            counts = count_mode_values(pending, per_topic=per_topic_modes)
+            # Release every chunk as soon as it is written
+            pending.reverse()
+            chunks = (pending.pop() for _ in range(len(pending)))
 
-        # Convert 'Creation_Date' and 'Last_Updated_Date' to datetime
-        data['Creation_Date'] = pd.to_datetime(data['Creation_Date']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        data['Last_Updated_Date'] = pd.to_datetime(data['Last_Updated_Date']).dt.strftime('%Y-%m-%d %H:%M:%S')
-        logger.info("Converted 'Creation_Date' and 'Last_Updated_Date' columns to datetime format.")
+        modes = {}
+        for column, column_counts in counts.items():
+            modes[column] = {topic: most_common_value(counter) for topic, counter in column_counts.items()}
+            logger.info(f"Filling missing values in '{column}' column with the most common value: {modes[column][None]}"
+                        + (f" ({len(modes[column]) - 1} per-topic values)." if per_topic_modes else "."))
 
-        # Fill missing values in 'Description' column with default text
-        data['Description'] = data['Description'].fillna("No description provided")
+        # Preprocess, fill and save the data to a new CSV file chunk by chunk
+        rows = 0
+        for index, chunk in enumerate(chunks):
+            fill_with_modes(chunk, modes).to_csv(output_csv, index=False, mode="w" if index == 0 else "a",
+                                                 header=index == 0)
+            rows += len(chunk)
+        logger.info("Normalized 'Creation_Date' and 'Last_Updated_Date' and added their epoch and year columns.")
         logger.info("Filled missing values in 'Description' column with 'No description provided'.")
-
-        # Fill missing values in 'Programming_Language' with the most common language
-        if 'Programming_Language' in data.columns:
-            most_common_language = data['Programming_Language'].mode()[0]
-            data['Programming_Language'] = data['Programming_Language'].fillna(most_common_language)
-            logger.info(f"Filled missing values in 'Programming_Language' column with the most common language: {most_common_language}.")
-
-        # Fill missing values in 'License_Type' with the most common license type
-        if 'License_Type' in data.columns:
-            most_common_license = data['License_Type'].mode()[0]
-            data['License_Type'] = data['License_Type'].fillna(most_common_license)
-            logger.info(f"Filled missing values in 'License_Type' column with the most common license type: {most_common_license}.")
-
-        # Save the preprocessed data to a new CSV file
-        data.to_csv(output_csv, index=False)
-        logger.info(f"Preprocessed data saved to {output_csv} successfully.")
+        logger.info(f"Preprocessed data ({rows} rows) saved to {output_csv} successfully.")
     
     except FileNotFoundError as fnf_error:
         logger.error(f"File not found error: {fnf_error}")
@@ -64,7 +254,102 @@ def preprocess_github_data(input_csv, output_csv):
     except Exception as e:
         logger.error(f"An unexpected error occurred during preprocessing: {e}")
 
-if __name__ == "__main__":
-    input_file = os.path.join("data", "data.csv")
-    output_file = os.path.join("data", "cleaned_data.csv")
-    preprocess_github_data(input_file, output_file)
+def normalize_timestamp(value):
+    """
+    Normalizes an ISO 8601 timestamp to the 'YYYY-MM-DD HH:MM:SS' format used in the database.
+
+    Args:
+        value (str): A timestamp such as '2015-11-07T01:19:20Z', or None
+
+    Returns:
+        str: The normalized timestamp, or None if the value is missing
+    """
+    if not value:
+        return None
+    return value.replace("T", " ").rstrip("Z")[:19]
+
+
+def clean_records(records):
+    """
+    Applies the per-row cleaning rules of `preprocess_github_data` to a stream of records.
+
+    Dates are normalized and missing descriptions are filled. The language and license
+    fills need the mode over the whole dataset, so they are left to `fill_missing_with_mode`
+    once the records are loaded.
+
+    Args:
+        records (iterable): Repository records as produced by `repository_record`
+
+    Yields:
+        dict: The cleaned records
+    """
+    for record in records:
+        record["Creation_Date"] = normalize_timestamp(record["Creation_Date"])
+        record["Last_Updated_Date"] = normalize_timestamp(record["Last_Updated_Date"])
+        if not record.get("Description"):
+            record["Description"] = DEFAULT_DESCRIPTION
+        yield record
+
+
+def fill_missing_with_mode(conn, table_name, columns=MODE_FILLED_COLUMNS, per_topic=False):
+    """
+    Fills missing values in a SQLite table with the most common value of each column.
+
+    Ties are broken by the smallest value, like `pd.Series.mode()[0]`. With `per_topic`,
+    repositories are first filled with the most common value of their primary topic (the
+    first of their topics in `repository_topics`, as in `primary_topic`), and the global
+    mode fills whatever is left.
+
+    Args:
+        conn (sqlite3.Connection): The connection to the SQLite database
+        table_name (str): The name of the table to update
+        columns (tuple): The columns to fill
+        per_topic (bool): Fill with per-topic modes first
+
+    Returns:
+        dict: The global fill value used for each column
+    """
+    fill_values = {}
+    for column in columns:
+        if per_topic:
+            updated = conn.execute(f"""
+                WITH repository_topic AS (
+                    SELECT "Owner", "Repository_Name", MIN("Topic") AS "Topic"
+                    FROM "{TOPICS_TABLE}" GROUP BY "Owner", "Repository_Name"
+                ), topic_mode AS (
+                    SELECT "Topic", value FROM (
+                        SELECT topics."Topic", repositories."{column}" AS value, ROW_NUMBER() OVER (
+                            PARTITION BY topics."Topic" ORDER BY COUNT(*) DESC, repositories."{column}"
+                        ) AS topic_rank
+                        FROM "{table_name}" AS repositories
+                        JOIN repository_topic AS topics USING ("Owner", "Repository_Name")
+                        WHERE repositories."{column}" IS NOT NULL
+                        GROUP BY topics."Topic", repositories."{column}"
+                    )
+                    WHERE topic_rank = 1
+                )
+                UPDATE "{table_name}" SET "{column}" = fills.value
+                FROM (
+                    SELECT "Owner", "Repository_Name", value
+                    FROM repository_topic JOIN topic_mode USING ("Topic")
+                ) AS fills
+                WHERE "{table_name}"."{column}" IS NULL
+                  AND "{table_name}"."Owner" = fills."Owner"
+                  AND "{table_name}"."Repository_Name" = fills."Repository_Name"
+            """).rowcount
+            logger.info(f"Filled {updated} missing values in '{column}' column with the most common value of their topic.")
+
+        row = conn.execute(f"""
+            SELECT "{column}" FROM "{table_name}"
+            WHERE "{column}" IS NOT NULL
+            GROUP BY "{column}"
+            ORDER BY COUNT(*) DESC, "{column}"
+            LIMIT 1
+        """).fetchone()
+        if row is None:
+            continue
+        fill_values[column] = row[0]
+        updated = conn.execute(f'UPDATE "{table_name}" SET "{column}" = ? WHERE "{column}" IS NULL',
+                               (row[0],)).rowcount
+        logger.info(f"Filled {updated} missing values in '{column}' column with the most common value: {row[0]}.")
+    return fill_values
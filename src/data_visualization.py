@@ -1,31 +1,116 @@
-import plotly.express as px
+import functools
+import hashlib
+import pandas as pd
 import streamlit as st
 from data_analysis import *
+from query_cache import QueryCache
 
-def most_starred_repositories_visualized():
-    top_repo = most_starred_repositories()
+# Built figures per (figure, parameters, dataset version): the data only changes at load time,
+# so a figure is built once per version and reruns only pay for Streamlit's serialization
+figure_cache = QueryCache(version=query_cache.version, maxsize=64)
+
+# Each chart function takes the frame of its analysis, so that a frame fetched for the table
+# can be charted without a second query; called without one, it fetches the frame itself.
+# Charts render the shared cached figures, as `st.plotly_chart` only serializes them.
+
+def _plotly_express():
+    """Imports plotly.express on the first chart, so that importing this module stays cheap."""
+    import plotly.express as px
+    return px
+
+
+def frame_fingerprint(frame):
+    """Returns a digest of the columns and values of a frame, in row order."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(frame).to_numpy().tobytes())
+    digest.update(repr(list(frame.columns)).encode())
+    return digest.hexdigest()
+
+
+def cached_figure(provider):
+    """
+    Decorates a figure builder so that its figure is built once per frame and dataset version.
+
+    The decorated function takes the analysis frame (fetched from `provider` when omitted)
+    and the analysis parameters, and returns the figure from `figure_cache` when it was
+    already built from the same frame. Each call gets its own copy of the figure, so
+    sessions may restyle the figures they get back; with `shared=True` it gets the
+    cached figure itself, which saves rebuilding it and must be left unmodified.
+
+    Args:
+        provider (callable): The analysis function whose frame the figure shows.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(build):
+        @functools.wraps(build)
+        def wrapper(frame=None, shared=False, **parameters):
+            if frame is None:
+                frame = provider(**parameters)
+            # Figures of failed queries are not cached, the query is retried on the next rerun
+            if frame is None or frame.empty:
+                return build(frame)
+            key = figure_cache.key(build.__name__, (frame_fingerprint(frame),), parameters)
+            figure = figure_cache.get(key, copy=not shared)
+            if figure is None:
+                figure = build(frame)
+                figure_cache.put(key, figure)
+            return figure
+
+        wrapper.provider = provider
+        return wrapper
+
+    return decorator
+
+
+def warm_figure_cache():
+    """
+    Builds the figures of all analyses, with their default parameters, for the current dataset version.
+
+    Returns:
+        int: The number of figures built, 0 if they were all cached already.
+    """
+    misses = figure_cache.misses
+    for build in FIGURES:
+        try:
+            build()
+        except Exception as e:
+            logger.error(f"Error building the {build.__name__} figure: {e}")
+    return figure_cache.misses - misses
+
+
+@cached_figure(most_starred_repositories)
+def most_starred_repositories_figure(top_repo):
+    px = _plotly_express()
     
     fig = px.bar(data_frame=top_repo, x='Number_of_Stars', y='Repository_Name', 
                  orientation='h', title='Top 10 Most Starred Repositories', 
                  color='Number_of_Stars', color_continuous_scale='viridis')
     
-    return st.plotly_chart(fig)
+    return fig
 
-def most_forked_repositories_visualized():
-    top_repo = most_forked_repositories()
+def most_starred_repositories_visualized(top_repo=None):
+    return st.plotly_chart(most_starred_repositories_figure(top_repo, shared=True))
+
+@cached_figure(most_forked_repositories)
+def most_forked_repositories_figure(top_repo):
+    px = _plotly_express()
     
     fig = px.bar(data_frame=top_repo, x='Number_of_Forks', y='Repository_Name', 
                  orientation='h', title='Top 10 Most Forked Repositories', 
                  color='Number_of_Forks', color_continuous_scale='earth')
     
-    return st.plotly_chart(fig)
+    return fig
+
+def most_forked_repositories_visualized(top_repo=None):
+    return st.plotly_chart(most_forked_repositories_figure(top_repo, shared=True))
 
-def most_updated_repositories_visualized():
-    # Get data
-    top_repo = most_updated_repositories()
+@cached_figure(most_updated_repositories)
+def most_updated_repositories_figure(top_repo):
+    px = _plotly_express()
     
-    # Convert 'Last_Updated_Date' to datetime
-    top_repo['Last_Updated_Date'] = pd.to_datetime(top_repo['Last_Updated_Date'])
+    # Convert 'Last_Updated_Date' to datetime, without modifying a frame shared with the table
+    top_repo = top_repo.assign(Last_Updated_Date=pd.to_datetime(top_repo['Last_Updated_Date']))
     
     # Create the scatter plot without 'size', just using color
     fig = px.scatter(data_frame=top_repo, x='Last_Updated_Date', y='Repository_Name', 
@@ -35,79 +120,110 @@ def most_updated_repositories_visualized():
     
     fig.update_layout(xaxis_title='Last Updated Date', yaxis_title='Repository Name')
     
-    # Display the plot in Streamlit
-    return st.plotly_chart(fig)
+    return fig
 
-def most_popular_languages_visualized():
-    top_lang = most_popular_languages()
+def most_updated_repositories_visualized(top_repo=None):
+    return st.plotly_chart(most_updated_repositories_figure(top_repo, shared=True))
+
+@cached_figure(most_popular_languages)
+def most_popular_languages_figure(top_lang):
+    px = _plotly_express()
     
     fig = px.pie(data_frame=top_lang, values='Count', names='Programming_Language', 
                  title='Top 10 Most Popular Programming Languages', 
                  color_discrete_sequence=px.colors.carto.Tropic)
     
-    return st.plotly_chart(fig)
+    return fig
+
+def most_popular_languages_visualized(top_lang=None):
+    return st.plotly_chart(most_popular_languages_figure(top_lang, shared=True))
 
-def most_popular_licenses_visualized():
-    top_lic = most_popular_licenses()
+@cached_figure(most_popular_licenses)
+def most_popular_licenses_figure(top_lic):
+    px = _plotly_express()
     
     fig = px.sunburst(data_frame=top_lic, path=['License_Type'], values='Count', 
                       title='Distribution of Top 10 Most Popular Licenses', 
                       color='Count', color_continuous_scale='mint')
     
-    return st.plotly_chart(fig)
+    return fig
+
+def most_popular_licenses_visualized(top_lic=None):
+    return st.plotly_chart(most_popular_licenses_figure(top_lic, shared=True))
 
-def most_popular_contributors_visualized():
-    top_contrib = most_popular_contributors()
+@cached_figure(most_popular_contributors)
+def most_popular_contributors_figure(top_contrib):
+    px = _plotly_express()
     
     fig = px.bar(data_frame=top_contrib, x='Count', y='Owner', orientation='h', 
                  title='Top 10 Most Popular Contributors', 
                  color='Count', color_continuous_scale='inferno')
     
-    return st.plotly_chart(fig)
+    return fig
 
-def average_stars_by_language_visualized():
-    top_lang = average_stars_by_language()
+def most_popular_contributors_visualized(top_contrib=None):
+    return st.plotly_chart(most_popular_contributors_figure(top_contrib, shared=True))
+
+@cached_figure(average_stars_by_language)
+def average_stars_by_language_figure(top_lang):
+    px = _plotly_express()
     
     fig = px.box(data_frame=top_lang, x='Programming_Language', y='Average_Stars', 
                  title='Average Stars by Programming Language', 
                  color='Programming_Language')
     fig.update_layout(xaxis_title='Programming Language', yaxis_title='Average Stars')
     
-    return st.plotly_chart(fig)
+    return fig
+
+def average_stars_by_language_visualized(top_lang=None):
+    return st.plotly_chart(average_stars_by_language_figure(top_lang, shared=True))
 
-def average_forks_by_language_visualized():
-    top_lang = average_forks_by_language()
+@cached_figure(average_forks_by_language)
+def average_forks_by_language_figure(top_lang):
+    px = _plotly_express()
     
     fig = px.box(data_frame=top_lang, x='Programming_Language', y='Average_Forks', 
                  title='Average Forks by Programming Language', 
                  color='Programming_Language')
     fig.update_layout(xaxis_title='Programming Language', yaxis_title='Average Forks')
     
-    return st.plotly_chart(fig)
+    return fig
 
-def repos_with_open_issues_visualized():
-    top_repo = repos_with_OpenIssues()
+def average_forks_by_language_visualized(top_lang=None):
+    return st.plotly_chart(average_forks_by_language_figure(top_lang, shared=True))
+
+@cached_figure(repos_with_OpenIssues)
+def repos_with_open_issues_figure(top_repo):
+    px = _plotly_express()
     
     fig = px.treemap(data_frame=top_repo, path=['Repository_Name'], values='Number_of_Open_Issues', 
                      title='Top 10 Repositories with Open Issues', 
                      color='Number_of_Open_Issues', color_continuous_scale='reds')
     
-    return st.plotly_chart(fig)
+    return fig
+
+def repos_with_open_issues_visualized(top_repo=None):
+    return st.plotly_chart(repos_with_open_issues_figure(top_repo, shared=True))
 
-def repo_created_each_year_visualized():
-    top_repo = repo_created_each_year()
+@cached_figure(repo_created_each_year)
+def repo_created_each_year_figure(top_repo):
+    px = _plotly_express()
     
     fig = px.line(data_frame=top_repo, x='year', y='count', title='Repositories Created Each Year', 
                   markers=True)
     fig.update_layout(xaxis_title='Year', yaxis_title='Repository Count')
     
-    return st.plotly_chart(fig)
+    return fig
 
-def most_recently_updated_repo_visualized():
-    top_repo = most_recently_updated_repo()
+def repo_created_each_year_visualized(top_repo=None):
+    return st.plotly_chart(repo_created_each_year_figure(top_repo, shared=True))
+
+@cached_figure(most_recently_updated_repo)
+def most_recently_updated_repo_figure(top_repo):
+    px = _plotly_express()
     
-    # Convert 'Last_Updated_Date' to datetime
-    top_repo['Last_Updated_Date'] = pd.to_datetime(top_repo['Last_Updated_Date'])
+    # Convert 'Last_Updated_Date' to datetime, without modifying a frame shared with the table
+    top_repo = top_repo.assign(Last_Updated_Date=pd.to_datetime(top_repo['Last_Updated_Date']))
     
     # Create the scatter plot without 'size', just using color
     fig = px.scatter(data_frame=top_repo, x='Last_Updated_Date', y='Repository_Name', 
@@ -117,24 +233,58 @@ def most_recently_updated_repo_visualized():
     
     fig.update_layout(xaxis_title='Last Updated Date', yaxis_title='Repository Name')
     
-    return st.plotly_chart(fig)
+    return fig
+
+def most_recently_updated_repo_visualized(top_repo=None):
+    return st.plotly_chart(most_recently_updated_repo_figure(top_repo, shared=True))
 
-def distribution_of_licenses_visualized():
-    top_lic = distribution_of_licenses()
+@cached_figure(distribution_of_licenses)
+def distribution_of_licenses_figure(top_lic):
+    px = _plotly_express()
     
     fig = px.pie(data_frame=top_lic, values='Count', names='License_Type', 
                  title='Distribution of Licenses', 
                  hole=0.3, color_discrete_sequence=px.colors.sequential.Oranges)
     
-    return st.plotly_chart(fig)
+    return fig
 
-def popular_repo_for_each_language_visualized():
-    top_repo = popular_repo_for_each_language()
+def distribution_of_licenses_visualized(top_lic=None):
+    return st.plotly_chart(distribution_of_licenses_figure(top_lic, shared=True))
+
+@cached_figure(popular_repo_for_each_language)
+def popular_repo_for_each_language_figure(top_repo):
+    px = _plotly_express()
     
     fig = px.scatter(top_repo, x='Programming_Language', y='Repository_Name', 
                      size='max_stars', title='Most Popular Repository for Each Language', 
                      color='max_stars', color_continuous_scale='tealrose', 
                      hover_name='Repository_Name')
     
-    return st.plotly_chart(fig)
+    return fig
+
+def popular_repo_for_each_language_visualized(top_repo=None):
+    return st.plotly_chart(popular_repo_for_each_language_figure(top_repo, shared=True))
+
+
+@cached_figure(top_repositories_per_language)
+def top_repositories_per_language_figure(top_repo):
+    px = _plotly_express()
+    metric = top_repo.columns[-1]
+
+    fig = px.bar(top_repo.assign(Rank=top_repo['Rank'].astype(str)), x='Programming_Language', y=metric,
+                 color='Rank', barmode='group', hover_name='Repository_Name', hover_data=['Owner'],
+                 title='Top Repositories for Each Language')
+
+    return fig
+
+def top_repositories_per_language_visualized(top_repo=None, **parameters):
+    return st.plotly_chart(top_repositories_per_language_figure(top_repo, **parameters, shared=True))
+
 
+FIGURES = [
+    most_starred_repositories_figure, most_forked_repositories_figure, most_updated_repositories_figure,
+    most_popular_languages_figure, most_popular_licenses_figure, most_popular_contributors_figure,
+    average_stars_by_language_figure, average_forks_by_language_figure, repos_with_open_issues_figure,
+    repo_created_each_year_figure, most_recently_updated_repo_figure, distribution_of_licenses_figure,
+    popular_repo_for_each_language_figure, top_repositories_per_language_figure,
+]
@@ -1,65 +1,608 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime, timedelta, timezone
+
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
 from utils import logger
 
-def fetch_github_data(topic, per_page=30, pages=5):
+GITHUB_API_URL = "https://api.github.com"
+
+# GitHub search never returns more than 1000 results for a single query
+SEARCH_RESULT_CAP = 1000
+MAX_PER_PAGE = 100
+# No repository on GitHub was created before this day
+EARLIEST_CREATED = date(2007, 10, 1)
+# Retries of failed requests wait exponentially longer, up to this many seconds
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+
+def retry_delay(attempt):
     """
-    Fetches GitHub data for a given topic using the GitHub API.
+    Returns the seconds to wait before retrying a request after `attempt` failures.
+
+    The delay doubles with every attempt and half of it is random, so that workers
+    failing together do not all retry at the same moment.
+    """
+    delay = min(RETRY_BASE_DELAY * 2 ** attempt, RETRY_MAX_DELAY)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_rate_limited(response):
+    """
+    Tells whether a response is a rate limit, which is retried after a back-off, rather than a refusal.
+
+    A 429 is always a rate limit, and so is a 403 with `Retry-After`, an exhausted
+    `X-RateLimit-Remaining` or a secondary rate limit message. Any other 403 (bad
+    credentials, a blocked resource) would be refused again, so it is a hard failure.
 
     Args:
-        topic (str): The topic to search for.
-        per_page (int, optional): The number of items to fetch per page. Defaults to 30.
-        pages (int, optional): The number of pages to fetch. Defaults to 5.
+        response (requests.Response): The response.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the fetched data.
+        bool: Whether the request was rate limited.
+    """
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    if "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0":
+        return True
+    return "rate limit" in response.text.lower()
+
+
+class RateLimiter:
+    """
+    Shares the GitHub quota state between all harvesting threads.
+
+    The limiter reads the `X-RateLimit-Remaining`, `X-RateLimit-Reset` and
+    `Retry-After` response headers so that workers run right up to the quota
+    and pause until the advertised reset instead of failing requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.remaining = None
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+
+    def acquire(self, cost=1):
+        """Blocks until a request costing `cost` units of quota may be sent and reserves them."""
+        while True:
+            with self._lock:
+                now = time.time()
+                delay = 0.0
+                if self.blocked_until > now:
+                    delay = self.blocked_until - now
+                elif self.remaining is not None and self.remaining < cost and self.reset_at > now:
+                    delay = self.reset_at - now
+                else:
+                    if self.remaining is not None:
+                        self.remaining -= cost
+                    return
+            logger.info(f"Rate limit reached, waiting {delay:.1f}s before the next request")
+            time.sleep(delay)
+
+    def update(self, response):
+        """Records the quota headers of a response and schedules a back-off if needed."""
+        headers = response.headers
+        rate_limited = is_rate_limited(response)
+        with self._lock:
+            now = time.time()
+            if "X-RateLimit-Remaining" in headers:
+                self.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Reset" in headers:
+                self.reset_at = float(headers["X-RateLimit-Reset"])
+
+            if rate_limited:
+                if "Retry-After" in headers:
+                    wait_until = now + float(headers["Retry-After"])
+                elif self.remaining == 0 and self.reset_at > now:
+                    wait_until = self.reset_at
+                else:
+                    # Secondary rate limit without any hint: wait at least a minute
+                    wait_until = now + 60
+                self.blocked_until = max(self.blocked_until, wait_until)
+
+    def settle(self, reserved, cost, remaining, reset_at=None):
+        """
+        Reconciles a reservation with the quota that a response body reports.
+
+        Args:
+            reserved (int): The units reserved by `acquire` for the request.
+            cost (int): The units the request actually cost.
+            remaining (int): The units left after the request, as reported by the API.
+            reset_at (str, optional): The ISO 8601 time the quota resets at. Defaults to None.
+        """
+        with self._lock:
+            if self.remaining is None:
+                self.remaining = remaining
+            else:
+                # Give back (or take) the difference to the estimate, but never count more
+                # units than the API has left, as other clients may share the quota
+                self.remaining = min(self.remaining + reserved - cost, remaining)
+            if reset_at:
+                self.reset_at = datetime.fromisoformat(reset_at.replace("Z", "+00:00")).timestamp()
+
+
+def create_session(token=None, pool_size=10):
+    """
+    Creates a keep-alive session for the GitHub API.
+
+    Args:
+        token (str, optional): GitHub API token. Defaults to the `GITHUB_API_TOKEN` environment variable.
+        pool_size (int, optional): Number of pooled connections per host. Defaults to 10.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/vnd.github+json"})
+
+    token = token or os.getenv("GITHUB_API_TOKEN")
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    return session
+
+
+def repository_record(repo):
+    """
+    Maps a repository item of the search API onto the `github_repositories` columns.
+
+    Args:
+        repo (dict): A repository item from the search API response.
+
+    Returns:
+        dict: The mapped repository record.
+    """
+    return {
+        "Repository_Name": repo['name'],
+        "Owner": repo['owner']['login'],
+        "Description": repo['description'],
+        "URL": repo['html_url'],
+        "Programming_Language": repo.get('language'),
+        "Creation_Date": repo['created_at'],
+        "Last_Updated_Date": repo['updated_at'],
+        "Number_of_Stars": repo['stargazers_count'],
+        "Number_of_Forks": repo['forks_count'],
+        "Number_of_Open_Issues": repo['open_issues_count'],
+        "License_Type": repo['license']['name'] if repo['license'] else None
+    }
+
+
+def fetch_search_page(session, limiter, url, params, max_retries=5, cache=None):
+    """
+    Fetches one search page, backing off on rate limiting and transient errors.
+
+    When a response cache is given, the request is made conditional on the cached
+    `ETag`/`Last-Modified` validators and a `304 Not Modified` reply is served from disk.
+
+    Args:
+        session (requests.Session): The shared session.
+        limiter (RateLimiter): The shared rate limiter.
+        url (str): The search endpoint URL.
+        params (dict): The query parameters.
+        max_retries (int, optional): Number of retries before giving up. Defaults to 5.
+        cache (ResponseCache, optional): The response cache. Defaults to None.
+
+    Returns:
+        dict: The decoded JSON payload, or None if the page could not be fetched.
     """
-    
-    repositories_data = []
-    url = f"https://api.github.com/search/repositories?q={topic}&per_page={per_page}"
-    
-    logger.info(f"Fetching GitHub data for topic: {topic}")
-    
-    for page in range(1, pages + 1):
-        logger.info(f"Fetching page {page} of {pages}")
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    use_validators = cache is not None
+
+    for attempt in range(max_retries + 1):
+        headers = cache.conditional_headers(full_url) if use_validators else {}
+        limiter.acquire()
         try:
-            response = requests.get(url + f"&page={page}", timeout=30)
+            response = session.get(full_url, headers=headers, timeout=30)
+            limiter.update(response)
+
+            if response.status_code == 304 and use_validators:
+                body = cache.revalidated(full_url)
+                if body is not None:
+                    logger.info(f"Page {params.get('page')} of '{params.get('q')}' not modified, served from cache")
+                    return json.loads(body)
+                use_validators = False  # The entry was evicted meanwhile, fetch it again in full
+                continue
+
+            if is_rate_limited(response) or response.status_code >= 500:
+                logger.warning(f"Got HTTP {response.status_code} for page {params.get('page')} "
+                               f"of '{params.get('q')}' (attempt {attempt + 1}/{max_retries + 1})")
+                if response.status_code >= 500:
+                    time.sleep(retry_delay(attempt))
+                continue
+
             response.raise_for_status()  # Raise an exception for bad responses
-            data = response.json().get('items', [])
-            logger.info(f"Successfully fetched {len(data)} repositories from page {page}")
-
-            for repo in data:
-                repositories_data.append({
-                    "Repository_Name": repo['name'],
-                    "Owner": repo['owner']['login'],
-                    "Description": repo['description'],
-                    "URL": repo['html_url'],
-                    "Programming_Language": repo.get('language'),
-                    "Creation_Date": repo['created_at'],
-                    "Last_Updated_Date": repo['updated_at'],
-                    "Number_of_Stars": repo['stargazers_count'],
-                    "Number_of_Forks": repo['forks_count'],
-                    "Number_of_Open_Issues": repo['open_issues_count'],
-                    "License_Type": repo['license']['name'] if repo['license'] else None
-                })
+            if cache is not None:
+                cache.store(full_url, response)
+            return response.json()
 
         except requests.exceptions.HTTPError as http_err:
-            logger.error(f"HTTP error occurred while fetching page {page}: {http_err}")
-        except requests.exceptions.ConnectionError as conn_err:
-            logger.error(f"Connection error occurred while fetching page {page}: {conn_err}")
-        except requests.exceptions.Timeout as timeout_err:
-            logger.error(f"Timeout error occurred while fetching page {page}: {timeout_err}")
+            logger.error(f"HTTP error occurred while fetching page {params.get('page')}: {http_err}")
+            return None
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as conn_err:
+            logger.warning(f"Connection error occurred while fetching page {params.get('page')}: {conn_err}")
+            time.sleep(retry_delay(attempt))
         except requests.exceptions.RequestException as req_err:
-            logger.error(f"Request exception occurred while fetching page {page}: {req_err}")
-        except Exception as e:
-            logger.error(f"An unexpected error occurred: {e}")
-    
-    logger.info(f"Total repositories fetched: {len(repositories_data)}")
-    
-    data = pd.DataFrame(repositories_data)
-    logger.info(f"Dataframe created with {len(data)} rows.")
-    return data
-
-if __name__ == "__main__":
-    data = fetch_github_data("machine learning")
-    print(data.head())
+            logger.error(f"Request exception occurred while fetching page {params.get('page')}: {req_err}")
+            return None
+
+    logger.error(f"Giving up on page {params.get('page')} of '{params.get('q')}' after {max_retries + 1} attempts")
+    return None
+
+
+def search_query(topic, cache=None, since_last_harvest=False):
+    """
+    Builds the search query for a topic.
+
+    In "since last harvest" mode a `pushed:>` qualifier restricts the search to
+    repositories pushed after the last recorded harvest of the topic.
+
+    Args:
+        topic (str): The topic to search for.
+        cache (ResponseCache, optional): The cache holding the harvest timestamps. Defaults to None.
+        since_last_harvest (bool, optional): Whether to add the `pushed:>` qualifier. Defaults to False.
+
+    Returns:
+        str: The search query.
+    """
+    if since_last_harvest:
+        if cache is None:
+            raise ValueError("The 'since last harvest' mode needs a response cache to track harvests")
+        last_harvested_at = cache.last_harvested_at(topic)
+        if last_harvested_at:
+            return f"{topic} pushed:>{last_harvested_at}"
+    return topic
+
+
+class SearchShard:
+    """
+    A slice of a search query, bounded by a `created:` date window and a `stars:` range.
+
+    A query matching more than `SEARCH_RESULT_CAP` repositories is split into disjoint
+    shards until each one is under the cap: by halving the creation window down to a
+    single day, then by halving the star range. Open-ended bounds (None) are left out of
+    the qualifiers, so the root shard is the plain query.
+
+    Args:
+        created (tuple, optional): The (first, last) creation day, either may be None. Defaults to all days.
+        stars (tuple, optional): The (lowest, highest) star count, the highest may be None. Defaults to all.
+    """
+
+    def __init__(self, created=(None, None), stars=(None, None)):
+        self.created = created
+        self.stars = stars
+
+    @classmethod
+    def from_qualifiers(cls, qualifiers):
+        """
+        Rebuilds a shard from the output of `qualifiers`.
+
+        Args:
+            qualifiers (str): The search qualifiers of the shard.
+
+        Returns:
+            SearchShard: The shard.
+        """
+        bounds = {"created": (None, None), "stars": (None, None)}
+        for qualifier in qualifiers.split():
+            name, _, value = qualifier.partition(":")
+            convert = date.fromisoformat if name == "created" else int
+            if value.startswith(">="):
+                bounds[name] = (convert(value[2:]), None)
+            elif value.startswith("<="):
+                bounds[name] = (None, convert(value[2:]))
+            else:
+                low, high = value.split("..")
+                bounds[name] = (convert(low), convert(high))
+        return cls(bounds["created"], bounds["stars"])
+
+    def qualifiers(self):
+        """Returns the search qualifiers of the shard, '' for the root shard."""
+        qualifiers = []
+        for name, (low, high) in (("created", self.created), ("stars", self.stars)):
+            if low is not None and high is not None:
+                qualifiers.append(f"{name}:{low}..{high}")
+            elif low is not None:
+                qualifiers.append(f"{name}:>={low}")
+            elif high is not None:
+                qualifiers.append(f"{name}:<={high}")
+        return " ".join(qualifiers)
+
+    def split(self, today=None):
+        """
+        Splits the shard into two disjoint shards covering it.
+
+        Args:
+            today (date, optional): The last day of an open creation window. Defaults to today.
+
+        Returns:
+            list: The two halves, or an empty list if the shard is a single day and star count.
+        """
+        first, last = self.created
+        first = first or EARLIEST_CREATED
+        days = ((last or today or datetime.now(timezone.utc).date()) - first).days
+        if days >= 1:
+            middle = first + timedelta(days=days // 2)
+            return [SearchShard((self.created[0], middle), self.stars),
+                    SearchShard((middle + timedelta(days=1), last), self.stars)]
+
+        low, high = self.stars
+        low = low or 0
+        if high is None:
+            # Star counts are heavy-tailed, open ranges are cut geometrically
+            middle = 2 * low + 9
+        elif high > low:
+            middle = (low + high) // 2
+        else:
+            return []
+        return [SearchShard(self.created, (low, middle)), SearchShard(self.created, (middle + 1, high))]
+
+    def __repr__(self):
+        return f"SearchShard({self.qualifiers() or 'all'})"
+
+
+def repository_key(repo):
+    """Returns the (owner, name) identity of a search result item."""
+    return repo['owner']['login'], repo['name']
+
+
+def plan_next_requests(topic, search_shard, page, payload, pages=10, per_page=MAX_PER_PAGE, shard=True,
+                       today=None):
+    """
+    Decides which requests follow a fetched search page.
+
+    The first page of a query tells how many results it has: a query above the search
+    cap is split into shards (whose first pages replace it), otherwise the rest of its
+    pages are requested, up to `pages`.
+
+    Args:
+        topic (str): The topic of the page, for the log.
+        search_shard (SearchShard): The shard of the page.
+        page (int): The page number.
+        payload (dict): The decoded search response.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        per_page (int, optional): The number of items per page. Defaults to 100.
+        shard (bool, optional): Split queries above the search cap into shards. Defaults to True.
+        today (date, optional): The last day of open creation windows (see `SearchShard.split`).
+
+    Returns:
+        tuple: The `(shard, page)` requests to make next, and whether the items of this page
+        are kept (not when its query was split, the shards return those items).
+    """
+    if page != 1:
+        return [], True
+    label = search_shard.qualifiers() or "search"
+    total_count = payload.get("total_count", 0)
+    if total_count > SEARCH_RESULT_CAP:
+        shards = search_shard.split(today) if shard else []
+        if shards:
+            logger.info(f"Topic '{topic}' {label} has {total_count} results, "
+                        f"splitting it into {', '.join(child.qualifiers() for child in shards)}")
+            return [(child, 1) for child in shards], False
+        logger.warning(f"Topic '{topic}' {label} has {total_count} results, only the "
+                       f"first {SEARCH_RESULT_CAP} can be fetched")
+    pages = min(pages, math.ceil(SEARCH_RESULT_CAP / per_page))
+    available_pages = min(pages, math.ceil(min(total_count, SEARCH_RESULT_CAP) / per_page))
+    logger.info(f"Topic '{topic}' {label} has {total_count} results, fetching {max(available_pages, 1)} page(s)")
+    return [(search_shard, next_page) for next_page in range(2, available_pages + 1)], True
+
+
+def iter_search_pages(topics, pages=10, per_page=MAX_PER_PAGE, max_workers=8, token=None,
+                      api_url=GITHUB_API_URL, session=None, cache=None, since_last_harvest=False, shard=True,
+                      journal=None, archive=None):
+    """
+    Fetches search pages for many topics concurrently and yields them as they complete.
+
+    The first page of every topic is requested up front; its `total_count` decides how
+    many of the remaining pages are worth requesting, so empty pages are never fetched.
+    GitHub never returns more than `SEARCH_RESULT_CAP` results for a query, so a topic
+    above the cap is split into `SearchShard`s, recursively, until each shard is under it.
+    The shards are fetched concurrently like topics, the first page of each shard telling
+    whether it is split again. Repositories already yielded for the topic (e.g. moved
+    between shards by a star change during the harvest) are dropped from later pages.
+
+    With a journal, the harvest runs as a resumable job (see `HarvestJournal`): every page
+    is committed to the journal as soon as it is fetched, pages done by an earlier run of
+    the same job are replayed from it instead of being fetched, and pages that failed are
+    only retried once their jittered back-off has passed. A page that fails is queued
+    again in the same run until it has failed `journal.max_attempts` times; only then is
+    it yielded as failed.
+
+    With an archive, every page is also stored raw in the `ResponseArchive` as one harvest,
+    so that it can be rebuilt later without the API.
+
+    Args:
+        topics (list): The topics to search for.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        per_page (int, optional): The number of items per page (at most 100). Defaults to 100.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 8.
+        token (str, optional): GitHub API token. Defaults to `GITHUB_API_TOKEN`.
+        api_url (str, optional): Base URL of the API. Defaults to the public GitHub API.
+        session (requests.Session, optional): A session to reuse. Defaults to a new one.
+        cache (ResponseCache, optional): Cache for conditional requests. Defaults to None.
+        since_last_harvest (bool, optional): Only search repositories pushed since the
+            last harvest recorded in the cache. Defaults to False.
+        shard (bool, optional): Split topics above the search cap into shards. Defaults to True.
+        journal (HarvestJournal, optional): The journal of resumable harvest jobs. Defaults to None.
+        archive (ResponseArchive, optional): The archive of raw pages. Defaults to None.
+
+    Yields:
+        tuple: `(topic, shard, page, items)` for every page, where `shard` is the qualifiers of
+        the shard ('' for the whole topic); `items` is None if the page failed.
+    """
+    per_page = min(per_page, MAX_PER_PAGE)
+    pages = min(pages, math.ceil(SEARCH_RESULT_CAP / per_page))
+    url = f"{api_url.rstrip('/')}/search/repositories"
+    session = session or create_session(token, pool_size=max_workers)
+    limiter = RateLimiter()
+    queries = {topic: search_query(topic, cache, since_last_harvest) for topic in topics}
+    seen = {topic: set() for topic in topics}
+    run_failures = Counter()
+    job_id, today = None, None
+    if journal is not None:
+        job_id, started_at = journal.start(list(queries.values()), per_page)
+        # Shards are cut from the day the job started, so a resumed job finds the same pages
+        today = datetime.fromtimestamp(started_at, timezone.utc).date()
+    harvest_id = archive.start(topics) if archive is not None else None
+
+    def fetch(topic, search_shard, page, attempts=0, retry_at=0.0):
+        delay = retry_at - time.time()
+        if delay > 0:
+            logger.info(f"Waiting {delay:.1f}s before retrying page {page} of '{topic}'")
+            time.sleep(delay)
+        label = search_shard.qualifiers()
+        params = {"q": f"{queries[topic]} {label}".strip(), "per_page": per_page, "page": page}
+        payload = fetch_search_page(session, limiter, url, params, cache=cache)
+        if journal is not None:
+            if payload is None:
+                journal.page_failed(job_id, topic, label, page, time.time() + retry_delay(attempts))
+            else:
+                journal.page_done(job_id, topic, label, page, payload)
+        return topic, search_shard, page, payload
+
+    def submit(topic, search_shard, page):
+        if journal is None:
+            return executor.submit(fetch, topic, search_shard, page)
+        payload, attempts, retry_at = journal.lookup(job_id, topic, search_shard.qualifiers(), page)
+        if payload is None:
+            return executor.submit(fetch, topic, search_shard, page, attempts, retry_at)
+        replayed = Future()
+        replayed.set_result((topic, search_shard, page, payload))
+        return replayed
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {submit(topic, SearchShard(), 1) for topic in topics}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                topic, search_shard, page, payload = future.result()
+                label = search_shard.qualifiers()
+                if payload is None:
+                    run_failures[topic, label, page] += 1
+                    if journal is not None and run_failures[topic, label, page] < journal.max_attempts:
+                        pending.add(submit(topic, search_shard, page))
+                        continue
+                    yield topic, label, page, None
+                    continue
+                if archive is not None:
+                    archive.add(harvest_id, topic, label, page, payload)
+
+                next_requests, keep_items = plan_next_requests(topic, search_shard, page, payload, pages, per_page,
+                                                               shard, today)
+                pending.update(submit(topic, next_shard, next_page) for next_shard, next_page in next_requests)
+                if not keep_items:
+                    continue
+
+                items = []
+                for repo in payload.get("items", []):
+                    key = repository_key(repo)
+                    if key not in seen[topic]:
+                        seen[topic].add(key)
+                        items.append(repo)
+                yield topic, label, page, items
+    if journal is not None:
+        journal.finish(job_id)
+    if archive is not None:
+        archive.finish(harvest_id)
+
+
+def harvest_topics(topics, pages=10, per_page=MAX_PER_PAGE, max_workers=8, token=None,
+                   api_url=GITHUB_API_URL, session=None, cache=None, since_last_harvest=False, shard=True,
+                   journal=None, graphql=False, archive=None):
+    """
+    Fetches GitHub data for many topics concurrently.
+
+    Topics with more results than the search cap are harvested shard by shard (see
+    `iter_search_pages`), and each repository is kept once per topic. With `graphql`,
+    the pages come from the GraphQL API instead (see `iter_graphql_pages`) and the
+    records carry the topics and releases of each repository as extra columns.
+
+    Args:
+        topics (list): The topics to search for.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        per_page (int, optional): The number of items per page (at most 100). Defaults to 100.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 8.
+        token (str, optional): GitHub API token. Defaults to `GITHUB_API_TOKEN`.
+        api_url (str, optional): Base URL of the API. Defaults to the public GitHub API.
+        session (requests.Session, optional): A session to reuse. Defaults to a new one.
+        cache (ResponseCache, optional): Cache for conditional requests. Defaults to None.
+        since_last_harvest (bool, optional): Only fetch repositories pushed since the
+            last harvest recorded in the cache. Defaults to False.
+        shard (bool, optional): Split topics above the search cap into shards. Defaults to True.
+        journal (HarvestJournal, optional): Run the harvest as a resumable job recorded in this
+            journal. Defaults to None.
+        graphql (bool, optional): Harvest through the GraphQL API. Defaults to False.
+        archive (ResponseArchive, optional): Archive the raw pages of the harvest. Defaults to None.
+
+    Returns:
+        dict: A DataFrame of fetched repositories per topic.
+    """
+    if graphql:
+        from fetch_github_graphql import graphql_record, iter_graphql_pages
+        if journal is not None:
+            raise ValueError("GraphQL harvests cannot be recorded in a harvest journal")
+        search_pages = iter_graphql_pages(topics, pages, per_page, max_workers, token, api_url, session, cache,
+                                          since_last_harvest, shard, archive=archive)
+        record = graphql_record
+    else:
+        search_pages = iter_search_pages(topics, pages, per_page, max_workers, token, api_url, session, cache,
+                                         since_last_harvest, shard, journal, archive)
+        record = repository_record
+    logger.info(f"Harvesting GitHub data for {len(topics)} topic(s) with {max_workers} workers")
+    started = time.perf_counter()
+    harvest_started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    pages_by_topic = {topic: {} for topic in topics}
+    failed_topics = set()
+    fetched_pages = 0
+    for topic, search_shard, page, items in search_pages:
+        if items is None:
+            failed_topics.add(topic)
+            continue
+        # Keyed by shard and page, so that the records come out in the same order on every harvest
+        pages_by_topic[topic][(search_shard, page)] = [record(repo) for repo in items]
+        fetched_pages += 1
+        logger.info(f"Successfully fetched {len(items)} repositories from page {page} of '{topic}' {search_shard}")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Fetched {fetched_pages} pages in {elapsed:.2f}s ({fetched_pages / max(elapsed, 1e-9):.1f} pages/s)")
+    if cache is not None:
+        logger.info(f"Response cache: {cache.hits} page(s) served from disk, {cache.misses} not in the cache")
+        for topic in topics:
+            if topic not in failed_topics:
+                cache.mark_harvested(topic, harvest_started_at)
+
+    results = {}
+    for topic, topic_pages in pages_by_topic.items():
+        records = [record for page in sorted(topic_pages) for record in topic_pages[page]]
+        results[topic] = pd.DataFrame(records)
+        logger.info(f"Dataframe created with {len(records)} rows for topic '{topic}'.")
+    return results
+
+
+def fetch_github_data(topic, per_page=MAX_PER_PAGE, pages=10):
+    """
+    Fetches GitHub data for a given topic using the GitHub API.
+
+    Args:
+        topic (str): The topic to search for.
+        per_page (int, optional): The number of items to fetch per page. Defaults to 100.
+        pages (int, optional): The number of pages to fetch. Defaults to 10.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the fetched data.
+    """
+    return harvest_topics([topic], pages=pages, per_page=per_page)[topic]
@@ -0,0 +1,290 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from fetch_github_data import (GITHUB_API_URL, MAX_PER_PAGE, SEARCH_RESULT_CAP, RateLimiter, SearchShard,
+                               create_session, is_rate_limited, plan_next_requests, repository_key, retry_delay,
+                               search_query)
+from utils import logger
+
+# GitHub rejects GraphQL queries that could return more than this many nodes
+GRAPHQL_MAX_NODES = 500_000
+# Topics requested per repository; each one is a node of the query
+TOPICS_PER_REPOSITORY = 10
+
+# The `github_repositories` columns, plus the topics and releases of each repository
+# that the REST search only gives with one more request per repository
+REPOSITORY_SEARCH_QUERY = """
+query($query: String!, $first: Int!, $after: String, $topics: Int!) {
+  rateLimit { cost remaining resetAt }
+  search(query: $query, type: REPOSITORY, first: $first, after: $after) {
+    repositoryCount
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      ... on Repository {
+        name
+        owner { login }
+        description
+        url
+        primaryLanguage { name }
+        createdAt
+        updatedAt
+        stargazerCount
+        forkCount
+        issues(states: OPEN) { totalCount }
+        pullRequests(states: OPEN) { totalCount }
+        licenseInfo { name }
+        repositoryTopics(first: $topics) { nodes { topic { name } } }
+        releases { totalCount }
+        latestRelease { tagName }
+      }
+    }
+  }
+}
+"""
+
+
+def repository_connections(topics=TOPICS_PER_REPOSITORY):
+    """
+    Returns the connections of every repository node of `REPOSITORY_SEARCH_QUERY`.
+
+    The connections only asked for their `totalCount` still count as one node each,
+    while `latestRelease` is an object rather than a connection and costs nothing.
+
+    Args:
+        topics (int, optional): The number of topics per repository. Defaults to 10.
+
+    Returns:
+        dict: The most nodes each connection may return, by connection name.
+    """
+    return {"issues": 1, "pullRequests": 1, "repositoryTopics": topics, "releases": 1}
+
+
+def query_cost(first, topics=TOPICS_PER_REPOSITORY):
+    """
+    Estimates the size of a repository search query the way GitHub does.
+
+    Every connection asked for `first` items counts as that many nodes, and as one
+    request per parent node; the query costs one rate-limit point per 100 requests.
+
+    Args:
+        first (int): The number of repositories per page.
+        topics (int, optional): The number of topics per repository. Defaults to 10.
+
+    Returns:
+        tuple: The `(nodes, points)` of the query.
+    """
+    connections = repository_connections(topics)
+    nodes = first * (1 + sum(connections.values()))
+    requests_needed = 1 + first * len(connections)
+    return nodes, max(1, round(requests_needed / 100))
+
+
+def page_size(per_page=MAX_PER_PAGE, topics=TOPICS_PER_REPOSITORY, max_nodes=GRAPHQL_MAX_NODES):
+    """
+    Returns the largest number of repositories per page whose query stays within a node budget.
+
+    Args:
+        per_page (int, optional): The wanted number of repositories per page (at most 100). Defaults to 100.
+        topics (int, optional): The number of topics per repository. Defaults to 10.
+        max_nodes (int, optional): The node budget of one query. Defaults to GitHub's limit.
+
+    Returns:
+        int: The number of repositories per page.
+    """
+    first = min(per_page, MAX_PER_PAGE, max_nodes // query_cost(1, topics)[0])
+    if first < 1:
+        raise ValueError(f"A node budget of {max_nodes} cannot fit one repository with {topics} topics")
+    return first
+
+
+def graphql_record(node):
+    """
+    Maps a repository node of the GraphQL search onto the `github_repositories` columns, plus extras.
+
+    Open issues count the open pull requests too, as the REST `open_issues_count` does.
+
+    Args:
+        node (dict): A repository node from the GraphQL search response.
+
+    Returns:
+        dict: The record of `repository_record`, with the `Repository_Topics` (';'-separated),
+        `Number_of_Releases` and `Latest_Release` extras.
+    """
+    topics = node.get('repositoryTopics') or {}
+    latest_release = node.get('latestRelease')
+    return {
+        "Repository_Name": node['name'],
+        "Owner": node['owner']['login'],
+        "Description": node['description'],
+        "URL": node['url'],
+        "Programming_Language": node['primaryLanguage']['name'] if node.get('primaryLanguage') else None,
+        "Creation_Date": node['createdAt'],
+        "Last_Updated_Date": node['updatedAt'],
+        "Number_of_Stars": node['stargazerCount'],
+        "Number_of_Forks": node['forkCount'],
+        "Number_of_Open_Issues": node['issues']['totalCount'] + node['pullRequests']['totalCount'],
+        "License_Type": node['licenseInfo']['name'] if node.get('licenseInfo') else None,
+        "Repository_Topics": ";".join(topic['topic']['name'] for topic in topics.get('nodes') or []),
+        "Number_of_Releases": node['releases']['totalCount'],
+        "Latest_Release": latest_release['tagName'] if latest_release else None,
+    }
+
+
+def fetch_graphql_page(session, limiter, url, variables, cost=1, max_retries=5):
+    """
+    Runs one search query against the GraphQL API, backing off on rate limiting and transient errors.
+
+    The query reserves `cost` points from the limiter, which is then reconciled with
+    the `rateLimit` cost and remaining points that the response reports.
+
+    Args:
+        session (requests.Session): The shared session.
+        limiter (RateLimiter): The shared rate limiter, counting rate-limit points.
+        url (str): The GraphQL endpoint URL.
+        variables (dict): The variables of `REPOSITORY_SEARCH_QUERY`.
+        cost (int, optional): The points the query is expected to cost. Defaults to 1.
+        max_retries (int, optional): Number of retries before giving up. Defaults to 5.
+
+    Returns:
+        dict: The `data` of the response, or None if the query could not be run.
+    """
+    label = f"page after {variables.get('after')!r} of '{variables.get('query')}'"
+    body = {"query": REPOSITORY_SEARCH_QUERY, "variables": variables}
+    for attempt in range(max_retries + 1):
+        limiter.acquire(cost)
+        try:
+            response = session.post(url, json=body, timeout=30)
+            limiter.update(response)
+
+            if is_rate_limited(response) or response.status_code >= 500:
+                logger.warning(f"Got HTTP {response.status_code} for the {label} "
+                               f"(attempt {attempt + 1}/{max_retries + 1})")
+                if response.status_code >= 500:
+                    time.sleep(retry_delay(attempt))
+                continue
+
+            response.raise_for_status()
+            payload = response.json()
+            errors = payload.get("errors") or []
+            if any(error.get("type") == "RATE_LIMITED" for error in errors):
+                # The quota headers of the response hold the limiter back until the reset
+                logger.warning(f"Rate limited on the {label} (attempt {attempt + 1}/{max_retries + 1})")
+                continue
+            if payload.get("data") is None:
+                logger.error(f"GraphQL error while fetching the {label}: {errors}")
+                return None
+            if errors:
+                logger.warning(f"Partial GraphQL result for the {label}: {errors}")
+            rate_limit = payload["data"].get("rateLimit")
+            if rate_limit:
+                limiter.settle(cost, rate_limit["cost"], rate_limit["remaining"], rate_limit.get("resetAt"))
+            return payload["data"]
+
+        except requests.exceptions.HTTPError as http_err:
+            logger.error(f"HTTP error occurred while fetching the {label}: {http_err}")
+            return None
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as conn_err:
+            logger.warning(f"Connection error occurred while fetching the {label}: {conn_err}")
+            time.sleep(retry_delay(attempt))
+        except requests.exceptions.RequestException as req_err:
+            logger.error(f"Request exception occurred while fetching the {label}: {req_err}")
+            return None
+
+    logger.error(f"Giving up on the {label} after {max_retries + 1} attempts")
+    return None
+
+
+def iter_graphql_pages(topics, pages=10, per_page=MAX_PER_PAGE, max_workers=8, token=None,
+                       api_url=GITHUB_API_URL, session=None, cache=None, since_last_harvest=False, shard=True,
+                       topics_per_repository=TOPICS_PER_REPOSITORY, max_nodes=GRAPHQL_MAX_NODES, archive=None):
+    """
+    Fetches GraphQL search pages for many topics concurrently and yields them as they complete.
+
+    Works like `iter_search_pages`, with one GraphQL query per page asking for the
+    repository columns and their extras (see `graphql_record`). Pages follow each other
+    by cursor, so the pages of one query are fetched in turn while topics and shards are
+    fetched concurrently. The page size is the largest whose query stays within
+    `max_nodes`, counting every connection of the query. The first queries reserve
+    their estimated points from the rate limiter, and the next ones the cost that
+    GitHub reported for the previous query.
+    Smaller pages are fetched in greater number, up to `pages` x `per_page` repositories.
+
+    Args:
+        topics (list): The topics to search for.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        per_page (int, optional): The number of repositories per page (at most 100). Defaults to 100.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 8.
+        token (str, optional): GitHub API token. Defaults to `GITHUB_API_TOKEN`.
+        api_url (str, optional): Base URL of the API. Defaults to the public GitHub API.
+        session (requests.Session, optional): A session to reuse. Defaults to a new one.
+        cache (ResponseCache, optional): The cache holding the harvest timestamps. Defaults to None.
+        since_last_harvest (bool, optional): Only search repositories pushed since the
+            last harvest recorded in the cache. Defaults to False.
+        shard (bool, optional): Split topics above the search cap into shards. Defaults to True.
+        topics_per_repository (int, optional): The number of topics asked per repository. Defaults to 10.
+        max_nodes (int, optional): The node budget of one query. Defaults to GitHub's limit.
+        archive (ResponseArchive, optional): The archive of raw pages. Defaults to None.
+
+    Yields:
+        tuple: `(topic, shard, page, items)` for every page, where `items` are repository
+        nodes, or None if the page failed.
+    """
+    per_page = min(per_page, MAX_PER_PAGE)
+    first = page_size(per_page, topics_per_repository, max_nodes)
+    nodes, points = query_cost(first, topics_per_repository)
+    pages = math.ceil(min(pages * per_page, SEARCH_RESULT_CAP) / first)
+    url = f"{api_url.rstrip('/')}/graphql"
+    session = session or create_session(token, pool_size=max_workers)
+    limiter = RateLimiter()
+    queries = {topic: search_query(topic, cache, since_last_harvest) for topic in topics}
+    seen = {topic: set() for topic in topics}
+    harvest_id = archive.start(topics, api="graphql") if archive is not None else None
+    # Every query asks for the same page size, so the cost of the last one holds for the next
+    cost = {"points": points}
+    logger.info(f"GraphQL pages of {first} repositories: {nodes} nodes, {points} point(s) per query")
+
+    def fetch(topic, search_shard, page, cursor):
+        variables = {"query": f"{queries[topic]} {search_shard.qualifiers()}".strip(), "first": first,
+                     "after": cursor, "topics": topics_per_repository}
+        data = fetch_graphql_page(session, limiter, url, variables, cost=cost["points"])
+        if data and data.get("rateLimit"):
+            cost["points"] = data["rateLimit"]["cost"]
+        return topic, search_shard, page, data
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(fetch, topic, SearchShard(), 1, None) for topic in topics}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                topic, search_shard, page, data = future.result()
+                label = search_shard.qualifiers()
+                if data is None:
+                    yield topic, label, page, None
+                    continue
+                if archive is not None:
+                    archive.add(harvest_id, topic, label, page, data)
+
+                search = data["search"]
+                next_requests, keep_items = plan_next_requests(topic, search_shard, page,
+                                                               {"total_count": search["repositoryCount"]},
+                                                               pages, first, shard)
+                if not keep_items:
+                    pending.update(executor.submit(fetch, topic, child, 1, None) for child, _ in next_requests)
+                    continue
+                page_info = search["pageInfo"]
+                if page_info["hasNextPage"] and page < pages:
+                    pending.add(executor.submit(fetch, topic, search_shard, page + 1, page_info["endCursor"]))
+
+                items = []
+                for node in search["nodes"]:
+                    if not node:
+                        continue
+                    key = repository_key(node)
+                    if key not in seen[topic]:
+                        seen[topic].add(key)
+                        items.append(node)
+                yield topic, label, page, items
+    if archive is not None:
+        archive.finish(harvest_id)
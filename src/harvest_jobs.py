@@ -0,0 +1,418 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from utils import logger
+
+DEFAULT_JOURNAL_PATH = os.path.join("cache", "harvest_jobs.db")
+
+
+class HarvestJournal:
+    """
+    A persistent record of harvest jobs and of the state of each of their search pages, stored in SQLite.
+
+    A job is one harvest of a set of search queries. Every page of the job is recorded
+    with its topic, shard and page number, a status ('done' or 'failed') and its number
+    of attempts. A failed page is fetched again within the run, after its back-off, until
+    it has failed `max_attempts` times in the run. Done pages keep their payload, so a
+    harvest that is interrupted or ends with failed pages can be run again: it resumes the
+    unfinished job, replays the done pages from the journal without fetching them, and
+    fetches only the pages that failed or were never reached. Each page is committed as
+    soon as it is fetched. A job whose pages are all done is marked complete and its
+    payloads are dropped; the next harvest of the same queries starts a new job. A job
+    that ends with failed pages is marked failed, and resumed by the next harvest.
+
+    Args:
+        path (str, optional): The SQLite file backing the journal. Defaults to `cache/harvest_jobs.db`.
+        max_attempts (int, optional): The failed attempts at a page after which a run gives up on it. Defaults to 3.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, max_attempts=3):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS harvest_jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_harvest_jobs_key ON harvest_jobs (job_key, status);
+            CREATE TABLE IF NOT EXISTS harvest_pages (
+                job_id INTEGER NOT NULL REFERENCES harvest_jobs (job_id),
+                topic TEXT NOT NULL,
+                shard TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                retry_at REAL NOT NULL,
+                payload BLOB,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, topic, shard, page)
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def start(self, queries, per_page):
+        """
+        Returns the unfinished (running or failed) job harvesting these queries, or starts a new one.
+
+        Args:
+            queries (list): The search query of every topic.
+            per_page (int): The number of items per page, which decides what each page holds.
+
+        Returns:
+            tuple: The job id and the time at which the job was started.
+        """
+        job_key = hashlib.sha1(json.dumps([sorted(queries), per_page]).encode()).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, started_at FROM harvest_jobs WHERE job_key = ? AND status IN ('running', 'failed') "
+                "ORDER BY job_id DESC LIMIT 1", (job_key,)).fetchone()
+            if row is not None:
+                done, failed = self._conn.execute(
+                    "SELECT COALESCE(SUM(status = 'done'), 0), COALESCE(SUM(status = 'failed'), 0) "
+                    "FROM harvest_pages WHERE job_id = ?", (row[0],)).fetchone()
+                self._conn.execute("UPDATE harvest_jobs SET status = 'running', finished_at = NULL WHERE job_id = ?",
+                                   (row[0],))
+                self._conn.commit()
+                logger.info(f"Resuming harvest job {row[0]}: {done} page(s) done, {failed} failed")
+                return row
+            started_at = time.time()
+            job_id = self._conn.execute(
+                "INSERT INTO harvest_jobs (job_key, status, started_at) VALUES (?, 'running', ?)",
+                (job_key, started_at)).lastrowid
+            self._conn.commit()
+        logger.info(f"Started harvest job {job_id}")
+        return job_id, started_at
+
+    def lookup(self, job_id, topic, shard, page):
+        """
+        Returns the recorded state of a page.
+
+        Args:
+            job_id (int): The job.
+            topic (str): The topic of the page.
+            shard (str): The qualifiers of the page's shard, '' for the whole topic.
+            page (int): The page number.
+
+        Returns:
+            tuple: The payload of a done page (None otherwise), the number of failed attempts
+            and the time before which a failed page should not be retried.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, retry_at, payload FROM harvest_pages "
+                "WHERE job_id = ? AND topic = ? AND shard = ? AND page = ?", (job_id, topic, shard, page)).fetchone()
+        if row is None:
+            return None, 0, 0.0
+        status, attempts, retry_at, payload = row
+        if status == "done":
+            return json.loads(zlib.decompress(payload)), attempts, 0.0
+        return None, attempts, retry_at
+
+    def page_done(self, job_id, topic, shard, page, payload):
+        """Commits the payload of a fetched page."""
+        body = zlib.compress(json.dumps(payload).encode())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO harvest_pages VALUES (?, ?, ?, ?, 'done', 0, 0, ?, ?) "
+                "ON CONFLICT (job_id, topic, shard, page) DO UPDATE SET "
+                "status = 'done', payload = excluded.payload, updated_at = excluded.updated_at",
+                (job_id, topic, shard, page, body, time.time()))
+            self._conn.commit()
+
+    def page_failed(self, job_id, topic, shard, page, retry_at):
+        """
+        Records a failed attempt at a page.
+
+        Args:
+            job_id (int): The job.
+            topic (str): The topic of the page.
+            shard (str): The qualifiers of the page's shard.
+            page (int): The page number.
+            retry_at (float): The time before which the page should not be retried.
+
+        Returns:
+            int: The number of failed attempts at the page.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO harvest_pages VALUES (?, ?, ?, ?, 'failed', 1, ?, NULL, ?) "
+                "ON CONFLICT (job_id, topic, shard, page) DO UPDATE SET "
+                "status = 'failed', attempts = attempts + 1, retry_at = excluded.retry_at, "
+                "updated_at = excluded.updated_at",
+                (job_id, topic, shard, page, retry_at, time.time()))
+            attempts = self._conn.execute(
+                "SELECT attempts FROM harvest_pages WHERE job_id = ? AND topic = ? AND shard = ? AND page = ?",
+                (job_id, topic, shard, page)).fetchone()[0]
+            self._conn.commit()
+        return attempts
+
+    def finish(self, job_id):
+        """
+        Marks a job complete if none of its pages failed, dropping its page payloads, and failed otherwise.
+
+        Args:
+            job_id (int): The job.
+
+        Returns:
+            int: The number of failed pages, 0 if the job is complete.
+        """
+        with self._lock:
+            failed = self._conn.execute(
+                "SELECT COUNT(*) FROM harvest_pages WHERE job_id = ? AND status = 'failed'", (job_id,)).fetchone()[0]
+            self._conn.execute("UPDATE harvest_jobs SET status = ?, finished_at = ? WHERE job_id = ?",
+                               ("failed" if failed else "complete", time.time(), job_id))
+            if failed == 0:
+                self._conn.execute("DELETE FROM harvest_pages WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+        if failed:
+            logger.warning(f"Harvest job {job_id} has {failed} failed page(s), run the harvest again to retry them")
+        else:
+            logger.info(f"Harvest job {job_id} complete")
+        return failed
+
+
+DEFAULT_QUEUE_PATH = os.path.join("cache", "harvest_queue.db")
+
+
+class HarvestQueue:
+    """
+    A work queue of search page tasks shared by harvest workers in several processes, stored in SQLite.
+
+    Each task is one page of a topic's query or of one of its shards. A worker claims a
+    task with a lease that expires after `lease_seconds`, renews it with `heartbeat`
+    while it fetches, and completes it together with the tasks that follow from the page
+    (the next pages, or the shards of a query above the search cap). A task whose lease
+    expires, because its worker died or stalled, is claimed again by another worker. A
+    failed task is queued again after a back-off, and given up after `max_attempts`.
+    Tasks are unique per query, shard and page, so a task completed twice (after a lost
+    lease) never queues its follow-ups twice.
+
+    Every claim and completion is one `BEGIN IMMEDIATE` transaction, so any number of
+    processes can share the queue file, on one host or on a file system with working
+    SQLite locks.
+
+    Tasks queued while no task is queued or leased start a new harvest: the settled tasks
+    of the previous one are cleared and `started_at` is reset.
+
+    Args:
+        path (str, optional): The SQLite file backing the queue. Defaults to `cache/harvest_queue.db`.
+        lease_seconds (float, optional): How long a claimed task is reserved for its worker. Defaults to 60.
+        max_attempts (int, optional): The number of failed attempts after which a task is given up. Defaults to 5.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease_seconds=60.0, max_attempts=5):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS harvest_tasks (
+                task_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                query TEXT NOT NULL,
+                shard TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                worker TEXT,
+                lease_expires REAL NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                retry_at REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                UNIQUE (query, shard, page)
+            );
+            CREATE INDEX IF NOT EXISTS idx_harvest_tasks_status ON harvest_tasks (status, retry_at);
+            CREATE TABLE IF NOT EXISTS harvest_queue_state (
+                name TEXT PRIMARY KEY,
+                value
+            );
+        """)
+        self._conn.execute("INSERT OR IGNORE INTO harvest_queue_state VALUES ('started_at', ?)", (time.time(),))
+
+    @property
+    def started_at(self):
+        """The time the current harvest was first queued, the last day of the creation windows of its shards."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT value FROM harvest_queue_state WHERE name = 'started_at'").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _transaction(self, statements):
+        """Runs `statements(conn)` in one write transaction and returns its result."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self._conn)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def enqueue(self, tasks):
+        """
+        Adds tasks to the queue, skipping those already in it.
+
+        Into an empty or drained queue, the tasks start a new harvest (see `HarvestQueue`).
+
+        Args:
+            tasks (iterable): `(topic, query, shard, page)` tuples.
+
+        Returns:
+            int: The number of tasks added.
+        """
+        now = time.time()
+        rows = [(topic, query, shard, page, now) for topic, query, shard, page in tasks]
+
+        def enqueue_tasks(conn):
+            open_tasks = conn.execute(
+                "SELECT COUNT(*) FROM harvest_tasks WHERE status IN ('queued', 'leased')").fetchone()[0]
+            if rows and not open_tasks:
+                # Otherwise the pages harvested last time would be skipped, and shards planned from its start day
+                conn.execute("DELETE FROM harvest_tasks")
+                conn.execute("REPLACE INTO harvest_queue_state VALUES ('started_at', ?)", (now,))
+            added = conn.executemany("INSERT OR IGNORE INTO harvest_tasks (topic, query, shard, page, status, "
+                                     "updated_at) VALUES (?, ?, ?, ?, 'queued', ?)", rows).rowcount
+            if added:
+                # New work means the store has to be finalized again once it is done
+                conn.execute("DELETE FROM harvest_queue_state WHERE name = 'finalized_at'")
+            return added
+
+        return self._transaction(enqueue_tasks)
+
+    def claim(self, worker):
+        """
+        Leases the next available task to a worker.
+
+        First pages are handed out first, so that the shards and pages they lead to are
+        queued as early as possible.
+
+        Args:
+            worker (str): The name of the claiming worker.
+
+        Returns:
+            tuple: `(task_id, topic, query, shard, page, attempts)`, or None if no task is available.
+        """
+        def claim_next(conn):
+            now = time.time()
+            task = conn.execute(
+                "SELECT task_id, topic, query, shard, page, attempts FROM harvest_tasks "
+                "WHERE (status = 'queued' AND retry_at <= ?) OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY page, task_id LIMIT 1", (now, now)).fetchone()
+            if task is not None:
+                conn.execute("UPDATE harvest_tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                             "updated_at = ? WHERE task_id = ?", (worker, now + self.lease_seconds, now, task[0]))
+            return task
+
+        return self._transaction(claim_next)
+
+    def heartbeat(self, worker, task_ids):
+        """
+        Renews the leases a worker holds on tasks.
+
+        Args:
+            worker (str): The worker.
+            task_ids (list): The tasks it is working on.
+
+        Returns:
+            int: The number of leases renewed; a lease taken over by another worker is not.
+        """
+        if not task_ids:
+            return 0
+        now = time.time()
+        rows = [(now + self.lease_seconds, now, task_id, worker) for task_id in task_ids]
+        return self._transaction(lambda conn: conn.executemany(
+            "UPDATE harvest_tasks SET lease_expires = ?, updated_at = ? "
+            "WHERE task_id = ? AND worker = ? AND status = 'leased'", rows).rowcount)
+
+    def complete(self, task_id, worker, follow_ups=()):
+        """
+        Marks a task done and queues the tasks that follow from it, in one transaction.
+
+        Args:
+            task_id (int): The task.
+            worker (str): The worker that fetched it.
+            follow_ups (iterable, optional): `(topic, query, shard, page)` tuples to queue. Defaults to none.
+
+        Returns:
+            bool: Whether the worker still held the lease; if not, another worker has the task.
+        """
+        now = time.time()
+        rows = [(topic, query, shard, page, now) for topic, query, shard, page in follow_ups]
+
+        def complete_task(conn):
+            held = conn.execute("UPDATE harvest_tasks SET status = 'done', updated_at = ? "
+                                "WHERE task_id = ? AND worker = ? AND status = 'leased'",
+                                (now, task_id, worker)).rowcount
+            conn.executemany("INSERT OR IGNORE INTO harvest_tasks (topic, query, shard, page, status, updated_at) "
+                             "VALUES (?, ?, ?, ?, 'queued', ?)", rows)
+            return held == 1
+
+        return self._transaction(complete_task)
+
+    def fail(self, task_id, worker, retry_at):
+        """
+        Records a failed attempt at a task, queueing it again until `max_attempts` is reached.
+
+        Args:
+            task_id (int): The task.
+            worker (str): The worker that attempted it.
+            retry_at (float): The time before which the task should not be claimed again.
+        """
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE harvest_tasks SET attempts = attempts + 1, retry_at = ?, updated_at = ?, "
+            "status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END "
+            "WHERE task_id = ? AND worker = ? AND status = 'leased'",
+            (retry_at, time.time(), self.max_attempts, task_id, worker)))
+
+    def claim_finalization(self):
+        """
+        Returns True to exactly one caller once all tasks are settled, to finalize the shared store.
+
+        Returns:
+            bool: Whether the caller should finalize; False while tasks are queued or leased, or
+            when another worker already finalized.
+        """
+        def claim(conn):
+            open_tasks = conn.execute(
+                "SELECT COUNT(*) FROM harvest_tasks WHERE status IN ('queued', 'leased')").fetchone()[0]
+            if open_tasks:
+                return False
+            return conn.execute("INSERT OR IGNORE INTO harvest_queue_state VALUES ('finalized_at', ?)",
+                                (time.time(),)).rowcount == 1
+
+        return self._transaction(claim)
+
+    def counts(self):
+        """
+        Returns the number of tasks per status.
+
+        Returns:
+            dict: Task counts for 'queued', 'leased', 'done' and 'failed'.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM harvest_tasks GROUP BY status").fetchall()
+        return {"queued": 0, "leased": 0, "done": 0, "failed": 0, **dict(rows)}
@@ -0,0 +1,175 @@
+import os
+import sqlite3
+import threading
+import time
+from utils import logger
+
+DEFAULT_CACHE_PATH = os.path.join("cache", "http_cache.db")
+
+
+class ResponseCache:
+    """
+    A persistent HTTP response cache for the GitHub harvester, stored in SQLite.
+
+    Entries are keyed by the full request URL and keep the `ETag` and
+    `Last-Modified` validators so that pages can be revalidated with conditional
+    requests; a `304 Not Modified` reply is then served from disk and does not
+    count against the search quota. Entries older than `ttl` seconds are
+    evicted, and least recently used entries are dropped once the stored bodies
+    exceed `max_bytes`.
+
+    `hits` counts the pages served from disk after a `304`, and `misses` the lookups
+    that found no usable entry.
+
+    The cache also remembers when each topic was last harvested, which the
+    harvester uses for its "since last harvest" mode.
+
+    Args:
+        path (str, optional): The SQLite file backing the cache. Defaults to `cache/http_cache.db`.
+        ttl (float, optional): Maximum age of an entry in seconds. Defaults to 7 days.
+        max_bytes (int, optional): Maximum total size of the stored bodies. Defaults to 256 MB.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=7 * 24 * 3600, max_bytes=256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS http_responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_http_responses_accessed_at ON http_responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS harvest_state (
+                topic TEXT PRIMARY KEY,
+                last_harvested_at TEXT NOT NULL
+            );
+        """)
+        self.evict()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def lookup(self, url):
+        """
+        Returns the cached `(etag, last_modified, body)` for a URL, or None.
+
+        Args:
+            url (str): The full request URL.
+
+        Returns:
+            tuple: The validators and body of the cached response, or None if not cached.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, stored_at FROM http_responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if time.time() - row[3] > self.ttl:
+                self._conn.execute("DELETE FROM http_responses WHERE url = ?", (url,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            return row[0], row[1], row[2]
+
+    def conditional_headers(self, url):
+        """Returns the `If-None-Match`/`If-Modified-Since` headers for a cached URL."""
+        entry = self.lookup(url)
+        headers = {}
+        if entry is not None:
+            etag, last_modified, _ = entry
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def store(self, url, response):
+        """
+        Stores a fully downloaded response if it carries a validator.
+
+        Args:
+            url (str): The full request URL.
+            response (requests.Response): The response to store.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, len(body), now, now),
+            )
+            self._conn.commit()
+        self.evict()
+
+    def revalidated(self, url):
+        """
+        Returns the cached body for a URL after a `304 Not Modified` reply.
+
+        Args:
+            url (str): The full request URL.
+
+        Returns:
+            bytes: The cached response body, or None if the entry disappeared.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM http_responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE http_responses SET stored_at = ?, accessed_at = ? WHERE url = ?",
+                               (now, now, url))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def evict(self):
+        """Drops expired entries, then least recently used ones until the size limit holds."""
+        with self._lock:
+            expired = self._conn.execute("DELETE FROM http_responses WHERE stored_at < ?",
+                                         (time.time() - self.ttl,)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_responses").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for url, size in self._conn.execute(
+                        "SELECT url, size FROM http_responses ORDER BY accessed_at").fetchall():
+                    self._conn.execute("DELETE FROM http_responses WHERE url = ?", (url,))
+                    total -= size
+                    evicted += 1
+                    if total <= self.max_bytes:
+                        break
+            self._conn.commit()
+        if expired or evicted:
+            logger.info(f"Evicted {expired} expired and {evicted} least recently used cached response(s)")
+
+    def last_harvested_at(self, topic):
+        """Returns the ISO timestamp of the last completed harvest of a topic, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT last_harvested_at FROM harvest_state WHERE topic = ?",
+                                     (topic,)).fetchone()
+        return row[0] if row else None
+
+    def mark_harvested(self, topic, harvested_at):
+        """Records the ISO timestamp at which a harvest of a topic started."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO harvest_state VALUES (?, ?)", (topic, harvested_at))
+            self._conn.commit()
@@ -0,0 +1,264 @@
+import datetime
+import os
+import numpy as np
+import pandas as pd
+from analysis_engine import ANALYSIS_COLUMNS
+from data_preprocessing import CSV_DTYPES
+from push_to_sqlite import KEY_COLUMNS, TOPIC_SEPARATOR, TOPICS_COLUMN
+from utils import logger
+
+DEFAULT_STORE_DIR = os.path.join("data", "parquet")
+# Files starting with '_' are skipped by the dataset discovery, so the snapshot lives next to the partitions
+SNAPSHOT_NAME = "_repositories.arrow"
+PARTITION_COLUMNS = ("Topic", "Harvest_Date")
+# Rows without a Topics value (e.g. a cleaned_data.csv built without topics) are stored under this topic
+UNKNOWN_TOPIC = "all"
+# Row groups are the unit of predicate pushdown, large enough to keep their metadata and decoding overhead low
+ROWS_PER_GROUP = 128 * 1024
+
+
+def _arrow():
+    """Imports pyarrow, which is only needed by the Parquet store."""
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError("The Parquet store requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def repository_schema():
+    """
+    Returns the Arrow schema of the stored repositories.
+
+    Languages and licenses are dictionary encoded, counters are int32 and the dates are
+    stored both as text and as epoch seconds. Owners have too many distinct values for an
+    Arrow dictionary per batch; Parquet dictionary-encodes their pages anyway.
+
+    Returns:
+        pyarrow.Schema: The schema, partition columns included.
+    """
+    pa = _arrow()
+    categorical = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("Repository_Name", pa.string()),
+        ("Owner", pa.string()),
+        ("Description", pa.string()),
+        ("URL", pa.string()),
+        ("Programming_Language", categorical),
+        ("Creation_Date", pa.string()),
+        ("Last_Updated_Date", pa.string()),
+        ("Number_of_Stars", pa.int32()),
+        ("Number_of_Forks", pa.int32()),
+        ("Number_of_Open_Issues", pa.int32()),
+        ("License_Type", categorical),
+        ("Creation_Epoch", pa.int64()),
+        ("Last_Updated_Epoch", pa.int64()),
+        ("Creation_Year", pa.int16()),
+        ("Topic", pa.string()),
+        ("Harvest_Date", pa.string()),
+    ])
+
+
+def topic_batches(input_csv, harvest_date, chunksize=250000):
+    """
+    Reads a preprocessed CSV in chunks and yields Arrow record batches with one row per (repository, topic).
+
+    Args:
+        input_csv (str): The path to the preprocessed CSV file (see `preprocess_github_data`).
+        harvest_date (str): The harvest date partition value, as 'YYYY-MM-DD'.
+        chunksize (int, optional): The number of rows read at a time. Defaults to 250000.
+
+    Yields:
+        pyarrow.RecordBatch: The rows of a chunk.
+    """
+    pa = _arrow()
+    schema = repository_schema()
+    for chunk in pd.read_csv(input_csv, dtype=CSV_DTYPES, chunksize=chunksize):
+        if TOPICS_COLUMN in chunk.columns:
+            chunk["Topic"] = chunk.pop(TOPICS_COLUMN).fillna(UNKNOWN_TOPIC).str.split(TOPIC_SEPARATOR)
+            chunk = chunk.explode("Topic", ignore_index=True)
+        else:
+            chunk["Topic"] = UNKNOWN_TOPIC
+        chunk["Harvest_Date"] = harvest_date
+        chunk["Owner"] = chunk["Owner"].astype("str")
+        chunk = chunk.reindex(columns=schema.names)
+        yield from pa.Table.from_pandas(chunk, schema=schema, preserve_index=False).to_batches()
+
+
+def write_parquet_store(input_csv, store_dir=DEFAULT_STORE_DIR, harvest_date=None, chunksize=250000):
+    """
+    Writes a preprocessed CSV into the Parquet store, partitioned by topic and harvest date.
+
+    The partitions are laid out as `Topic=<topic>/Harvest_Date=<date>/`. Partitions of the
+    same topics and date that already exist are replaced, so writing a harvest twice is idempotent.
+    The store's snapshot no longer matches the partitions and is deleted (see `write_snapshot`).
+
+    Args:
+        input_csv (str): The path to the preprocessed CSV file.
+        store_dir (str, optional): The root directory of the store. Defaults to 'data/parquet'.
+        harvest_date (str, optional): The harvest date as 'YYYY-MM-DD'. Defaults to today.
+        chunksize (int, optional): The number of rows read at a time. Defaults to 250000.
+
+    Returns:
+        None
+    """
+    try:
+        pa = _arrow()
+        harvest_date = harvest_date or datetime.date.today().isoformat()
+        logger.info(f"Writing {input_csv} to the Parquet store {store_dir} (harvest {harvest_date})...")
+        schema = repository_schema()
+        pa.dataset.write_dataset(
+            topic_batches(input_csv, harvest_date, chunksize), store_dir, schema=schema, format="parquet",
+            partitioning=pa.dataset.partitioning(
+                pa.schema([schema.field(name) for name in PARTITION_COLUMNS]), flavor="hive"),
+            existing_data_behavior="delete_matching",
+            min_rows_per_group=ROWS_PER_GROUP, max_rows_per_group=ROWS_PER_GROUP,
+        )
+        snapshot = os.path.join(store_dir, SNAPSHOT_NAME)
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+            logger.info(f"Removed the outdated snapshot {snapshot}")
+        logger.info(f"Parquet store {store_dir} written successfully.")
+    except FileNotFoundError as fnf_error:
+        logger.error(f"File not found error: {fnf_error}")
+    except Exception as e:
+        logger.error(f"An unexpected error occurred while writing the Parquet store: {e}")
+
+
+def open_store(store_dir=DEFAULT_STORE_DIR):
+    """
+    Opens the Parquet store as an Arrow dataset.
+
+    Args:
+        store_dir (str, optional): The root directory of the store. Defaults to 'data/parquet'.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset, with `Topic` and `Harvest_Date` as partition fields.
+    """
+    pa = _arrow()
+    schema = repository_schema()
+    return pa.dataset.dataset(store_dir, schema=schema, format="parquet", partitioning="hive")
+
+
+def read_repositories(store_dir=DEFAULT_STORE_DIR, columns=None, topics=None, since=None, filter=None,
+                      latest_only=True):
+    """
+    Reads repositories from the Parquet store with column projection and predicate pushdown.
+
+    Only the requested columns are decoded. Topic and date filters prune whole partitions,
+    and any other `filter` is checked against the row group statistics before rows are read.
+
+    Args:
+        store_dir (str, optional): The root directory of the store. Defaults to 'data/parquet'.
+        columns (list, optional): The columns to read. Defaults to all columns.
+        topics (list, optional): Only read these topics. Defaults to all topics.
+        since (str, optional): Only read harvests on or after this 'YYYY-MM-DD' date. Defaults to all harvests.
+        filter (pyarrow.compute.Expression, optional): An additional row filter. Defaults to None.
+        latest_only (bool, optional): Keep one row per repository, from its latest harvest. Defaults to True.
+
+    Returns:
+        pyarrow.Table: The matching rows.
+    """
+    pa = _arrow()
+    field = pa.dataset.field
+    expression = None
+    for condition in (
+        field("Topic").isin(topics) if topics else None,
+        field("Harvest_Date") >= since if since else None,
+        filter,
+    ):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+
+    wanted = list(columns) if columns else repository_schema().names
+    projected = list(dict.fromkeys(wanted + (list(KEY_COLUMNS) + ["Harvest_Date"] if latest_only else [])))
+    table = open_store(store_dir).to_table(columns=projected, filter=expression)
+    if latest_only and table.num_rows:
+        # A repository found under several topics or harvests is kept once, from its latest harvest
+        keys = table.select(list(KEY_COLUMNS) + ["Harvest_Date"])
+        keys = keys.append_column("row", pa.array(np.arange(keys.num_rows, dtype=np.int64)))
+        keys = keys.take(pa.compute.sort_indices(keys, [("Harvest_Date", "ascending"), ("row", "ascending")]))
+        latest = keys.group_by(list(KEY_COLUMNS), use_threads=False).aggregate([("row", "last")])
+        rows = latest["row_last"]
+        table = table.take(rows.take(pa.compute.array_sort_indices(rows)))
+    return table.select(wanted)
+
+
+def write_snapshot(store_dir=DEFAULT_STORE_DIR, path=None):
+    """
+    Writes the latest row of every repository as an uncompressed Arrow IPC file that can be memory-mapped.
+
+    Args:
+        store_dir (str, optional): The root directory of the store. Defaults to 'data/parquet'.
+        path (str, optional): The snapshot file. Defaults to `_repositories.arrow` in the store.
+
+    Returns:
+        str: The path of the snapshot file.
+    """
+    pa = _arrow()
+    path = path or os.path.join(store_dir, SNAPSHOT_NAME)
+    table = read_repositories(store_dir, columns=ANALYSIS_COLUMNS)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    logger.info(f"Snapshot of {table.num_rows} repositories written to {path}")
+    return path
+
+
+def read_snapshot(path):
+    """
+    Memory-maps an Arrow IPC snapshot. The returned table references the mapped pages without copying them.
+
+    Args:
+        path (str): The snapshot file written by `write_snapshot`.
+
+    Returns:
+        pyarrow.Table: The snapshot.
+    """
+    pa = _arrow()
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _newest_partition_time(store_dir):
+    """Returns the modification time of the most recently written Parquet file of the store, or 0."""
+    return max((os.path.getmtime(os.path.join(directory, name))
+                for directory, _, files in os.walk(store_dir) for name in files if name.endswith(".parquet")),
+               default=0)
+
+
+def load_repository_table(store_dir=DEFAULT_STORE_DIR):
+    """
+    Loads the analysed columns from the store's snapshot if it is current, or from the Parquet partitions.
+
+    A snapshot older than the newest partition file is ignored, as partitions written
+    after it (e.g. by another process) would be missing from it. The snapshot is
+    memory-mapped, so the table references the mapped pages without copying them.
+
+    Args:
+        store_dir (str, optional): The root directory of the store. Defaults to 'data/parquet'.
+
+    Returns:
+        pyarrow.Table: One row per repository, with the `ANALYSIS_COLUMNS`.
+    """
+    snapshot = os.path.join(store_dir, SNAPSHOT_NAME)
+    if os.path.exists(snapshot) and os.path.getmtime(snapshot) >= _newest_partition_time(store_dir):
+        return read_snapshot(snapshot)
+    return read_repositories(store_dir, columns=ANALYSIS_COLUMNS)
+
+
+def load_repositories(store_dir=DEFAULT_STORE_DIR):
+    """
+    Loads the analysed columns of the store (see `load_repository_table`) as a DataFrame.
+
+    Dictionary columns become categoricals and, with pyarrow installed, text columns stay
+    Arrow-backed, so the frame shares the memory-mapped buffers where pandas allows it.
+
+    Args:
+        store_dir (str, optional): The root directory of the store. Defaults to 'data/parquet'.
+
+    Returns:
+        pd.DataFrame: One row per repository, shaped like `analysis_engine.load_repositories`.
+    """
+    return load_repository_table(store_dir).to_pandas()
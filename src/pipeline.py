@@ -0,0 +1,370 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from fetch_github_data import (iter_search_pages, repository_record, GITHUB_API_URL, MAX_PER_PAGE, RateLimiter,
+                               SearchShard, create_session, fetch_search_page, plan_next_requests, retry_delay)
+from fetch_github_graphql import graphql_record, iter_graphql_pages
+from data_preprocessing import clean_records, fill_missing_with_mode
+from push_to_sqlite import (connect_for_load, create_repositories_table, create_rollups, create_topics_table,
+                            load_batches, upsert_page, COLUMN_NAMES, TOPICS_COLUMN)
+from response_archive import read_object
+from utils import logger
+
+
+def harvest_records(topics, pages=10, max_workers=8, token=None, api_url=GITHUB_API_URL, cache=None,
+                    since_last_harvest=False, shard=True, journal=None, graphql=False, archive=None):
+    """
+    Streams repository records from the GitHub search API as pages arrive.
+
+    Once every page is streamed, the start of the harvest is recorded in the cache for
+    each topic none of whose pages failed, which the "since last harvest" mode of the
+    next harvest starts from.
+
+    Args:
+        topics (dict): Search query per topic name.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 8.
+        token (str, optional): GitHub API token. Defaults to `GITHUB_API_TOKEN`.
+        api_url (str, optional): Base URL of the API. Defaults to the public GitHub API.
+        cache (ResponseCache, optional): Cache for conditional requests. Defaults to None.
+        since_last_harvest (bool, optional): Only fetch repositories pushed since the last harvest.
+        shard (bool, optional): Split topics above the search cap into shards. Defaults to True.
+        journal (HarvestJournal, optional): Run the harvest as a resumable job recorded in this
+            journal. Defaults to None.
+        graphql (bool, optional): Harvest through the GraphQL API. Defaults to False.
+        archive (ResponseArchive, optional): Archive the raw pages of the harvest. Defaults to None.
+
+    Yields:
+        dict: One repository record per search result, tagged with its topic name.
+    """
+    names = {query: name for name, query in topics.items()}
+    harvest_started_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    failed_topics = set()
+    if graphql:
+        if journal is not None:
+            raise ValueError("GraphQL harvests cannot be recorded in a harvest journal")
+        search_pages = iter_graphql_pages(list(topics.values()), pages=pages, max_workers=max_workers, token=token,
+                                          api_url=api_url, cache=cache, since_last_harvest=since_last_harvest,
+                                          shard=shard, archive=archive)
+        repository_to_record = graphql_record
+    else:
+        search_pages = iter_search_pages(list(topics.values()), pages=pages, max_workers=max_workers, token=token,
+                                         api_url=api_url, cache=cache, since_last_harvest=since_last_harvest,
+                                         shard=shard, journal=journal, archive=archive)
+        repository_to_record = repository_record
+    for query, search_shard, page, items in search_pages:
+        if items is None:
+            failed_topics.add(query)
+            continue
+        logger.info(f"Streaming {len(items)} repositories from page {page} of '{names[query]}' {search_shard}")
+        for repo in items:
+            record = repository_to_record(repo)
+            record[TOPICS_COLUMN] = names[query]
+            yield record
+    if cache is not None:
+        for query in topics.values():
+            if query not in failed_topics:
+                cache.mark_harvested(query, harvest_started_at)
+
+
+def batched(iterable, size):
+    """
+    Groups an iterable into lists of at most `size` items.
+
+    Args:
+        iterable (iterable): The items to group.
+        size (int): The maximum batch size.
+
+    Yields:
+        list: The next batch of items.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def load_records(records, sqlite_db, table_name, batch_size=5000, per_topic_modes=False):
+    """
+    Upserts a stream of cleaned records into SQLite in bounded batches.
+
+    Only one batch is held in memory at a time and all batches are written in one
+    transaction. The `Topics` value of each record is recorded in `repository_topics`.
+    Before it commits, the missing languages and licenses are filled with their most
+    common values.
+
+    Args:
+        records (iterable): Cleaned repository records.
+        sqlite_db (str): The path to the SQLite database file.
+        table_name (str): The name of the repositories table.
+        batch_size (int, optional): The number of rows per `executemany` call. Defaults to 5000.
+        per_topic_modes (bool, optional): Fill with the most common values of each topic first. Defaults to False.
+
+    Returns:
+        dict: The load statistics (see `load_batches`).
+    """
+    rows = (tuple(record[name] for name in COLUMN_NAMES) + (record.get(TOPICS_COLUMN),) for record in records)
+    conn = connect_for_load(sqlite_db)
+    try:
+        return load_batches(conn, table_name, batched(rows, batch_size),
+                            finalize=lambda conn: fill_missing_with_mode(conn, table_name, per_topic=per_topic_modes))
+    finally:
+        conn.close()
+
+
+def run_pipeline(topics, sqlite_db, table_name, batch_size=5000, pages=10, max_workers=8, token=None,
+                 api_url=GITHUB_API_URL, cache=None, since_last_harvest=False, per_topic_modes=False, shard=True,
+                 journal=None, graphql=False, archive=None):
+    """
+    Runs fetch -> normalize -> clean -> upsert as one streaming pipeline, without intermediate CSV files.
+
+    Args:
+        topics (dict): Search query per topic name.
+        sqlite_db (str): The path to the SQLite database file.
+        table_name (str): The name of the repositories table.
+        batch_size (int, optional): The number of rows per upsert batch. Defaults to 5000.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        max_workers (int, optional): The number of concurrent requests. Defaults to 8.
+        token (str, optional): GitHub API token. Defaults to `GITHUB_API_TOKEN`.
+        api_url (str, optional): Base URL of the API. Defaults to the public GitHub API.
+        cache (ResponseCache, optional): Cache for conditional requests. Defaults to None.
+        since_last_harvest (bool, optional): Only fetch repositories pushed since the last harvest.
+        per_topic_modes (bool, optional): Fill with the most common values of each topic first. Defaults to False.
+        shard (bool, optional): Split topics above the search cap into shards. Defaults to True.
+        journal (HarvestJournal, optional): Run the harvest as a resumable job recorded in this
+            journal. Defaults to None.
+        graphql (bool, optional): Harvest through the GraphQL API; the extra columns of its
+            records are not stored. Defaults to False.
+        archive (ResponseArchive, optional): Archive the raw pages of the harvest. Defaults to None.
+
+    Returns:
+        dict: The load statistics (see `load_batches`).
+    """
+    records = harvest_records(topics, pages=pages, max_workers=max_workers, token=token, api_url=api_url,
+                              cache=cache, since_last_harvest=since_last_harvest, shard=shard,
+                              journal=journal, graphql=graphql, archive=archive)
+    return load_records(clean_records(records), sqlite_db, table_name, batch_size=batch_size,
+                        per_topic_modes=per_topic_modes)
+
+
+def enqueue_topics(queue, topics):
+    """
+    Queues the first search page of every topic for the harvest workers.
+
+    Args:
+        queue (HarvestQueue): The shared work queue.
+        topics (dict): Search query per topic name.
+
+    Returns:
+        int: The number of tasks added; topics already queued are skipped.
+    """
+    added = queue.enqueue((name, query, "", 1) for name, query in topics.items())
+    logger.info(f"Queued {added} of {len(topics)} topic(s) for harvesting")
+    return added
+
+
+def run_harvest_worker(queue, sqlite_db, table_name, worker=None, threads=4, token=None, api_url=GITHUB_API_URL,
+                       pages=10, per_page=MAX_PER_PAGE, shard=True, per_topic_modes=False, poll_interval=1.0):
+    """
+    Harvests pages from a shared work queue into a shared SQLite database until the queue is drained.
+
+    Any number of workers, in as many processes or on as many machines, can run against
+    the same queue, each with its own token and so its own rate-limit budget. Every thread
+    claims a page task, fetches it, upserts its repositories with their topic and then
+    completes the task, queueing the pages or shards that follow. A heartbeat thread
+    renews the leases of the tasks in flight. Stored pages are upserted, so a page stored
+    again after a lost lease changes nothing. The worker that sees the queue drained first
+    builds the indexes and fills the missing languages and licenses.
+
+    Args:
+        queue (HarvestQueue): The shared work queue.
+        sqlite_db (str): The path to the shared SQLite database file.
+        table_name (str): The name of the repositories table.
+        worker (str, optional): The name of the worker. Defaults to the host name and process id.
+        threads (int, optional): The number of tasks fetched concurrently. Defaults to 4.
+        token (str, optional): GitHub API token of this worker. Defaults to `GITHUB_API_TOKEN`.
+        api_url (str, optional): Base URL of the API. Defaults to the public GitHub API.
+        pages (int, optional): The maximum number of pages per topic or shard. Defaults to 10.
+        per_page (int, optional): The number of items per page (at most 100). Defaults to 100.
+        shard (bool, optional): Split topics above the search cap into shards. Defaults to True.
+        per_topic_modes (bool, optional): Fill with the most common values of each topic first. Defaults to False.
+        poll_interval (float, optional): Seconds to wait when no task is available yet. Defaults to 1.0.
+
+    Returns:
+        dict: The number of pages fetched, pages failed and repositories stored by this worker.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    per_page = min(per_page, MAX_PER_PAGE)
+    url = f"{api_url.rstrip('/')}/search/repositories"
+    session = create_session(token, pool_size=threads)
+    limiter = RateLimiter()
+    today = datetime.fromtimestamp(queue.started_at, timezone.utc).date()
+    stats = {"pages": 0, "failed": 0, "repositories": 0}
+    in_flight, lock, stopped = set(), threading.Lock(), threading.Event()
+
+    conn = connect_for_load(sqlite_db, timeout=60)
+    try:
+        create_repositories_table(conn, table_name)
+        # Workers starting together must not both create the rollup tables
+        conn.execute("BEGIN IMMEDIATE")
+        create_topics_table(conn)
+        create_rollups(conn, table_name)
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    def heartbeat():
+        while not stopped.wait(queue.lease_seconds / 3):
+            with lock:
+                task_ids = list(in_flight)
+            queue.heartbeat(worker, task_ids)
+
+    def work():
+        conn = connect_for_load(sqlite_db, timeout=60)
+        try:
+            while True:
+                task = queue.claim(worker)
+                if task is None:
+                    counts = queue.counts()
+                    if counts["queued"] == 0 and counts["leased"] == 0:
+                        return
+                    time.sleep(poll_interval)
+                    continue
+                task_id, topic, query, label, page, attempts = task
+                with lock:
+                    in_flight.add(task_id)
+                try:
+                    params = {"q": f"{query} {label}".strip(), "per_page": per_page, "page": page}
+                    payload = fetch_search_page(session, limiter, url, params)
+                    if payload is None:
+                        queue.fail(task_id, worker, time.time() + retry_delay(attempts))
+                        with lock:
+                            stats["failed"] += 1
+                        continue
+                    next_requests, keep_items = plan_next_requests(
+                        topic, SearchShard.from_qualifiers(label), page, payload, pages, per_page, shard, today)
+                    records = [repository_record(repo) for repo in payload.get("items", [])] if keep_items else []
+                    for record in records:
+                        record[TOPICS_COLUMN] = topic
+                    rows = [tuple(record[name] for name in COLUMN_NAMES) + (record[TOPICS_COLUMN],)
+                            for record in clean_records(records)]
+                    if rows:
+                        upsert_page(conn, table_name, rows)
+                    if not queue.complete(task_id, worker, [(topic, query, next_shard.qualifiers(), next_page)
+                                                            for next_shard, next_page in next_requests]):
+                        logger.warning(f"Worker {worker} lost its lease on page {page} of '{topic}' {label}")
+                    with lock:
+                        stats["pages"] += 1
+                        stats["repositories"] += len(rows)
+                finally:
+                    with lock:
+                        in_flight.discard(task_id)
+        finally:
+            conn.close()
+
+    logger.info(f"Harvest worker {worker} started with {threads} thread(s)")
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+    workers = [threading.Thread(target=work, name=f"harvest-{index}") for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stopped.set()
+
+    if queue.claim_finalization():
+        conn = connect_for_load(sqlite_db, timeout=60)
+        try:
+            load_batches(conn, table_name, [],
+                         finalize=lambda conn: fill_missing_with_mode(conn, table_name, per_topic=per_topic_modes))
+        finally:
+            conn.close()
+    logger.info(f"Harvest worker {worker} done: {stats['pages']} page(s) fetched, {stats['failed']} failed, "
+                f"{stats['repositories']} repositories stored")
+    return stats
+
+
+def archived_page_rows(path, api, topic):
+    """
+    Decompresses and parses one archived page into cleaned rows.
+
+    Args:
+        path (str): The path of the archived object.
+        api (str): 'rest' or 'graphql', the API the page came from.
+        topic (str): The topic name the rows are recorded under.
+
+    Returns:
+        list: Row tuples in `COLUMN_NAMES` order followed by the topic.
+    """
+    payload = json.loads(read_object(path))
+    if api == "graphql":
+        repositories, repository_to_record = payload["search"]["nodes"], graphql_record
+    else:
+        repositories, repository_to_record = payload.get("items", []), repository_record
+    records = []
+    for repo in repositories:
+        if repo:
+            record = repository_to_record(repo)
+            record[TOPICS_COLUMN] = topic
+            records.append(record)
+    return [tuple(record[name] for name in COLUMN_NAMES) + (record[TOPICS_COLUMN],)
+            for record in clean_records(records)]
+
+
+def replay_archive(archive, sqlite_db, table_name, harvest_ids=None, topics=None, workers=None, batch_size=5000,
+                   per_topic_modes=False):
+    """
+    Rebuilds the repositories table from archived harvests, without the API.
+
+    The pages are decompressed, parsed, mapped and cleaned in worker processes with the
+    current field mapping and cleaning rules, and stream into one load transaction in
+    harvest order, with a bounded number of pages in flight, so that the latest
+    harvest's values win. Replaying into a new database file rebuilds it from scratch.
+
+    Args:
+        archive (ResponseArchive): The archive of raw pages.
+        sqlite_db (str): The path to the SQLite database file.
+        table_name (str): The name of the repositories table.
+        harvest_ids (list, optional): The harvests to replay. Defaults to all archived harvests.
+        topics (dict, optional): Search query per topic name, to record the pages under their
+            topic names. Defaults to recording them under their queries.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        batch_size (int, optional): The number of rows per upsert batch. Defaults to 5000.
+        per_topic_modes (bool, optional): Fill with the most common values of each topic first. Defaults to False.
+
+    Returns:
+        dict: The load statistics (see `load_batches`).
+    """
+    names = {query: name for name, query in (topics or {}).items()}
+    pages = [(path, api, names.get(topic, topic)) for _, api, topic, _, _, path in archive.pages(harvest_ids)]
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Replaying {len(pages)} archived page(s) with {workers} worker process(es)")
+
+    def rows():
+        if workers == 1:
+            for page in pages:
+                yield from archived_page_rows(*page)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for page in pages:
+                in_flight.append(executor.submit(archived_page_rows, *page))
+                if len(in_flight) >= 4 * workers:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+    conn = connect_for_load(sqlite_db)
+    try:
+        return load_batches(conn, table_name, batched(rows(), batch_size),
+                            finalize=lambda conn: fill_missing_with_mode(conn, table_name, per_topic=per_topic_modes))
+    finally:
+        conn.close()
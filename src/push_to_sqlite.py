@@ -1,13 +1,694 @@
+import os
+import re
 import sqlite3
+import time
 import pandas as pd
-import os
 from utils import logger
 
-def push_data_to_sqlite(input_csv, sqlite_db, table_name):
+# Column definitions of the repositories table, in the order used by every loader
+REPOSITORY_COLUMNS = [
+    ("Repository_Name", "TEXT NOT NULL"),
+    ("Owner", "TEXT NOT NULL"),
+    ("Description", "TEXT"),
+    ("URL", "TEXT"),
+    ("Programming_Language", "TEXT"),
+    ("Creation_Date", "TEXT"),
+    ("Last_Updated_Date", "TEXT"),
+    ("Number_of_Stars", "INTEGER"),
+    ("Number_of_Forks", "INTEGER"),
+    ("Number_of_Open_Issues", "INTEGER"),
+    ("License_Type", "TEXT"),
+]
+COLUMN_NAMES = [name for name, _ in REPOSITORY_COLUMNS]
+KEY_COLUMNS = ("Owner", "Repository_Name")
+
+# Stored generated columns, computed once when a row is written: the dates as epoch seconds
+# and the creation year, so that queries never parse the TEXT dates row by row
+DERIVED_COLUMNS = [
+    ("Creation_Epoch", "INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', \"Creation_Date\") AS INTEGER)) STORED"),
+    ("Last_Updated_Epoch", "INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', \"Last_Updated_Date\") AS INTEGER)) STORED"),
+    ("Creation_Year", "INTEGER GENERATED ALWAYS AS (CAST(strftime('%Y', \"Creation_Date\") AS INTEGER)) STORED"),
+]
+
+# Covering indexes matched to the dashboard queries in data_analysis.py. Top-N queries walk
+# an index backwards and stop after N entries; group-bys read a narrow index in group order.
+# GROUP BY Owner is served by the primary key index. The (language, metric) indexes let the
+# top-k per language read the k best entries of each language and nothing else. The
+# (metric, Repository_Name, Owner) indexes also serve every page of `browse_repositories`.
+REPOSITORY_INDEXES = {
+    "idx_repositories_stars": '"Number_of_Stars", "Repository_Name", "Owner"',
+    "idx_repositories_forks": '"Number_of_Forks", "Repository_Name", "Owner"',
+    "idx_repositories_updated": '"Last_Updated_Date", "Repository_Name", "Owner"',
+    "idx_repositories_created": '"Creation_Date", "Repository_Name", "Owner"',
+    "idx_repositories_open_issues": '"Number_of_Open_Issues", "Repository_Name", "Owner"',
+    "idx_repositories_language": '"Programming_Language", "Number_of_Stars", "Number_of_Forks", "Repository_Name", "Owner"',
+    "idx_repositories_language_forks": '"Programming_Language", "Number_of_Forks", "Number_of_Stars", "Repository_Name", "Owner"',
+    "idx_repositories_language_open_issues": '"Programming_Language", "Number_of_Open_Issues", "Repository_Name", "Owner"',
+    "idx_repositories_license": '"License_Type"',
+    "idx_repositories_created_year": '"Creation_Year"',
+}
+
+# Summary tables maintained by triggers on the repositories table, so the dashboard reads a few
+# dozen precomputed rows. Missing group values are stored as '' because NULLs never conflict.
+# Stars_Count and Forks_Count count the non-null values only, so the averages skip them as AVG does.
+ROLLUP_TABLES = {
+    "summary_languages": """
+        "Programming_Language" TEXT PRIMARY KEY,
+        "Repository_Count" INTEGER NOT NULL,
+        "Total_Stars" INTEGER NOT NULL,
+        "Stars_Count" INTEGER NOT NULL,
+        "Total_Forks" INTEGER NOT NULL,
+        "Forks_Count" INTEGER NOT NULL
+    """,
+    "summary_licenses": """
+        "License_Type" TEXT PRIMARY KEY,
+        "Repository_Count" INTEGER NOT NULL
+    """,
+    "summary_years": """
+        "Year" TEXT PRIMARY KEY,
+        "Repository_Count" INTEGER NOT NULL
+    """,
+    "summary_top_repository_by_language": """
+        "Programming_Language" TEXT PRIMARY KEY,
+        "Repository_Name" TEXT NOT NULL,
+        "Owner" TEXT NOT NULL,
+        "Number_of_Stars" INTEGER
+    """,
+}
+
+# Repositories matched by several topics are stored once, with one row per topic in this relation
+TOPICS_TABLE = "repository_topics"
+TOPICS_COLUMN = "Topics"
+TOPIC_SEPARATOR = ";"
+
+
+def create_repositories_table(conn, table_name):
+    """
+    Creates the repositories table keyed on `(Owner, Repository_Name)` if needed.
+
+    A table written by an older loader (through `DataFrame.to_sql` without a primary key,
+    or without the `DERIVED_COLUMNS`) is migrated in place; duplicate repositories keep
+    their most recent row.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+    table_name : str
+        The name of the repositories table.
+
+    Returns
+    -------
+    None
+    """
+    columns = ",\n            ".join(f'"{name}" {definition}'
+                                      for name, definition in REPOSITORY_COLUMNS + DERIVED_COLUMNS)
+    create_sql = f"""
+        CREATE TABLE IF NOT EXISTS "{table_name}" (
+            {columns},
+            PRIMARY KEY ("Owner", "Repository_Name")
+        )
+    """
+
+    table_info = conn.execute(f'PRAGMA table_xinfo("{table_name}")').fetchall()
+    existing_columns = {column[1] for column in table_info}
+    if table_info and (not any(column[5] for column in table_info)
+                       or any(name not in existing_columns for name, _ in DERIVED_COLUMNS)):
+        logger.info(f"Migrating table {table_name} to the current schema...")
+        legacy_table = f"{table_name}_legacy"
+        column_list = ", ".join(f'"{name}"' for name in COLUMN_NAMES)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f'ALTER TABLE "{table_name}" RENAME TO "{legacy_table}"')
+            conn.execute(create_sql)
+            conn.execute(f"""
+                INSERT OR REPLACE INTO "{table_name}" ({column_list})
+                SELECT {column_list} FROM "{legacy_table}"
+                WHERE "Owner" IS NOT NULL AND "Repository_Name" IS NOT NULL
+                ORDER BY "Last_Updated_Date"
+            """)
+            conn.execute(f'DROP TABLE "{legacy_table}"')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        logger.info(f"Table {table_name} migrated.")
+    else:
+        conn.execute(create_sql)
+
+
+def create_topics_table(conn):
+    """
+    Creates the `repository_topics` relation linking repositories to the topics they were found under.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+
+    Returns
+    -------
+    None
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS "{TOPICS_TABLE}" (
+            "Owner" TEXT NOT NULL,
+            "Repository_Name" TEXT NOT NULL,
+            "Topic" TEXT NOT NULL,
+            PRIMARY KEY ("Owner", "Repository_Name", "Topic")
+        ) WITHOUT ROWID
+    """)
+
+
+def _outdated_indexes(conn):
+    """Returns the names of the `REPOSITORY_INDEXES` that are missing or have other columns."""
+    return [index_name for index_name, columns in REPOSITORY_INDEXES.items()
+            if [column[2] for column in conn.execute(f'PRAGMA index_info("{index_name}")')]
+            != re.findall(r'"(\w+)"', columns)]
+
+
+def create_repository_indexes(conn, table_name):
+    """
+    Creates the secondary indexes used by the dashboard queries, if they do not exist yet.
+
+    An index whose columns differ from `REPOSITORY_INDEXES` (created by an older version)
+    is dropped and created again.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+    table_name : str
+        The name of the repositories table.
+
+    Returns
+    -------
+    None
+    """
+    for index_name in _outdated_indexes(conn):
+        conn.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+    for index_name, columns in REPOSITORY_INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" ({columns})')
+    conn.execute(f'ANALYZE "{table_name}"')
+
+
+def _rollup_statements(row, sign):
+    """Returns the statements adding (sign=1) or removing (sign=-1) one row from the counting rollups."""
+    language = f'COALESCE({row}."Programming_Language", \'\')'
+    license_type = f'COALESCE({row}."License_Type", \'\')'
+    year = f'COALESCE(CAST({row}."Creation_Year" AS TEXT), \'\')'
+    stars = f'{sign} * COALESCE({row}."Number_of_Stars", 0), {sign} * ({row}."Number_of_Stars" IS NOT NULL)'
+    forks = f'{sign} * COALESCE({row}."Number_of_Forks", 0), {sign} * ({row}."Number_of_Forks" IS NOT NULL)'
+    return f"""
+        INSERT INTO summary_languages VALUES ({language}, {sign}, {stars}, {forks})
+        ON CONFLICT ("Programming_Language") DO UPDATE SET
+            "Repository_Count" = "Repository_Count" + excluded."Repository_Count",
+            "Total_Stars" = "Total_Stars" + excluded."Total_Stars",
+            "Stars_Count" = "Stars_Count" + excluded."Stars_Count",
+            "Total_Forks" = "Total_Forks" + excluded."Total_Forks",
+            "Forks_Count" = "Forks_Count" + excluded."Forks_Count";
+        INSERT INTO summary_licenses VALUES ({license_type}, {sign})
+        ON CONFLICT ("License_Type") DO UPDATE SET
+            "Repository_Count" = "Repository_Count" + excluded."Repository_Count";
+        INSERT INTO summary_years VALUES ({year}, {sign})
+        ON CONFLICT ("Year") DO UPDATE SET
+            "Repository_Count" = "Repository_Count" + excluded."Repository_Count";
+        DELETE FROM summary_languages WHERE "Programming_Language" = {language} AND "Repository_Count" = 0;
+        DELETE FROM summary_licenses WHERE "License_Type" = {license_type} AND "Repository_Count" = 0;
+        DELETE FROM summary_years WHERE "Year" = {year} AND "Repository_Count" = 0;
+    """
+
+
+def _top_repository_statement(table_name, row):
+    """Returns the statement refreshing the most starred repository of the language of a row."""
+    return f"""
+        DELETE FROM summary_top_repository_by_language
+        WHERE "Programming_Language" = COALESCE({row}."Programming_Language", '');
+        INSERT INTO summary_top_repository_by_language
+        SELECT COALESCE("Programming_Language", ''), "Repository_Name", "Owner", "Number_of_Stars"
+        FROM "{table_name}"
+        WHERE "Programming_Language" IS {row}."Programming_Language"
+        ORDER BY "Number_of_Stars" DESC, "Number_of_Forks" DESC, "Repository_Name" DESC
+        LIMIT 1;
+    """
+
+
+ROLLUP_TRIGGERS = ("trg_rollups_insert", "trg_rollups_delete", "trg_rollups_update")
+
+
+def drop_rollup_triggers(conn):
+    """
+    Drops the rollup triggers, so that a bulk load into an empty table does not maintain them row by row.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+
+    Returns
+    -------
+    None
+    """
+    for trigger_name in ROLLUP_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS "{trigger_name}"')
+
+
+def _outdated_rollups(conn, existing):
+    """Returns the existing summary tables whose columns differ from `ROLLUP_TABLES`."""
+    return [name for name in ROLLUP_TABLES if name in existing
+            and [column[1] for column in conn.execute(f'PRAGMA table_info("{name}")')]
+            != re.findall(r'"(\w+)"', ROLLUP_TABLES[name])]
+
+
+def create_rollups(conn, table_name, rebuild=False):
+    """
+    Creates the summary tables and the triggers that maintain them incrementally.
+
+    Every insert, update and delete on the repositories table adjusts the per-language,
+    per-license and per-year counters by the changed row only, and refreshes the top
+    repository of the affected languages through `idx_repositories_language`. Because the
+    triggers run inside the writing transaction, the rollups always match the base table.
+    Summary tables created for an existing table are backfilled once, and summary tables
+    whose columns differ from `ROLLUP_TABLES` (created by an older version) are recreated
+    with their triggers, so calling this on any database is safe.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+    table_name : str
+        The name of the repositories table.
+    rebuild : bool, optional
+        Recompute every summary table from the repositories table. Defaults to False.
+
+    Returns
+    -------
+    None
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    outdated = _outdated_rollups(conn, existing)
+    for name in outdated:
+        conn.execute(f'DROP TABLE "{name}"')
+    if outdated:
+        drop_rollup_triggers(conn)
+    missing = [name for name in ROLLUP_TABLES if name not in existing or name in outdated]
+    for name in missing:
+        conn.execute(f'CREATE TABLE "{name}" ({ROLLUP_TABLES[name]}) WITHOUT ROWID')
+    # The backfill below fills every summary table
+    if rebuild or missing:
+        missing = list(ROLLUP_TABLES)
+
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_repositories_language" ON "{table_name}" '
+                 f'({REPOSITORY_INDEXES["idx_repositories_language"]})')
+    watched_columns = ", ".join(f'"{name}"' for name in (
+        "Programming_Language", "License_Type", "Creation_Date", "Number_of_Stars", "Number_of_Forks",
+        "Repository_Name"))
+    triggers = {
+        "trg_rollups_insert": f"AFTER INSERT ON \"{table_name}\" BEGIN "
+                              f"{_rollup_statements('NEW', 1)}"
+                              f"{_top_repository_statement(table_name, 'NEW')} END",
+        "trg_rollups_delete": f"AFTER DELETE ON \"{table_name}\" BEGIN "
+                              f"{_rollup_statements('OLD', -1)}"
+                              f"{_top_repository_statement(table_name, 'OLD')} END",
+        "trg_rollups_update": f"AFTER UPDATE OF {watched_columns} ON \"{table_name}\" BEGIN "
+                              f"{_rollup_statements('OLD', -1)}"
+                              f"{_rollup_statements('NEW', 1)}"
+                              f"{_top_repository_statement(table_name, 'OLD')}"
+                              f"{_top_repository_statement(table_name, 'NEW')} END",
+    }
+    for trigger_name, body in triggers.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS "{trigger_name}" {body}')
+
+    if missing:
+        logger.info(f"Backfilling summary tables {missing} from {table_name}...")
+        for name in missing:
+            conn.execute(f'DELETE FROM "{name}"')
+        conn.execute(f"""
+            INSERT INTO summary_languages
+            SELECT COALESCE("Programming_Language", ''), COUNT(*),
+                   COALESCE(SUM("Number_of_Stars"), 0), COUNT("Number_of_Stars"),
+                   COALESCE(SUM("Number_of_Forks"), 0), COUNT("Number_of_Forks")
+            FROM "{table_name}" GROUP BY 1
+        """)
+        conn.execute(f"""
+            INSERT INTO summary_licenses
+            SELECT COALESCE("License_Type", ''), COUNT(*) FROM "{table_name}" GROUP BY 1
+        """)
+        conn.execute(f"""
+            INSERT INTO summary_years
+            SELECT COALESCE(CAST("Creation_Year" AS TEXT), ''), COUNT(*) FROM "{table_name}" GROUP BY 1
+        """)
+        conn.execute(f"""
+            INSERT INTO summary_top_repository_by_language
+            SELECT COALESCE("Programming_Language", ''), "Repository_Name", "Owner", "Number_of_Stars"
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY "Programming_Language"
+                    ORDER BY "Number_of_Stars" DESC, "Number_of_Forks" DESC, "Repository_Name" DESC
+                ) AS language_rank
+                FROM "{table_name}"
+            )
+            WHERE language_rank = 1
+        """)
+
+
+def topic_rows(rows):
+    """
+    Splits the trailing ';'-separated topics value of each row into `repository_topics` rows.
+
+    Parameters
+    ----------
+    rows : list
+        Row tuples in `COLUMN_NAMES` order followed by a topics value.
+
+    Returns
+    -------
+    list
+        `(Owner, Repository_Name, Topic)` tuples.
+    """
+    owner, name = COLUMN_NAMES.index("Owner"), COLUMN_NAMES.index("Repository_Name")
+    return [(row[owner], row[name], topic)
+            for row in rows
+            for topic in (row[len(COLUMN_NAMES)] or "").split(TOPIC_SEPARATOR) if topic]
+
+
+def bump_dataset_version(conn):
+    """
+    Increments the dataset version stamp (the `user_version` header field) of the database.
+
+    Readers cache query results per version, so calling this inside the load transaction
+    invalidates their caches exactly when the new data becomes visible.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+
+    Returns
+    -------
+    int
+        The new dataset version.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0] + 1
+    conn.execute(f"PRAGMA user_version = {version}")
+    return version
+
+
+def connect_for_load(sqlite_db, timeout=5.0):
+    """
+    Opens a connection for loading data, with write-ahead logging enabled.
+
+    In WAL mode readers such as the Streamlit app keep reading the last committed
+    snapshot while a load is in progress. The connection is in autocommit mode so
+    that loaders control their transactions explicitly.
+
+    Parameters
+    ----------
+    sqlite_db : str
+        The path to the SQLite database file.
+    timeout : float, optional
+        Seconds to wait for another writer's lock, by default 5.
+
+    Returns
+    -------
+    sqlite3.Connection
+        The connection to the SQLite database.
+    """
+    conn = sqlite3.connect(sqlite_db, isolation_level=None, timeout=timeout)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class OutdatedSchemaError(RuntimeError):
+    """The database was written by an older version, and has to be migrated before it is read."""
+
+
+def schema_is_outdated(conn, table_name):
+    """
+    Tells whether the repositories table of a database lacks parts of the current schema.
+
+    Only reads the schema, so it can run on a read-only connection.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        A connection to the database.
+    table_name : str
+        The name of the repositories table.
+
+    Returns
+    -------
+    bool
+        True if the table lacks its primary key, a derived column, the topics table, a
+        rollup or an index, or has an older version of one of them; False if it is current
+        or does not exist.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if table_name not in existing:
+        return False
+    table_info = conn.execute(f'PRAGMA table_xinfo("{table_name}")').fetchall()
+    columns = {column[1] for column in table_info}
+    return not (any(column[5] for column in table_info) and all(name in columns for name, _ in DERIVED_COLUMNS)
+                and TOPICS_TABLE in existing and all(name in existing for name in ROLLUP_TABLES)
+                and not _outdated_rollups(conn, existing) and not _outdated_indexes(conn))
+
+
+def upgrade_database(sqlite_db, table_name, timeout=5.0):
+    """
+    Brings a database written by an older version to the current schema, if needed.
+
+    Readers open the database read-only and query the topics relation and the summary
+    tables, which older databases lack, so they refuse an outdated database (see
+    `OutdatedSchemaError`). This migrates the repositories table and creates the topics
+    table, the missing or changed indexes and the rollups once; a current database is only
+    read. It runs before every load and from `cli.py migrate`.
+
+    Parameters
+    ----------
+    sqlite_db : str
+        The path to the SQLite database file.
+    table_name : str
+        The name of the repositories table.
+    timeout : float, optional
+        Seconds to wait for another writer's lock, by default 5.
+
+    Returns
+    -------
+    bool
+        True if the database was upgraded, False if it was current or has no repositories table.
+    """
+    if not os.path.exists(sqlite_db):
+        return False
+    conn = sqlite3.connect(sqlite_db, isolation_level=None, timeout=timeout)
+    try:
+        if not schema_is_outdated(conn, table_name):
+            return False
+
+        logger.info(f"Upgrading {sqlite_db} to the current schema...")
+        create_repositories_table(conn, table_name)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            create_topics_table(conn)
+            create_repository_indexes(conn, table_name)
+            create_rollups(conn, table_name)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"{sqlite_db} upgraded.")
+        return True
+    finally:
+        conn.close()
+
+
+def upsert_statement(table_name):
+    """
+    Builds the `INSERT ... ON CONFLICT DO UPDATE` statement for the repositories table.
+
+    Rows whose values are all unchanged are left untouched, so they do not count as changes.
+
+    Parameters
+    ----------
+    table_name : str
+        The name of the repositories table.
+
+    Returns
+    -------
+    str
+        The parameterized upsert statement, taking values in `COLUMN_NAMES` order.
+    """
+    column_list = ", ".join(f'"{name}"' for name in COLUMN_NAMES)
+    placeholders = ", ".join("?" for _ in COLUMN_NAMES)
+    value_columns = [name for name in COLUMN_NAMES if name not in KEY_COLUMNS]
+    updates = ", ".join(f'"{name}" = excluded."{name}"' for name in value_columns)
+    changed = " OR ".join(f'"{name}" IS NOT excluded."{name}"' for name in value_columns)
+    return f"""
+        INSERT INTO "{table_name}" ({column_list}) VALUES ({placeholders})
+        ON CONFLICT ("Owner", "Repository_Name") DO UPDATE SET {updates}
+        WHERE {changed}
+    """
+
+
+def upsert_rows(conn, table_name, rows):
+    """
+    Upserts a batch of rows with a single `executemany` call.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        The connection to the SQLite database.
+    table_name : str
+        The name of the repositories table.
+    rows : list
+        Row tuples in `COLUMN_NAMES` order.
+
+    Returns
+    -------
+    int
+        The number of rows inserted or updated.
+    """
+    # The cursor counts the rows of the table only, not what the rollup triggers write
+    return conn.executemany(upsert_statement(table_name), rows).rowcount
+
+
+def upsert_page(conn, table_name, rows):
+    """
+    Upserts one page of rows, with their topics, in a transaction of its own.
+
+    Harvest workers writing to the same database concurrently store each page this way:
+    the write lock is held for one page only, and storing a page again changes nothing.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        A connection opened with `connect_for_load`, whose tables exist (see `load_batches`).
+    table_name : str
+        The name of the repositories table.
+    rows : list
+        Row tuples in `COLUMN_NAMES` order followed by a topics value.
+
+    Returns
+    -------
+    int
+        The number of rows inserted or updated.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany(f'INSERT OR IGNORE INTO "{TOPICS_TABLE}" VALUES (?, ?, ?)', topic_rows(rows))
+        changed = upsert_rows(conn, table_name, [row[:len(COLUMN_NAMES)] for row in rows])
+        if changed:
+            bump_dataset_version(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return changed
+
+
+def load_batches(conn, table_name, batches, finalize=None):
+    """
+    Upserts batches of rows into the repositories table inside a single transaction.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        A connection opened with `connect_for_load`.
+    table_name : str
+        The name of the repositories table.
+    batches : iterable
+        Lists of row tuples in `COLUMN_NAMES` order, optionally followed by a ';'-separated
+        topics value that is recorded in the `repository_topics` relation.
+    finalize : callable, optional
+        Called with the connection before the transaction commits.
+
+    Returns
+    -------
+    dict
+        The number of rows read, inserted, updated and unchanged, and the load rate.
+    """
+    create_repositories_table(conn, table_name)
+    create_topics_table(conn)
+    started = time.perf_counter()
+    rows_read = changed = 0
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows_before = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+        # Rollups are maintained row by row by triggers, except for a bulk load into an empty
+        # table, where computing them once at the end is much cheaper
+        fresh_load = rows_before == 0
+        if fresh_load:
+            drop_rollup_triggers(conn)
+        else:
+            create_rollups(conn, table_name)
+        for batch in batches:
+            if batch and len(batch[0]) > len(COLUMN_NAMES):
+                conn.executemany(f'INSERT OR IGNORE INTO "{TOPICS_TABLE}" VALUES (?, ?, ?)', topic_rows(batch))
+                batch = [row[:len(COLUMN_NAMES)] for row in batch]
+            changed += upsert_rows(conn, table_name, batch)
+            rows_read += len(batch)
+            logger.info(f"Upserted {rows_read} rows so far into {table_name}")
+        rows_after = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+        # Missing indexes are built once the rows are in, which is faster than maintaining them row by row
+        create_repository_indexes(conn, table_name)
+        if fresh_load:
+            create_rollups(conn, table_name, rebuild=True)
+        if finalize is not None:
+            finalize(conn)
+        version = bump_dataset_version(conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+    elapsed = time.perf_counter() - started
+    inserted = rows_after - rows_before
+    stats = {
+        "rows": rows_read,
+        "inserted": inserted,
+        "updated": changed - inserted,
+        "unchanged": rows_read - changed,
+        "seconds": elapsed,
+        "rows_per_second": rows_read / max(elapsed, 1e-9),
+    }
+    logger.info(f"Loaded {stats['rows']} rows into {table_name} in {elapsed:.2f}s "
+                f"({stats['rows_per_second']:.0f} rows/s): {stats['inserted']} inserted, "
+                f"{stats['updated']} updated, {stats['unchanged']} unchanged. Dataset version is now {version}.")
+    return stats
+
+
+def csv_batches(input_csv, batch_size):
+    """
+    Reads a CSV file in chunks and yields them as row tuples in `COLUMN_NAMES` order.
+
+    Parameters
+    ----------
+    input_csv : str
+        The path to the CSV file.
+    batch_size : int
+        The number of rows per chunk.
+
+    Yields
+    ------
+    list
+        Row tuples with missing values as None, followed by the topics value if the file has a
+        `Topics` column.
+    """
+    for chunk in pd.read_csv(input_csv, chunksize=batch_size):
+        columns = COLUMN_NAMES + ([TOPICS_COLUMN] if TOPICS_COLUMN in chunk.columns else [])
+        chunk = chunk[columns].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield list(chunk.itertuples(index=False, name=None))
+
+
+def push_data_to_sqlite(input_csv, sqlite_db, table_name, batch_size=5000):
     """
     Pushes the data from a CSV file to a SQLite database.
 
-    This function attempts to connect to the specified SQLite database, read the data from the specified CSV file, and write the data to a table in the database. If the table already exists, it will be replaced.
+    This function reads the specified CSV file in chunks and upserts the rows into the table, keyed on
+    `(Owner, Repository_Name)`, inside a single transaction. Existing rows are updated in place, so readers
+    keep seeing the previous data (the database is switched to WAL mode) until the load commits.
 
     Parameters
     ----------
@@ -17,28 +698,29 @@ def push_data_to_sqlite(input_csv, sqlite_db, table_name):
         The path to the SQLite database file.
     table_name : str
         The name of the table to which the data should be written.
+    batch_size : int, optional
+        The number of rows per upsert batch. Defaults to 5000.
 
     Returns
     -------
-    None
+    dict
+        The load statistics (see `load_batches`), or None if the load failed.
     """
     try:
+        # A database written by an older version is migrated before the rows are upserted into it
+        upgrade_database(sqlite_db, table_name)
         # Connect to the SQLite database (it will create the database if it doesn't exist)
-        conn = sqlite3.connect(sqlite_db)
+        conn = connect_for_load(sqlite_db)
         logger.info(f"Connected to SQLite database: {sqlite_db}")
-        
-        # Read the CSV data
-        data = pd.read_csv(input_csv)
-        logger.info(f"CSV file {input_csv} read successfully with {data.shape[0]} rows and {data.shape[1]} columns.")
-        
-        # Write the data to the specified SQLite table (if table exists, replace it)
-        data.to_sql(table_name, conn, if_exists='replace', index=False)
-        logger.info(f"Data successfully pushed to SQLite table: {table_name}")
-
-        # Close the connection
-        conn.close()
-        logger.info(f"Connection to SQLite database {sqlite_db} closed.")
-    
+
+        try:
+            stats = load_batches(conn, table_name, csv_batches(input_csv, batch_size))
+            logger.info(f"Data successfully pushed to SQLite table: {table_name}")
+        finally:
+            conn.close()
+            logger.info(f"Connection to SQLite database {sqlite_db} closed.")
+        return stats
+
     except sqlite3.Error as sql_err:
         logger.error(f"SQLite error occurred: {sql_err}")
     except FileNotFoundError as fnf_error:
@@ -47,10 +729,3 @@ def push_data_to_sqlite(input_csv, sqlite_db, table_name):
         logger.error(f"Empty data error: {empty_data_err}")
     except Exception as e:
         logger.error(f"An unexpected error occurred while pushing data to SQLite: {e}")
-
-# Example usage (can be removed or modified for actual implementation)
-if __name__ == "__main__":
-    input_file = os.path.join("data", "cleaned_data.csv")
-    sqlite_db = os.path.join("database", "github_data.db")
-    table_name = "github_repositories"
-    push_data_to_sqlite(input_file, sqlite_db, table_name)
@@ -0,0 +1,198 @@
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from utils import logger
+
+_version_lock = threading.Lock()
+_known_versions = {}
+
+
+def _file_signature(db_path):
+    """Returns the (mtime, size) of the database file and its WAL file, which change on every commit."""
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def dataset_version(db_path):
+    """
+    Returns the dataset version stamp of a SQLite database.
+
+    The stamp is the `user_version` header field, which the loader increments in
+    the same transaction that writes the data. It is only read again when the
+    database files change on disk, so checking it is usually just two `stat` calls.
+
+    Args:
+        db_path (str): The path to the SQLite database file.
+
+    Returns:
+        int: The dataset version, or None if the database cannot be read.
+    """
+    signature = _file_signature(db_path)
+    with _version_lock:
+        known = _known_versions.get(db_path)
+        if known is not None and known[0] == signature:
+            return known[1]
+    try:
+        connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        logger.error(f"Error reading the dataset version of {db_path}: {e}")
+        return None
+    with _version_lock:
+        _known_versions[db_path] = (signature, version)
+    return version
+
+
+class QueryCache:
+    """
+    A thread-safe LRU cache of query results, invalidated by a dataset version stamp.
+
+    Results are keyed by function, arguments and the current dataset version, so a
+    new load makes every older entry unreachable; those entries then age out of the
+    LRU order. DataFrames and figures are copied on the way in and out, so callers
+    may modify the results they get back.
+
+    Args:
+        version (callable): Returns the current dataset version stamp.
+        maxsize (int, optional): The maximum number of cached results. Defaults to 128.
+    """
+
+    def __init__(self, version, maxsize=128):
+        self.version = version
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, function):
+        """
+        Decorates a query function so that its results are served from the cache.
+
+        Calls are keyed by their arguments bound to the function signature, defaults
+        included, so `f()`, `f(10)` and `f(limit=10)` share one entry. The key of a call
+        is given by the `cache_key` attribute of the decorated function.
+        """
+        signature = inspect.signature(function)
+
+        def cache_key(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return self.key(function.__name__, (), bound.arguments)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            key = cache_key(*args, **kwargs)
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+            result = function(*args, **kwargs)
+            # Failed queries return None or an empty frame and are retried on the next call
+            if result is not None and not getattr(result, "empty", False):
+                self.put(key, result)
+            return _copy(result)
+
+        wrapper.cache_key = cache_key
+        return wrapper
+
+    def key(self, name, args=(), kwargs=None):
+        """Returns the cache key of a call under the current dataset version."""
+        return name, tuple(args), tuple(sorted((kwargs or {}).items())), self.version()
+
+    def get(self, key, copy=True):
+        """
+        Returns a copy of the result cached under a key, counting the lookup as a hit or a miss.
+
+        Args:
+            key (tuple): The key, as returned by `key`.
+            copy (bool, optional): Return a copy, which the caller may modify. Defaults to True;
+                otherwise the cached result itself is returned and must be left unmodified.
+
+        Returns:
+            The cached result, or None if there is none.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            entry = self._entries[key]
+        if not copy:
+            return entry.shared() if isinstance(entry, _FigureSpec) else entry
+        return _copy(entry)
+
+    def put(self, key, result):
+        """Stores a result, evicting the least recently used entries beyond `maxsize`."""
+        with self._lock:
+            self._entries[key] = _FigureSpec(result) if hasattr(result, "to_plotly_json") else _copy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drops every cached result."""
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        Returns the cache statistics.
+
+        Returns:
+            dict: The hit and miss counters, the current size and the maximum size.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+class _FigureSpec:
+    """
+    A cached plotly figure, kept as its spec and rebuilt into a new figure on every copy.
+
+    Figures have no `copy`, and copying one revalidates its template, which takes longer
+    than building most figures. The spec is stored without the template when it is the
+    default one, which a rebuilt figure gets anyway. Rebuilding still validates the spec
+    (15-20 ms), so readers that leave the figure unmodified share one built figure instead.
+    """
+
+    def __init__(self, figure):
+        self._shared = None
+        import plotly.io as pio
+
+        self.figure_class = type(figure)
+        self.spec = figure.to_dict()
+        template = self.spec["layout"].pop("template", None)
+        default = pio.templates[pio.templates.default] if pio.templates.default else None
+        self.template = None if default is not None and template == default.to_plotly_json() else template
+
+    def build(self):
+        figure = self.figure_class(self.spec)
+        if self.template is not None:
+            figure.layout.template = self.template
+        return figure
+
+    def shared(self):
+        # Built on the first read, never from the figure given to `put`, which its caller keeps
+        if self._shared is None:
+            self._shared = self.build()
+        return self._shared
+
+
+def _copy(result):
+    if isinstance(result, _FigureSpec):
+        return result.build()
+    return result.copy() if hasattr(result, "copy") else result
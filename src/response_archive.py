@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_ARCHIVE_PATH = os.path.join("data", "archive")
+MANIFEST_NAME = "manifest.db"
+CODEC_EXTENSIONS = {"zstd": ".json.zst", "gzip": ".json.gz"}
+
+
+def _zstd():
+    """Imports zstandard, which the archive uses when it is installed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress(body, codec):
+    """Compresses a page body with the given codec ('zstd' or 'gzip')."""
+    if codec == "zstd":
+        return _zstd().ZstdCompressor(level=10).compress(body)
+    return gzip.compress(body, compresslevel=6)
+
+
+def decompress(data, codec):
+    """Decompresses a page body stored with the given codec."""
+    if codec == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise ImportError("This archive holds zstd-compressed pages, which require zstandard: "
+                              "pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def read_object(path):
+    """
+    Reads and decompresses one archived page body.
+
+    Args:
+        path (str): The path of the object file, whose extension gives its codec.
+
+    Returns:
+        bytes: The JSON body of the page.
+    """
+    codec = next(codec for codec, extension in CODEC_EXTENSIONS.items() if path.endswith(extension))
+    with open(path, "rb") as file:
+        return decompress(file.read(), codec)
+
+
+class ResponseArchive:
+    """
+    An append-only, content-addressed archive of the raw JSON pages of every harvest.
+
+    Each page body is stored once, compressed, under the SHA-256 of its bytes
+    (`objects/<2 hex digits>/<digest>.json.zst` or `.json.gz`), so a page that is
+    identical in many harvests takes its space only once. Objects are written to a
+    temporary file and renamed into place, and never modified afterwards. A SQLite
+    manifest records each harvest (a call of the harvester) and which object holds each
+    of its pages, so any past harvest can be replayed offline (see `replay_archive`).
+
+    Pages are compressed with zstd when the `zstandard` package is installed and with
+    gzip otherwise; archives may mix both.
+
+    Args:
+        path (str, optional): The archive directory. Defaults to `data/archive`.
+        codec (str, optional): 'zstd' or 'gzip' for new objects. Defaults to zstd when available.
+    """
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH, codec=None):
+        self.path = path
+        self.codec = codec or ("zstd" if _zstd() is not None else "gzip")
+        if self.codec == "zstd" and _zstd() is None:
+            raise ImportError("The zstd codec requires zstandard: pip install zstandard")
+        os.makedirs(os.path.join(path, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, MANIFEST_NAME), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS archive_harvests (
+                harvest_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                api TEXT NOT NULL,
+                topics TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS archive_pages (
+                harvest_id INTEGER NOT NULL REFERENCES archive_harvests (harvest_id),
+                topic TEXT NOT NULL,
+                shard TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                archived_at REAL NOT NULL,
+                PRIMARY KEY (harvest_id, topic, shard, page)
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def object_path(self, digest, codec):
+        """Returns the path of the object holding the page body with the given digest."""
+        return os.path.join(self.path, "objects", digest[:2], digest + CODEC_EXTENSIONS[codec])
+
+    def start(self, topics, api="rest"):
+        """
+        Records the start of a harvest.
+
+        Args:
+            topics (list): The topics harvested.
+            api (str, optional): 'rest' or 'graphql', which tells how to read its pages. Defaults to 'rest'.
+
+        Returns:
+            int: The id of the harvest.
+        """
+        with self._lock, self._conn:
+            return self._conn.execute("INSERT INTO archive_harvests (api, topics, started_at) VALUES (?, ?, ?)",
+                                      (api, json.dumps(list(topics)), time.time())).lastrowid
+
+    def add(self, harvest_id, topic, shard, page, payload):
+        """
+        Archives one page of a harvest.
+
+        Args:
+            harvest_id (int): The harvest.
+            topic (str): The topic of the page.
+            shard (str): The qualifiers of its shard, '' for the whole topic.
+            page (int): The page number.
+            payload (dict): The decoded JSON page.
+
+        Returns:
+            str: The digest of the page body.
+        """
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        digest = hashlib.sha256(body).hexdigest()
+        codec = next((codec for codec in CODEC_EXTENSIONS if os.path.exists(self.object_path(digest, codec))),
+                     None)
+        if codec is None:
+            codec = self.codec
+            path = self.object_path(digest, codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as file:
+                file.write(compress(body, codec))
+            os.replace(file.name, path)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO archive_pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (harvest_id, topic, shard, page, digest, codec, time.time()))
+        return digest
+
+    def finish(self, harvest_id):
+        """Records the end of a harvest."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE archive_harvests SET finished_at = ? WHERE harvest_id = ?",
+                               (time.time(), harvest_id))
+
+    def harvests(self):
+        """
+        Lists the archived harvests.
+
+        Returns:
+            list: `(harvest_id, api, topics, started_at, finished_at, pages)` tuples, oldest first;
+            `finished_at` is None for a harvest that was interrupted.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT h.harvest_id, h.api, h.topics, h.started_at, h.finished_at, COUNT(p.digest)
+                FROM archive_harvests h LEFT JOIN archive_pages p ON p.harvest_id = h.harvest_id
+                GROUP BY h.harvest_id ORDER BY h.harvest_id
+            """).fetchall()
+        return [(harvest_id, api, json.loads(topics), started_at, finished_at, pages)
+                for harvest_id, api, topics, started_at, finished_at, pages in rows]
+
+    def pages(self, harvest_ids=None):
+        """
+        Lists the archived pages of some or all harvests.
+
+        Args:
+            harvest_ids (list, optional): The harvests to list. Defaults to all of them.
+
+        Returns:
+            list: `(harvest_id, api, topic, shard, page, path)` tuples, harvest by harvest from
+            the oldest, so that replaying them in order leaves the latest values.
+        """
+        query = """
+            SELECT p.harvest_id, h.api, p.topic, p.shard, p.page, p.digest, p.codec
+            FROM archive_pages p JOIN archive_harvests h ON h.harvest_id = p.harvest_id
+        """
+        params = []
+        if harvest_ids is not None:
+            params = list(harvest_ids)
+            query += f" WHERE p.harvest_id IN ({', '.join('?' * len(params))})"
+        query += " ORDER BY p.harvest_id, p.topic, p.shard, p.page"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [(harvest_id, api, topic, shard, page, self.object_path(digest, codec))
+                for harvest_id, api, topic, shard, page, digest, codec in rows]
+
+    def stats(self):
+        """
+        Returns the size of the archive.
+
+        Returns:
+            dict: The number of archived pages and stored objects, and the bytes of the objects.
+        """
+        objects = stored_bytes = 0
+        for directory, _, files in os.walk(os.path.join(self.path, "objects")):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    objects += 1
+                    stored_bytes += os.path.getsize(os.path.join(directory, name))
+        with self._lock:
+            pages = self._conn.execute("SELECT COUNT(*) FROM archive_pages").fetchone()[0]
+        return {"pages": pages, "objects": objects, "bytes": stored_bytes}
@@ -1,22 +1,45 @@
-import logging 
+import logging
 import os
 import sys
+import threading
 from datetime import datetime
 
 
-LOG_FILE = f"{datetime.now().strftime('%d_%m_%Y_%H_%M_%S')}.log"
+LOG_FORMAT = "[%(asctime)s] %(lineno)d %(name)s - %(module)s - %(levelname)s - %(message)s"
 
-log_path = os.path.join(os.getcwd(), 'logs')
+logger = logging.getLogger("GitHubDataDive")
 
-os.makedirs(log_path, exist_ok=True)
+_log_filepath = None
+_setup_lock = threading.Lock()
 
-LOG_FILEPATH = os.path.join(log_path, LOG_FILE)
 
-logging.basicConfig(level=logging.INFO,
-                    handlers=[
-                        logging.FileHandler(LOG_FILEPATH),
-                        logging.StreamHandler(sys.stdout)
-                    ],
-                    format="[%(asctime)s] %(lineno)d %(name)s - %(module)s - %(levelname)s - %(message)s")
+def setup_logging(log_dir=None, level=logging.INFO):
+    """
+    Sends the log records to the console and to a new timestamped file in the log directory.
 
-logger = logging.getLogger("GitHubDataDive")
\ No newline at end of file
+    Importing modules has no logging side effects; entry points (the Streamlit app and the
+    command line) call this once at startup. Later calls, e.g. on Streamlit reruns, keep
+    the handlers of the first call.
+
+    Args:
+        log_dir (str, optional): The directory of the log files. Defaults to 'logs' in the working directory.
+        level (int, optional): The minimum level of the records. Defaults to logging.INFO.
+
+    Returns:
+        str: The path of the log file.
+    """
+    global _log_filepath
+    with _setup_lock:
+        if _log_filepath is not None:
+            return _log_filepath
+        log_path = log_dir or os.path.join(os.getcwd(), 'logs')
+        os.makedirs(log_path, exist_ok=True)
+        log_filepath = os.path.join(log_path, f"{datetime.now().strftime('%d_%m_%Y_%H_%M_%S')}.log")
+        logging.basicConfig(level=level,
+                            handlers=[
+                                logging.FileHandler(log_filepath),
+                                logging.StreamHandler(sys.stdout)
+                            ],
+                            format=LOG_FORMAT)
+        _log_filepath = log_filepath
+        return log_filepath
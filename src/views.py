@@ -0,0 +1,125 @@
+import streamlit as st
+from data_analysis import (
+    average_forks_by_language, average_stars_by_language, distribution_of_licenses, most_forked_repositories,
+    most_popular_contributors, most_popular_languages, most_popular_licenses, most_recently_updated_repo,
+    most_starred_repositories, most_updated_repositories, popular_repo_for_each_language, repo_created_each_year,
+    repos_with_OpenIssues, top_repositories_per_language, TOP_K_METRICS,
+)
+from data_visualization import (
+    average_forks_by_language_visualized, average_stars_by_language_visualized,
+    distribution_of_licenses_visualized, most_forked_repositories_visualized,
+    most_popular_contributors_visualized, most_popular_languages_visualized, most_popular_licenses_visualized,
+    most_recently_updated_repo_visualized, most_starred_repositories_visualized,
+    most_updated_repositories_visualized, popular_repo_for_each_language_visualized,
+    repo_created_each_year_visualized, repos_with_open_issues_visualized, top_repositories_per_language_visualized,
+)
+
+
+def render_table(frame):
+    """The default table renderer."""
+    return st.dataframe(frame)
+
+
+class AnalysisView:
+    """
+    One analysis of the dashboard: where its data comes from and how it is shown.
+
+    Args:
+        label (str): The name of the analysis in the sidebar.
+        heading (str): The heading shown above the table.
+        provider (callable): Returns the analysis DataFrame, given the values of the controls.
+        chart (callable): Renders the chart of the DataFrame returned by `provider`, given the same
+            control values.
+        table (callable, optional): Renders the table of that DataFrame. Defaults to `st.dataframe`.
+        controls (callable, optional): Draws the analysis' input widgets (e.g. a top-N slider) and
+            returns their values as keyword arguments of `provider`. Defaults to no controls.
+    """
+
+    def __init__(self, label, heading, provider, chart, table=render_table, controls=None):
+        self.label = label
+        self.heading = heading
+        self.provider = provider
+        self.chart = chart
+        self.table = table
+        self.controls = controls
+
+    def render(self, table_container, chart_container):
+        """
+        Fetches the analysis once and renders its table and its chart from the same DataFrame.
+
+        Args:
+            table_container: The Streamlit container of the table.
+            chart_container: The Streamlit container of the chart.
+
+        Returns:
+            pd.DataFrame: The rendered DataFrame.
+        """
+        with st.sidebar:
+            parameters = self.controls() if self.controls else {}
+        frame = self.provider(**parameters)
+        with table_container:
+            st.markdown(f"**{self.heading}**")
+            self.table(frame)
+        with chart_container:
+            self.chart(frame, **parameters)
+        return frame
+
+
+def top_k_controls():
+    """The metric and k of the top repositories per language."""
+    return {
+        "metric": st.selectbox("Rank by", list(TOP_K_METRICS), format_func=lambda metric: metric.replace("_", " ")),
+        "k": st.slider("Repositories per language", min_value=1, max_value=10, value=3),
+    }
+
+
+# Sidebar label -> view, in sidebar order
+VIEWS = {}
+
+
+def register_view(view):
+    """
+    Adds a view to the dashboard, replacing any view with the same label.
+
+    Args:
+        view (AnalysisView): The view.
+
+    Returns:
+        AnalysisView: The view, so that registrations can be chained.
+    """
+    VIEWS[view.label] = view
+    return view
+
+
+for view in (
+    AnalysisView("Most Starred Repositories", "Top 10 Most Starred Repositories",
+                 most_starred_repositories, most_starred_repositories_visualized),
+    AnalysisView("Most Forked Repositories", "Top 10 Most Forked Repositories",
+                 most_forked_repositories, most_forked_repositories_visualized),
+    AnalysisView("Most Recently Updated Repositories", "Top 10 Most Recently Updated Repositories",
+                 most_updated_repositories, most_updated_repositories_visualized),
+    AnalysisView("Most Popular Programming Languages", "Top 10 Most Popular Programming Languages",
+                 most_popular_languages, most_popular_languages_visualized),
+    AnalysisView("Most Popular Licenses", "Top 10 Most Popular Licenses",
+                 most_popular_licenses, most_popular_licenses_visualized),
+    AnalysisView("Most Popular Contributors", "Top 10 Most Popular Contributors",
+                 most_popular_contributors, most_popular_contributors_visualized),
+    AnalysisView("Average Stars by Language", "Average Stars by Programming Language",
+                 average_stars_by_language, average_stars_by_language_visualized),
+    AnalysisView("Average Forks by Language", "Average Forks by Programming Language",
+                 average_forks_by_language, average_forks_by_language_visualized),
+    AnalysisView("Repositories with Open Issues", "Top 10 Repositories with Open Issues",
+                 repos_with_OpenIssues, repos_with_open_issues_visualized),
+    AnalysisView("Repositories Created Each Year", "Repositories Created Each Year",
+                 repo_created_each_year, repo_created_each_year_visualized),
+    AnalysisView("Most Recently Updated Repo", "Most Recently Updated Repo",
+                 most_recently_updated_repo, most_recently_updated_repo_visualized),
+    AnalysisView("Distribution of Licenses", "Distribution of Licenses",
+                 distribution_of_licenses, distribution_of_licenses_visualized),
+    AnalysisView("Most Popular Repository for Each Language", "Most Popular Repository for Each Language",
+                 popular_repo_for_each_language, popular_repo_for_each_language_visualized),
+    AnalysisView("Top Repositories for Each Language", "Top Repositories for Each Language",
+                 top_repositories_per_language, top_repositories_per_language_visualized,
+                 controls=top_k_controls),
+):
+    register_view(view)
@@ -0,0 +1,35 @@
+import logging
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# The modules live flat in src/, and the stub of the GitHub API with the benchmarks
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "src"))
+
+from stub_github_api import StubGitHubAPI  # noqa: E402
+
+
+@pytest.fixture
+def stub_api():
+    """
+    Starts local stubs of the GitHub API for a test and shuts them down after it.
+
+    Yields:
+        callable: Takes the `StubGitHubAPI` arguments (with no latency by default) and
+        returns the running stub.
+    """
+    stubs = []
+
+    def start(**options):
+        options.setdefault("latency", 0)
+        stubs.append(StubGitHubAPI(**options).__enter__())
+        return stubs[-1]
+
+    logging.disable(logging.ERROR)
+    yield start
+    for stub in stubs:
+        stub.__exit__(None, None, None)
+    logging.disable(logging.NOTSET)
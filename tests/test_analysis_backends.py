@@ -0,0 +1,86 @@
+import logging
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+import data_analysis
+import parquet_store
+from analysis_backends import close_all_backends
+from bench_storage import write_cleaned_csv
+from connection_pool import close_all_pools
+from push_to_sqlite import push_data_to_sqlite
+from tests.test_indexes import ANALYSES
+
+TABLE = "github_repositories"
+ROWS = 3000
+
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory):
+    logging.disable(logging.INFO)
+    directory = tmp_path_factory.mktemp("backends")
+    csv_path, db_path, store_dir = str(directory / "cleaned.csv"), str(directory / "github.db"), str(directory / "parquet")
+    write_cleaned_csv(ROWS, csv_path)
+    push_data_to_sqlite(csv_path, db_path, TABLE)
+    parquet_store.write_parquet_store(csv_path, store_dir, harvest_date="2024-10-06")
+    cleaned = pd.read_csv(csv_path)
+    parquet_store.write_snapshot(store_dir)
+    yield {"db": db_path, "duckdb parquet": store_dir, "duckdb csv": csv_path, "arrow": store_dir, "cleaned": cleaned}
+    close_all_backends()
+    close_all_pools()
+    logging.disable(logging.NOTSET)
+
+
+def filter_cases(cleaned):
+    """Filters on values of the data, one of each kind and all of them together."""
+    language = cleaned["Programming_Language"].mode()[0]
+    license_type = cleaned["License_Type"].mode()[0]
+    year = int(cleaned["Creation_Date"].str[:4].mode()[0])
+    row = cleaned.dropna(subset=["Programming_Language", "License_Type", "Creation_Date"]).iloc[0]
+    combined = {"language": row["Programming_Language"], "license": row["License_Type"],
+                "years": (int(row["Creation_Date"][:4]),) * 2, "topic": row["Topics"].split(";")[0]}
+    return [{}, {"language": language}, {"license": license_type}, {"years": (year - 2, year)}, {"topic": "topic1"},
+            combined]
+
+
+def run(sources, monkeypatch, backend, name, **arguments):
+    monkeypatch.setattr(data_analysis, "DB_PATH", sources["db"])
+    monkeypatch.setattr(data_analysis, "BACKEND", backend.split()[0])
+    monkeypatch.setattr(data_analysis, "SOURCE", sources.get(backend))
+    return getattr(data_analysis, name).__wrapped__(**arguments)
+
+
+@pytest.mark.parametrize("backend", ["duckdb parquet", "duckdb csv", "arrow"])
+@pytest.mark.parametrize("analysis", ANALYSES)
+def test_analyses_match_sqlite(sources, monkeypatch, backend, analysis):
+    for filters in filter_cases(sources["cleaned"]):
+        expected = run(sources, monkeypatch, "sqlite", analysis, limit=None, **filters)
+        assert expected is not None and not expected.empty, (analysis, filters)
+        result = run(sources, monkeypatch, backend, analysis, limit=None, **filters)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False, obj=f"{analysis} {filters}")
+
+
+@pytest.mark.parametrize("backend", ["duckdb parquet", "duckdb csv", "arrow"])
+@pytest.mark.parametrize("sort", sorted(data_analysis.SORT_KEYS))
+def test_repository_pages_match_sqlite(sources, monkeypatch, backend, sort):
+    for filters in filter_cases(sources["cleaned"]):
+        pages = {}
+        for name in ("sqlite", backend):
+            first = run(sources, monkeypatch, name, "browse_repositories", sort=sort, limit=25, **filters)
+            after = data_analysis.next_cursor(first, sort)
+            second = run(sources, monkeypatch, name, "browse_repositories", sort=sort, limit=25, after=after,
+                         **filters)
+            pages[name] = pd.concat([first, second], ignore_index=True)
+        pd.testing.assert_frame_equal(pages[backend], pages["sqlite"], check_dtype=False, obj=f"{sort} {filters}")
+
+
+@pytest.mark.parametrize("backend", ["duckdb parquet", "duckdb csv", "arrow"])
+@pytest.mark.parametrize("metric", sorted(data_analysis.TOP_K_METRICS))
+def test_top_repositories_per_language_match_sqlite(sources, monkeypatch, backend, metric):
+    expected = run(sources, monkeypatch, "sqlite", "top_repositories_per_language", metric=metric, k=3)
+    result = run(sources, monkeypatch, backend, "top_repositories_per_language", metric=metric, k=3)
+    assert not expected.empty
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import api_server
+import data_analysis
+from api_server import AnalysisAPI, accepts_gzip
+from push_to_sqlite import connect_for_load, load_batches
+from tests.test_data_analysis import TABLE, repository_row
+
+# Large enough to be gzipped
+TARGET = "/api/most_starred_repositories?limit=100"
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    path = str(tmp_path / "github_data.db")
+    conn = connect_for_load(path)
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(120)]])
+    conn.close()
+    monkeypatch.setattr(data_analysis, "DB_PATH", path)
+    monkeypatch.setattr(data_analysis, "BACKEND", "sqlite")
+    monkeypatch.setattr(data_analysis, "_warmed_version", None)
+    data_analysis.query_cache.clear()
+    return AnalysisAPI()
+
+
+def test_gzipped_responses_have_their_own_etag(api):
+    status, identity_headers, body = api.respond("GET", TARGET, {})
+    assert status == 200 and "Content-Encoding" not in identity_headers
+    status, gzip_headers, compressed = api.respond("GET", TARGET, {"accept-encoding": "gzip, deflate"})
+    assert status == 200 and gzip_headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed)) == json.loads(body)
+    assert gzip_headers["ETag"] != identity_headers["ETag"]
+    assert identity_headers["Vary"] == gzip_headers["Vary"] == "Accept-Encoding"
+
+
+def test_revalidation_only_matches_an_acceptable_representation(api):
+    identity_tag = api.respond("GET", TARGET, {})[1]["ETag"]
+    gzip_tag = api.respond("GET", TARGET, {"accept-encoding": "gzip"})[1]["ETag"]
+
+    status, headers, body = api.respond("GET", TARGET, {"accept-encoding": "gzip", "if-none-match": gzip_tag})
+    assert (status, headers["ETag"], body) == (304, gzip_tag, b"")
+    assert api.respond("GET", TARGET, {"if-none-match": identity_tag})[0] == 304
+    # A client that does not accept gzip cannot reuse a gzipped body
+    status, headers, _ = api.respond("GET", TARGET, {"if-none-match": gzip_tag})
+    assert (status, headers["ETag"]) == (200, identity_tag)
+
+
+def test_unfiltered_requests_hit_the_warmed_cache(api):
+    assert data_analysis.warm_cache()
+    before = data_analysis.cache_info()
+    for name in api_server.ANALYSES:
+        assert api.respond("GET", f"/api/{name}", {})[0] == 200
+    after = data_analysis.cache_info()
+    assert after["misses"] == before["misses"]
+    assert after["hits"] == before["hits"] + len(api_server.ANALYSES)
+
+
+@pytest.mark.parametrize("header, accepted", [("gzip", True), ("deflate, gzip;q=0.5", True), ("gzip;q=0", False),
+                                              ("*", True), ("*;q=0, gzip", True), ("identity", False), ("", False)])
+def test_accept_encoding_qualities(header, accepted):
+    assert accepts_gzip(header) is accepted
+
+
+def read_request(data, feed_eof=True):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        if feed_eof:
+            reader.feed_eof()
+        return await api_server._read_request(reader)
+    return asyncio.run(read())
+
+
+def test_requests_are_read_with_their_headers():
+    request = read_request(b"GET /api HTTP/1.1\r\nHost: localhost\r\nAccept-Encoding: gzip\r\n\r\n")
+    assert request == ("GET", "/api", "HTTP/1.1", {"host": "localhost", "accept-encoding": "gzip"})
+
+
+def test_requests_with_too_many_headers_are_refused():
+    headers = b"".join(b"X-Header-%d: 1\r\n" % index for index in range(api_server.MAX_HEADERS + 1))
+    with pytest.raises(ValueError):
+        read_request(b"GET /api HTTP/1.1\r\n" + headers + b"\r\n")
+
+
+def test_slow_headers_time_out(monkeypatch):
+    monkeypatch.setattr(api_server, "IDLE_TIMEOUT", 0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        read_request(b"GET /api HTTP/1.1\r\nHost: localhost\r\n", feed_eof=False)
+
+
+def exchange(data):
+    """Sends raw bytes to a running server and returns everything it answers until it closes the connection."""
+    async def run():
+        server = await api_server.start_server(port=0, workers=2)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(data)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+    return asyncio.run(run())
+
+
+def test_request_bodies_are_discarded(api):
+    response = exchange(b"GET /api HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+                        b"GET /api HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert response.count(b"HTTP/1.1 200 OK") == 2
+
+
+def test_connections_close_after_a_chunked_body(api):
+    response = exchange(b"GET /api HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n")
+    assert response.count(b"HTTP/1.1 200 OK") == 1
+    assert b"Connection: close" in response
+
+
+@pytest.mark.parametrize("line", [b"HELLO", b"GET /api", b"GET /api HTTP/1.1 extra", b"GET /api FTP/1.0"])
+def test_malformed_request_lines_get_a_bad_request(api, line):
+    assert exchange(line + b"\r\n\r\n").startswith(b"HTTP/1.1 400 Bad Request")
+
+
+def test_unknown_paths_are_not_revalidated(api):
+    target = "/api/unknown"
+    etag = api.etag(data_analysis.query_cache.version(), target + "?")
+    assert api.respond("GET", target, {"if-none-match": etag})[0] == 404
@@ -0,0 +1,39 @@
+import functools
+
+import pandas as pd
+import pytest
+
+import fetch_github_data
+from cli import main
+
+
+@pytest.fixture
+def api(stub_api, monkeypatch):
+    api = stub_api(total_count=150)
+    monkeypatch.setattr(fetch_github_data, "harvest_topics",
+                        functools.partial(fetch_github_data.harvest_topics, api_url=api.url))
+    return api
+
+
+def test_fetch_since_last_harvest_merges_into_the_topic_csv(api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    fetch = ["fetch", "--topics", "ml", "--cache", "http_cache.db", "--since-last-harvest", "--output-dir", "data"]
+    main(fetch)
+    first = pd.read_csv("data/repo_ml.csv")
+    main(fetch)
+    merged = pd.read_csv("data/repo_ml.csv")
+
+    # The stub answers the incremental query with other repositories, which are added to the first ones
+    assert len(first) == 150
+    assert len(merged) == 300
+    assert set(first["Repository_Name"]) <= set(merged["Repository_Name"])
+    assert not merged.duplicated(subset=["Owner", "Repository_Name"]).any()
+
+
+def test_workers_harvest_with_their_own_token(tmp_path, monkeypatch):
+    import pipeline
+
+    calls = []
+    monkeypatch.setattr(pipeline, "run_harvest_worker", lambda *args, **kwargs: calls.append(kwargs))
+    main(["work", "--queue", str(tmp_path / "queue.db"), "--token", "worker-token"])
+    assert calls[0]["token"] == "worker-token"
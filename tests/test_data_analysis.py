@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+import data_analysis
+from analysis_backends import SQLiteBackend
+from push_to_sqlite import connect_for_load, create_repository_indexes, load_batches
+
+TABLE = "github_repositories"
+ANALYSES = ["most_starred_repositories", "most_forked_repositories", "most_updated_repositories",
+            "most_popular_languages", "most_popular_licenses", "most_popular_contributors",
+            "average_stars_by_language", "average_forks_by_language", "repos_with_OpenIssues",
+            "repo_created_each_year", "most_recently_updated_repo", "distribution_of_licenses",
+            "popular_repo_for_each_language"]
+
+
+def repository_row(index):
+    return (f"repo-{index}", f"owner-{index % 7}", f"Repository {index}", f"https://github.com/repo-{index}",
+            ["Python", "C++", "Go", None][index % 4], f"20{10 + index % 6}-0{1 + index % 9}-10T10:00:00Z",
+            f"2024-0{1 + index % 9}-1{index % 10}T10:00:00Z", (index * 37) % 500 if index % 11 else None,
+            (index * 13) % 90, index % 5, ["MIT License", "Apache License 2.0", None][index % 3],
+            ["ml", "ml;nlp", "sql"][index % 3])
+
+
+def matches(row, language=None, license=None, years=None, topic=None):
+    return ((language is None or row[4] == language) and (license is None or row[10] == license)
+            and (years is None or years[0] <= int(row[5][:4]) <= years[1])
+            and (topic is None or topic in row[11].split(";")))
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    def build(name, rows):
+        path = str(tmp_path / f"{name}.db")
+        conn = connect_for_load(path)
+        load_batches(conn, TABLE, [rows])
+        conn.close()
+        return path
+
+    def use(path):
+        monkeypatch.setattr(data_analysis, "DB_PATH", path)
+        data_analysis.query_cache.clear()
+
+    monkeypatch.setattr(data_analysis, "BACKEND", "sqlite")
+    return build, use
+
+
+@pytest.mark.parametrize("filters", [{"language": "Python"}, {"license": "MIT License"}, {"years": (2012, 2014)},
+                                     {"topic": "ml"}, {"language": "Go", "topic": "nlp", "years": (2012, 2015)}])
+def test_filtered_analyses_match_the_analyses_of_the_filtered_rows(database, filters):
+    build, use = database
+    rows = [repository_row(index) for index in range(120)]
+    everything = build("all", rows)
+    subset = build("subset", [row for row in rows if matches(row, **filters)])
+
+    for name in ANALYSES:
+        use(everything)
+        filtered = getattr(data_analysis, name)(limit=None, **filters)
+        use(subset)
+        expected = getattr(data_analysis, name)(limit=None)
+        assert filtered is not None and not filtered.empty, name
+        pd.testing.assert_frame_equal(filtered, expected, check_dtype=False, obj=name)
+
+
+@pytest.mark.parametrize("sort", sorted(data_analysis.SORT_KEYS))
+def test_every_page_of_repositories_is_an_index_range(tmp_path, sort):
+    conn = connect_for_load(str(tmp_path / "github_data.db"))
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(120)]])
+    create_repository_indexes(conn, TABLE)
+    query, params = data_analysis.repository_page_query(SQLiteBackend(str(tmp_path / "github_data.db")), sort,
+                                                        after=(1, "repo-1", "owner-1"))
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    conn.close()
+
+    assert plan == [f"SEARCH r USING INDEX idx_repositories_{sort} ({data_analysis.SORT_KEYS[sort]}>? AND "
+                    f"({data_analysis.SORT_KEYS[sort]},Repository_Name,Owner)<(?,?,?))"]
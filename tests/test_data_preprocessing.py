@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from data_preprocessing import fill_missing_with_mode, preprocess_github_data
+from push_to_sqlite import COLUMN_NAMES, TOPICS_COLUMN, connect_for_load, load_batches
+from tests.test_data_analysis import TABLE, repository_row
+
+# The most common language is Python overall, but Go among the 'sql' repositories
+TOPIC_ROWS = [("ml-1", "Python", "ml"), ("ml-2", "Python", "ml;sql"), ("ml-3", "Python", "ml"), ("ml-4", None, "ml"),
+              ("sql-1", "Go", "sql"), ("sql-2", "Go", "sql"), ("sql-3", None, "sql")]
+
+
+def topic_row(name, language, topics):
+    return (name, "owner", "A repository", f"https://github.com/owner/{name}", language, "2020-01-01T00:00:00Z",
+            "2024-01-01T00:00:00Z", 1, 1, 1, "MIT License", topics)
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows, columns=COLUMN_NAMES + [TOPICS_COLUMN]).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("per_topic_modes", [False, True])
+def test_streaming_writes_the_same_csv(tmp_path, per_topic_modes):
+    raw = write_csv(tmp_path / "data.csv", [repository_row(index) for index in range(120)])
+    preprocess_github_data(raw, str(tmp_path / "in_memory.csv"), chunksize=7, per_topic_modes=per_topic_modes)
+    preprocess_github_data(raw, str(tmp_path / "streamed.csv"), chunksize=7, streaming=True,
+                           per_topic_modes=per_topic_modes)
+
+    in_memory = pd.read_csv(tmp_path / "in_memory.csv")
+    assert len(in_memory) == 120
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "streamed.csv"), in_memory)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_missing_counts_stay_missing(tmp_path, streaming):
+    rows = [repository_row(index) for index in range(30)]
+    raw = write_csv(tmp_path / "data.csv", rows)
+    preprocess_github_data(raw, str(tmp_path / "cleaned.csv"), chunksize=7, streaming=streaming)
+
+    stars = pd.read_csv(tmp_path / "cleaned.csv")["Number_of_Stars"]
+    assert stars.isna().tolist() == [row[7] is None for row in rows]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_missing_languages_are_filled_per_topic(tmp_path, streaming):
+    raw = write_csv(tmp_path / "data.csv", [topic_row(*row) for row in TOPIC_ROWS])
+    preprocess_github_data(raw, str(tmp_path / "global.csv"), chunksize=3, streaming=streaming)
+    preprocess_github_data(raw, str(tmp_path / "per_topic.csv"), chunksize=3, streaming=streaming,
+                           per_topic_modes=True)
+
+    def languages(name):
+        frame = pd.read_csv(tmp_path / name)
+        return dict(zip(frame["Repository_Name"], frame["Programming_Language"]))
+
+    assert (languages("global.csv")["ml-4"], languages("global.csv")["sql-3"]) == ("Python", "Python")
+    assert (languages("per_topic.csv")["ml-4"], languages("per_topic.csv")["sql-3"]) == ("Python", "Go")
+
+
+def test_fill_missing_with_mode_per_topic(tmp_path):
+    conn = connect_for_load(str(tmp_path / "github_data.db"))
+    load_batches(conn, TABLE, [[topic_row(*row) for row in TOPIC_ROWS + [("other-1", None, "")]]])
+
+    with conn:
+        assert fill_missing_with_mode(conn, TABLE, per_topic=True)["Programming_Language"] == "Python"
+    languages = dict(conn.execute(f'SELECT "Repository_Name", "Programming_Language" FROM "{TABLE}"').fetchall())
+    conn.close()
+    # Repositories without topics get the global mode
+    assert (languages["ml-4"], languages["sql-3"], languages["other-1"]) == ("Python", "Go", "Python")
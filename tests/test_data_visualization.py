@@ -0,0 +1,34 @@
+import json
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("plotly")
+pytest.importorskip("streamlit")
+
+import data_visualization  # noqa: E402
+from data_visualization import most_starred_repositories_figure  # noqa: E402
+
+
+def stars(counts):
+    return pd.DataFrame({"Repository_Name": [f"repo-{index}" for index in range(len(counts))],
+                         "Owner": "owner", "Number_of_Stars": counts})
+
+
+@pytest.fixture(autouse=True)
+def figure_cache():
+    data_visualization.figure_cache.clear()
+    yield data_visualization.figure_cache
+    data_visualization.figure_cache.clear()
+
+
+def test_figures_are_cached_per_frame(figure_cache):
+    first = most_starred_repositories_figure(stars([30, 20, 10]))
+    second = most_starred_repositories_figure(stars([3, 2, 1]))
+    assert first.data[0].x.tolist() == [30, 20, 10]
+    assert second.data[0].x.tolist() == [3, 2, 1]
+
+    shared = most_starred_repositories_figure(stars([3, 2, 1]), shared=True)
+    assert json.loads(shared.to_json()) == json.loads(second.to_json())
+    assert figure_cache.info()["size"] == 2
+    assert figure_cache.info()["hits"] == 1
@@ -0,0 +1,129 @@
+import json
+import time
+from datetime import date
+
+import pytest
+import requests
+
+from fetch_github_data import (SEARCH_RESULT_CAP, RateLimiter, SearchShard, create_session, fetch_search_page,
+                               harvest_topics)
+from stub_github_api import parse_query
+
+CORPUS_SIZE = 2500
+TOPICS = ["topic 0", "topic 1"]
+
+
+@pytest.fixture
+def api(stub_api):
+    # Like GitHub's, the stub's search returns at most SEARCH_RESULT_CAP results per query
+    return stub_api(corpus_size=CORPUS_SIZE)
+
+
+def keys(frame):
+    return list(zip(frame["Owner"], frame["Repository_Name"])) if not frame.empty else []
+
+
+def corpus_keys(api, topic):
+    return {(repo["owner"]["login"], repo["name"]) for repo in api.corpus(topic)}
+
+
+def test_unsharded_topics_stop_at_the_search_cap(api):
+    results = harvest_topics(TOPICS, api_url=api.url, shard=False)
+    for topic in TOPICS:
+        assert len(keys(results[topic])) == SEARCH_RESULT_CAP
+        assert set(keys(results[topic])) < corpus_keys(api, topic)
+
+
+@pytest.mark.parametrize("workers, graphql", [(1, False), (8, False), (8, True)])
+def test_sharded_topics_get_every_repository_exactly_once(api, workers, graphql):
+    results = harvest_topics(TOPICS, max_workers=workers, api_url=api.url, graphql=graphql)
+    for topic in TOPICS:
+        harvested = keys(results[topic])
+        assert len(harvested) == len(set(harvested))
+        assert set(harvested) == corpus_keys(api, topic)
+    # Only the shards are paged through, the capped topic queries are split after their first page
+    assert all(parse_query(query)[1] for query, page in api.served if page > 1)
+
+
+def test_shards_split_into_disjoint_halves():
+    today = date(2024, 10, 6)
+    shard = SearchShard((date(2024, 1, 1), None), (10, None))
+    first, second = shard.split(today)
+    assert first.created == (date(2024, 1, 1), date(2024, 5, 19))
+    assert second.created == (date(2024, 5, 20), None)
+    assert first.stars == second.stars == (10, None)
+
+    day = SearchShard((today, today), (10, None))
+    assert [half.stars for half in day.split(today)] == [(10, 29), (30, None)]
+    assert SearchShard((today, today), (10, 10)).split(today) == []
+
+
+@pytest.mark.parametrize("qualifiers", ["", "created:2024-01-01..2024-05-19", "created:>=2024-05-20 stars:<=29",
+                                        "stars:>=30"])
+def test_shards_round_trip_through_their_qualifiers(qualifiers):
+    assert SearchShard.from_qualifiers(qualifiers).qualifiers() == qualifiers
+
+
+def response(status, headers=None, body=None):
+    reply = requests.Response()
+    reply.status_code = status
+    reply.headers.update(headers or {})
+    reply._content = json.dumps(body if body is not None else {}).encode()
+    return reply
+
+
+class ReplayingSession:
+    """Answers every request with the next of the given responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def get(self, url, **kwargs):
+        self.requests += 1
+        return self.responses.pop(0)
+
+
+def test_sessions_authenticate_with_the_given_token_or_the_environment(monkeypatch):
+    monkeypatch.setenv("GITHUB_API_TOKEN", "environment-token")
+    assert create_session("given-token").headers["Authorization"] == "Bearer given-token"
+    assert create_session().headers["Authorization"] == "Bearer environment-token"
+    monkeypatch.delenv("GITHUB_API_TOKEN")
+    session = create_session(pool_size=3)
+    assert "Authorization" not in session.headers
+    assert session.get_adapter("https://api.github.com")._pool_maxsize == 3
+
+
+def test_the_limiter_waits_for_the_reset_once_the_quota_is_used():
+    limiter = RateLimiter()
+    limiter.update(response(200, {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": str(time.time() + 0.2)}))
+    started = time.perf_counter()
+    limiter.acquire()
+    assert limiter.remaining == 0
+    limiter.acquire()
+    assert time.perf_counter() - started >= 0.15
+
+
+@pytest.mark.parametrize("reply, blocked", [
+    (response(429), 60), (response(403, {"Retry-After": "5"}), 5),
+    (response(403, body={"message": "You have exceeded a secondary rate limit."}), 60),
+    (response(403, body={"message": "Resource not accessible by integration"}), 0),
+])
+def test_the_limiter_only_backs_off_on_rate_limits(reply, blocked):
+    limiter = RateLimiter()
+    limiter.update(reply)
+    assert max(limiter.blocked_until - time.time(), 0) == pytest.approx(blocked, abs=1)
+
+
+def test_forbidden_pages_fail_without_retries():
+    session = ReplayingSession(response(403, body={"message": "Bad credentials"}))
+    assert fetch_search_page(session, RateLimiter(), "https://api.github.com/search/repositories", {"q": "ml"}) is None
+    assert session.requests == 1
+
+
+def test_rate_limited_pages_are_retried(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    session = ReplayingSession(response(403, {"Retry-After": "0"}), response(200, body={"items": []}))
+    page = fetch_search_page(session, RateLimiter(), "https://api.github.com/search/repositories", {"q": "ml"})
+    assert page == {"items": []}
+    assert session.requests == 2
@@ -0,0 +1,50 @@
+import requests
+
+from fetch_github_data import RateLimiter
+from fetch_github_graphql import fetch_graphql_page, iter_graphql_pages, page_size, query_cost
+
+TOPIC = "machine learning"
+
+
+def test_query_cost_counts_every_connection():
+    # The search, then the issues, pull requests, topics and releases of every repository
+    assert query_cost(100) == (100 * (1 + 1 + 1 + 10 + 1), 4)
+    assert query_cost(1, topics=0) == (4, 1)
+    assert page_size() == 100
+    assert page_size(max_nodes=500) == 500 // 14
+
+
+def test_the_node_budget_shrinks_the_pages(stub_api):
+    api = stub_api(corpus_size=120)
+    pages = list(iter_graphql_pages([TOPIC], pages=2, api_url=api.url, max_nodes=500))
+
+    # Two pages of 100 repositories become four pages of 35 within the budget
+    assert sorted(page for _, _, page, _ in pages) == [1, 2, 3, 4]
+    assert sorted(len(items) for *_, items in pages) == [15, 35, 35, 35]
+    assert sorted(api.served.values()) == [1, 1, 1, 1]
+
+
+def test_the_limiter_is_reconciled_with_the_reported_cost(stub_api):
+    api = stub_api(corpus_size=120, quota=50)
+    limiter = RateLimiter()
+    limiter.remaining = 50
+    data = fetch_graphql_page(requests.Session(), limiter, f"{api.url}/graphql",
+                              {"query": TOPIC, "first": 100, "after": None, "topics": 10}, cost=10)
+
+    # The query reserved 10 points, cost 4, and the stub counted it as one request
+    assert data["rateLimit"] == {"cost": 4, "remaining": 49, "resetAt": None}
+    assert limiter.remaining == 49
+
+
+def test_settle_gives_back_overestimated_points():
+    limiter = RateLimiter()
+    limiter.remaining = 100
+    limiter.acquire(10)
+    limiter.settle(10, 4, remaining=200, reset_at="2026-01-01T00:00:00Z")
+    assert limiter.remaining == 96
+    assert limiter.reset_at == 1767225600.0
+
+    # Never more than the API reports, as other clients may share the quota
+    limiter.acquire(4)
+    limiter.settle(4, 4, remaining=50)
+    assert limiter.remaining == 50
@@ -0,0 +1,56 @@
+import time
+
+from harvest_jobs import HarvestQueue
+
+TASKS = [("ml", "machine learning", "", 1), ("nlp", "nlp", "", 1)]
+
+
+def drain(queue, worker="worker"):
+    while (task := queue.claim(worker)) is not None:
+        queue.complete(task[0], worker)
+
+
+def test_a_harvest_seeded_into_a_drained_queue_starts_anew(tmp_path):
+    queue = HarvestQueue(str(tmp_path / "queue.db"))
+    worker_queue = HarvestQueue(str(tmp_path / "queue.db"))
+    assert queue.enqueue(TASKS) == 2
+    first_started_at = queue.started_at
+
+    # Tasks added while the harvest runs belong to it
+    time.sleep(0.01)
+    queue.enqueue([("sql", "sql", "", 1)])
+    assert queue.started_at == first_started_at
+    drain(queue)
+    assert queue.claim_finalization()
+
+    time.sleep(0.01)
+    assert queue.enqueue(TASKS) == 2
+    assert queue.started_at > first_started_at
+    assert worker_queue.started_at == queue.started_at
+    assert queue.counts() == {"queued": 2, "leased": 0, "done": 0, "failed": 0}
+    queue.close()
+    worker_queue.close()
+
+
+def test_failed_tasks_of_the_last_harvest_are_queued_again(tmp_path):
+    queue = HarvestQueue(str(tmp_path / "queue.db"), max_attempts=1)
+    queue.enqueue(TASKS[:1])
+    task_id = queue.claim("worker")[0]
+    queue.fail(task_id, "worker", retry_at=0)
+    assert queue.counts()["failed"] == 1
+
+    assert queue.enqueue(TASKS[:1]) == 1
+    assert queue.counts() == {"queued": 1, "leased": 0, "done": 0, "failed": 0}
+    queue.close()
+
+
+def test_enqueueing_nothing_new_keeps_the_harvest_finalized(tmp_path):
+    queue = HarvestQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(TASKS)
+    assert queue.enqueue(TASKS) == 0
+    drain(queue)
+    assert queue.claim_finalization()
+
+    assert queue.enqueue([]) == 0
+    assert not queue.claim_finalization()
+    queue.close()
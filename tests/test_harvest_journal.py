@@ -0,0 +1,66 @@
+import sqlite3
+
+import pytest
+
+import fetch_github_data
+from fetch_github_data import iter_search_pages
+from harvest_jobs import HarvestJournal
+
+TOPICS = ["machine learning"]
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(fetch_github_data, "RETRY_BASE_DELAY", 0.001)
+
+
+def job_statuses(journal):
+    with sqlite3.connect(journal.path) as conn:
+        return [status for status, in conn.execute("SELECT status FROM harvest_jobs ORDER BY job_id")]
+
+
+class FlakyPages:
+    """Fails the requests of some pages until they have been made a number of times."""
+
+    def __init__(self, api, fetch_search_page):
+        self.api, self.fetch_search_page, self.failures = api, fetch_search_page, {}
+
+    def __call__(self, session, limiter, url, params, **kwargs):
+        if self.failures.get(params["page"], 0) > 0:
+            self.failures[params["page"]] -= 1
+            return None
+        return self.fetch_search_page(session, limiter, url, params, **kwargs)
+
+
+@pytest.fixture
+def flaky(stub_api, monkeypatch):
+    api = stub_api(total_count=500)
+    flaky = FlakyPages(api, fetch_github_data.fetch_search_page)
+    monkeypatch.setattr(fetch_github_data, "fetch_search_page", flaky)
+    return flaky
+
+
+def test_failed_pages_are_retried_within_the_run(flaky, tmp_path):
+    journal = HarvestJournal(str(tmp_path / "harvest_jobs.db"), max_attempts=3)
+    flaky.failures = {2: 2, 4: 1}
+    pages = list(iter_search_pages(TOPICS, per_page=100, api_url=flaky.api.url, journal=journal))
+
+    assert sorted(page for *_, page, items in pages) == [1, 2, 3, 4, 5]
+    assert all(items for *_, items in pages)
+    assert job_statuses(journal) == ["complete"]
+
+
+def test_jobs_with_missing_pages_fail_and_resume(flaky, tmp_path):
+    journal = HarvestJournal(str(tmp_path / "harvest_jobs.db"), max_attempts=2)
+    flaky.failures = {3: 2}
+    pages = list(iter_search_pages(TOPICS, per_page=100, api_url=flaky.api.url, journal=journal))
+
+    assert [page for *_, page, items in pages if items is None] == [3]
+    assert job_statuses(journal) == ["failed"]
+
+    flaky.api.served.clear()
+    pages = list(iter_search_pages(TOPICS, per_page=100, api_url=flaky.api.url, journal=journal))
+    assert all(items is not None for *_, items in pages)
+    # The resumed job only fetched the page that failed
+    assert list(flaky.api.served) == [("machine learning", 3)]
+    assert job_statuses(journal) == ["complete"]
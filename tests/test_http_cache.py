@@ -0,0 +1,68 @@
+import time
+
+import requests
+
+from fetch_github_data import RateLimiter, create_session, fetch_search_page
+from http_cache import ResponseCache
+
+
+def page(body, **headers):
+    reply = requests.Response()
+    reply.status_code = 200
+    reply.headers.update({name.replace("_", "-"): value for name, value in headers.items()})
+    reply._content = body
+    return reply
+
+
+def test_pages_are_revalidated_with_their_etag(stub_api, tmp_path):
+    api = stub_api(total_count=50)
+    cache = ResponseCache(str(tmp_path / "http_cache.db"))
+    url, params = f"{api.url}/search/repositories", {"q": "ml", "per_page": 50, "page": 1}
+
+    first = fetch_search_page(create_session(), RateLimiter(), url, params, cache=cache)
+    second = fetch_search_page(create_session(), RateLimiter(), url, params, cache=cache)
+    assert second == first
+    # Only the first request was looked up in vain, the second was answered with a 304
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert sum(api.served.values()) == 1
+    cache.close()
+
+
+def test_last_modified_validators_are_sent_back(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"))
+    cache.store("https://api.github.com/a", page(b"{}", Last_Modified="Sun, 06 Oct 2024 08:45:02 GMT"))
+    cache.store("https://api.github.com/b", page(b"{}"))
+
+    assert cache.conditional_headers("https://api.github.com/a") == {
+        "If-Modified-Since": "Sun, 06 Oct 2024 08:45:02 GMT"}
+    # Responses without validators cannot be revalidated and are not kept
+    assert cache.conditional_headers("https://api.github.com/b") == {}
+    assert cache.revalidated("https://api.github.com/a") == b"{}"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"), ttl=0.05)
+    cache.store("https://api.github.com/a", page(b"{}", ETag='"a"'))
+    assert cache.lookup("https://api.github.com/a") == ('"a"', None, b"{}")
+
+    time.sleep(0.1)
+    assert cache.lookup("https://api.github.com/a") is None
+    assert cache.misses == 1
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted_beyond_the_size_limit(tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"), max_bytes=20)
+    for name in "abc":
+        if name == "c":
+            # Revalidating 'a' makes 'b' the least recently used entry
+            cache.revalidated("https://api.github.com/a")
+        cache.store(f"https://api.github.com/{name}", page(b"x" * 10, ETag=f'"{name}"'))
+        time.sleep(0.01)
+
+    assert cache.lookup("https://api.github.com/b") is None
+    assert cache.lookup("https://api.github.com/a") is not None
+    assert cache.lookup("https://api.github.com/c") is not None
+    cache.close()
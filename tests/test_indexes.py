@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+import data_analysis
+from push_to_sqlite import connect_for_load, create_repository_indexes, load_batches
+
+TABLE = "github_repositories"
+ANALYSES = ["most_starred_repositories", "most_forked_repositories", "most_updated_repositories",
+            "most_popular_languages", "most_popular_licenses", "most_popular_contributors",
+            "average_stars_by_language", "average_forks_by_language", "repos_with_OpenIssues",
+            "repo_created_each_year", "most_recently_updated_repo", "distribution_of_licenses",
+            "popular_repo_for_each_language"]
+
+
+def repository_row(index):
+    return (f"repo-{index}", f"owner-{index % 70}", f"Repository {index}", f"https://github.com/repo-{index}",
+            ["Python", "C++", "Go", None][index % 4], f"20{10 + index % 9}-01-01T10:00:00Z",
+            f"2024-01-{1 + index % 28:02d}T10:00:00Z", index, (index * 3) % 100, index % 5,
+            ["MIT License", None][index % 2], ["ml", "ml;nlp"][index % 2])
+
+
+@pytest.fixture(scope="module")
+def db_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("indexes") / "github_data.db")
+    conn = connect_for_load(path)
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(3000)]])
+    create_repository_indexes(conn, TABLE)
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def conn(db_path, monkeypatch):
+    monkeypatch.setattr(data_analysis, "DB_PATH", db_path)
+    conn = connect_for_load(db_path)
+    yield conn
+    conn.close()
+
+
+def query_plan(conn, monkeypatch, analysis, **filters):
+    """Returns the EXPLAIN QUERY PLAN steps of the query an analysis runs."""
+    captured = []
+    monkeypatch.setattr(data_analysis, "read_query",
+                        lambda query, analysis=None, params=(), **options: captured.append((query, params))
+                        or pd.DataFrame())
+    getattr(data_analysis, analysis).__wrapped__(**filters)
+    query, params = captured[0]
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+
+
+@pytest.mark.parametrize("analysis", ANALYSES)
+def test_analyses_read_the_repositories_through_an_index(conn, monkeypatch, analysis):
+    plan = query_plan(conn, monkeypatch, analysis)
+    table_steps = [step for step in plan if TABLE in step]
+    assert all("INDEX" in step for step in table_steps), plan
+    # The per-group analyses read the rollups only
+    assert table_steps or all(step.split()[1].startswith("summary_") for step in plan if step.startswith("SCAN")), plan
+
+
+@pytest.mark.parametrize("filters", [{"language": "Go"}, {"years": (2012, 2014)}])
+@pytest.mark.parametrize("analysis", ANALYSES)
+def test_filtered_analyses_read_the_repositories_through_an_index(conn, monkeypatch, analysis, filters):
+    plan = query_plan(conn, monkeypatch, analysis, **filters)
+    table_steps = [step for step in plan if step.split()[:2] in (["SCAN", "r"], ["SEARCH", "r"])]
+    assert table_steps and all("INDEX" in step for step in table_steps), plan
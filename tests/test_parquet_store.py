@@ -0,0 +1,71 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from data_preprocessing import preprocess_github_data
+from parquet_store import SNAPSHOT_NAME, load_repositories, write_parquet_store, write_snapshot
+from push_to_sqlite import COLUMN_NAMES
+
+
+def harvest_csv(directory, stars):
+    """Writes a preprocessed CSV of three repositories having the given stars."""
+    raw, cleaned = os.path.join(directory, "data.csv"), os.path.join(directory, "cleaned_data.csv")
+    pd.DataFrame([(f"repo-{index}", "owner", "A repository", f"https://github.com/owner/repo-{index}", "Python",
+                   "2020-01-01T10:00:00Z", "2024-01-01T10:00:00Z", stars, 1, 0, "MIT License", "ml")
+                  for index in range(3)], columns=COLUMN_NAMES + ["Topics"]).to_csv(raw, index=False)
+    preprocess_github_data(raw, cleaned)
+    return cleaned
+
+
+def test_snapshot_never_hides_newer_partitions(tmp_path):
+    store = str(tmp_path / "parquet")
+    write_parquet_store(harvest_csv(tmp_path, stars=10), store, harvest_date="2024-01-01")
+    write_snapshot(store)
+    assert load_repositories(store)["Number_of_Stars"].tolist() == [10, 10, 10]
+
+    write_parquet_store(harvest_csv(tmp_path, stars=20), store, harvest_date="2024-02-01")
+    assert not os.path.exists(os.path.join(store, SNAPSHOT_NAME))
+    assert load_repositories(store)["Number_of_Stars"].tolist() == [20, 20, 20]
+
+
+def test_snapshot_older_than_a_partition_is_ignored(tmp_path):
+    store = str(tmp_path / "parquet")
+    write_parquet_store(harvest_csv(tmp_path, stars=10), store, harvest_date="2024-01-01")
+    write_snapshot(store)
+    snapshot = os.path.join(store, SNAPSHOT_NAME)
+    os.replace(snapshot, snapshot + ".kept")
+    write_parquet_store(harvest_csv(tmp_path, stars=20), store, harvest_date="2024-02-01")
+    # A snapshot left behind by a process that wrote it before the latest partitions
+    os.replace(snapshot + ".kept", snapshot)
+    os.utime(snapshot, (0, 0))
+
+    assert load_repositories(store)["Number_of_Stars"].tolist() == [20, 20, 20]
+
+
+def test_arrow_backend_serves_the_analyses_from_the_snapshot(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    import data_analysis
+    from analysis_backends import close_all_backends
+
+    store = str(tmp_path / "parquet")
+    write_parquet_store(harvest_csv(tmp_path, stars=10), store, harvest_date="2024-01-01")
+    write_snapshot(store)
+    monkeypatch.setattr(data_analysis, "BACKEND", "arrow")
+    monkeypatch.setattr(data_analysis, "SOURCE", store)
+    monkeypatch.setattr(data_analysis, "_warmed_version", None)
+    data_analysis.query_cache.clear()
+    try:
+        assert data_analysis.warm_cache()
+        hits = data_analysis.cache_info()["hits"]
+        assert data_analysis.most_starred_repositories()["Number_of_Stars"].tolist() == [10, 10, 10]
+        assert data_analysis.cache_info()["hits"] == hits + 1
+        assert data_analysis.most_starred_repositories(language="Python")["Number_of_Stars"].tolist() == [10] * 3
+
+        # A new harvest is a new dataset version, read from the partitions until the next snapshot
+        write_parquet_store(harvest_csv(tmp_path, stars=20), store, harvest_date="2024-02-01")
+        assert data_analysis.most_starred_repositories()["Number_of_Stars"].tolist() == [20, 20, 20]
+    finally:
+        close_all_backends()
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+import fetch_github_data
+from http_cache import ResponseCache
+from pipeline import replay_archive, run_pipeline
+from response_archive import ResponseArchive
+
+TABLE = "github_repositories"
+
+
+@pytest.fixture
+def api(stub_api):
+    return stub_api(total_count=250)
+
+
+def test_streaming_runs_record_harvests_for_since_last_harvest(api, tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"))
+    topics = {"ml": "machine learning"}
+    run_pipeline(topics, str(tmp_path / "github_data.db"), TABLE, api_url=api.url, cache=cache,
+                 since_last_harvest=True)
+    harvested_at = cache.last_harvested_at("machine learning")
+    assert harvested_at is not None
+
+    api.served.clear()
+    run_pipeline(topics, str(tmp_path / "github_data.db"), TABLE, api_url=api.url, cache=cache,
+                 since_last_harvest=True)
+    assert {query for query, _ in api.served} == {f"machine learning pushed:>{harvested_at}"}
+
+
+def test_topics_with_failed_pages_are_not_recorded_as_harvested(api, tmp_path):
+    cache = ResponseCache(str(tmp_path / "http_cache.db"))
+    api.failing_pages.add(2)
+    fetch_github_data.RETRY_BASE_DELAY, base_delay = 0.001, fetch_github_data.RETRY_BASE_DELAY
+    try:
+        run_pipeline({"ml": "machine learning"}, str(tmp_path / "github_data.db"), TABLE, api_url=api.url,
+                     cache=cache, since_last_harvest=True)
+    finally:
+        fetch_github_data.RETRY_BASE_DELAY = base_delay
+    assert cache.last_harvested_at("machine learning") is None
+
+
+def table_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT * FROM {TABLE} ORDER BY Owner, Repository_Name").fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("codec, graphql, workers", [("gzip", False, 1), ("gzip", True, 2), ("zstd", False, 2)])
+def test_replayed_archives_rebuild_the_harvested_table(api, tmp_path, codec, graphql, workers):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    archive = ResponseArchive(str(tmp_path / "archive"), codec=codec)
+    topics = {"ml": "machine learning", "nlp": "natural language processing"}
+    run_pipeline(topics, str(tmp_path / "harvested.db"), TABLE, api_url=api.url, graphql=graphql, archive=archive)
+
+    replay_archive(archive, str(tmp_path / "replayed.db"), TABLE, topics=topics, workers=workers)
+    harvested = table_rows(str(tmp_path / "harvested.db"))
+    assert len(harvested) == 500
+    assert table_rows(str(tmp_path / "replayed.db")) == harvested
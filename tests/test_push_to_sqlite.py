@@ -0,0 +1,126 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from analysis_backends import SQLiteBackend
+from cli import main
+from push_to_sqlite import (COLUMN_NAMES, OutdatedSchemaError, connect_for_load, create_rollups, load_batches,
+                           push_data_to_sqlite, schema_is_outdated, upgrade_database)
+
+TABLE = "github_repositories"
+
+
+def repository_row(index, stars=None):
+    return (f"repo-{index}", f"owner-{index % 3}", f"Repository {index}", f"https://github.com/repo-{index}",
+            ["Python", "C++", None][index % 3], f"20{10 + index % 10}-01-0{1 + index % 9}T10:00:00Z",
+            "2024-05-01T10:00:00Z", index * 10 if stars is None else stars, index, index % 4,
+            ["MIT License", None][index % 2])
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect_for_load(str(tmp_path / "github_data.db"))
+    yield conn
+    conn.close()
+
+
+def rollups(conn):
+    return {name: conn.execute(f'SELECT * FROM "{name}" ORDER BY 1').fetchall()
+            for name in ("summary_languages", "summary_licenses", "summary_years",
+                         "summary_top_repository_by_language")}
+
+
+def test_load_stats_are_exact_with_rollup_triggers(conn):
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(10)]])
+    triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert {"trg_rollups_insert", "trg_rollups_update", "trg_rollups_delete"} <= triggers
+
+    # 5 new rows, 5 changed rows and 5 identical rows
+    batch = ([repository_row(index) for index in range(10, 15)]
+             + [repository_row(index, stars=index * 10 + 1) for index in range(5)]
+             + [repository_row(index) for index in range(5, 10)])
+    stats = load_batches(conn, TABLE, [batch[:7], batch[7:]])
+
+    assert (stats["rows"], stats["inserted"], stats["updated"], stats["unchanged"]) == (15, 5, 5, 5)
+
+
+def test_rollups_maintained_by_triggers_match_a_rebuild(conn):
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(10)]])
+    load_batches(conn, TABLE, [[repository_row(index, stars=1000 - index) for index in range(5, 20)]])
+    maintained = rollups(conn)
+
+    conn.execute("BEGIN")
+    create_rollups(conn, TABLE, rebuild=True)
+    conn.execute("COMMIT")
+    assert maintained == rollups(conn)
+
+
+def test_rollup_averages_skip_missing_values(conn):
+    rows = [repository_row(index) for index in range(12)]
+    rows = [row[:7] + (None,) + row[8:] if index % 4 == 0 else row for index, row in enumerate(rows)]
+    load_batches(conn, TABLE, [rows])
+    averages = dict(conn.execute("""
+        SELECT Programming_Language, CAST(Total_Stars AS REAL) / NULLIF(Stars_Count, 0) FROM summary_languages
+    """).fetchall())
+    expected = dict(conn.execute(f"""
+        SELECT COALESCE(Programming_Language, ''), AVG(Number_of_Stars) FROM "{TABLE}" GROUP BY 1
+    """).fetchall())
+    assert averages == pytest.approx(expected)
+
+
+def test_create_rollups_upgrades_older_summary_tables(conn):
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(10)]])
+    expected = rollups(conn)
+    conn.executescript("""
+        DROP TABLE summary_languages;
+        CREATE TABLE summary_languages ("Programming_Language" TEXT PRIMARY KEY, "Repository_Count" INTEGER NOT NULL,
+                                        "Total_Stars" INTEGER NOT NULL, "Total_Forks" INTEGER NOT NULL) WITHOUT ROWID;
+    """)
+    conn.execute("BEGIN")
+    create_rollups(conn, TABLE)
+    conn.execute("COMMIT")
+    assert rollups(conn) == expected
+
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(10, 15)]])
+    maintained = rollups(conn)
+    conn.execute("BEGIN")
+    create_rollups(conn, TABLE, rebuild=True)
+    conn.execute("COMMIT")
+    assert maintained == rollups(conn)
+
+
+def test_older_databases_are_refused_by_the_backend_until_migrated(tmp_path):
+    db_path = str(tmp_path / "github_data.db")
+    # The schema DataFrame.to_sql wrote before the loader kept a primary key and rollups
+    with sqlite3.connect(db_path) as conn:
+        pd.DataFrame([repository_row(index) for index in range(10)], columns=COLUMN_NAMES).to_sql(TABLE, conn)
+    schema = sqlite_schema(db_path)
+
+    with pytest.raises(OutdatedSchemaError, match="migrate"):
+        SQLiteBackend(db_path)
+    # The reader left the database untouched
+    assert sqlite_schema(db_path) == schema
+
+    main(["migrate", "--db", db_path, "--table", TABLE])
+    languages = SQLiteBackend(db_path).run(None, "SELECT * FROM summary_languages ORDER BY 1")
+    assert languages["Repository_Count"].sum() == 10
+    assert upgrade_database(db_path, TABLE) is False
+
+
+def test_loads_migrate_older_databases(tmp_path):
+    db_path, csv_path = str(tmp_path / "github_data.db"), str(tmp_path / "cleaned.csv")
+    with sqlite3.connect(db_path) as conn:
+        pd.DataFrame([repository_row(index) for index in range(10)], columns=COLUMN_NAMES).to_sql(TABLE, conn)
+    pd.DataFrame([repository_row(index) for index in range(5, 15)], columns=COLUMN_NAMES).to_csv(csv_path,
+                                                                                                   index=False)
+
+    assert push_data_to_sqlite(csv_path, db_path, TABLE)["inserted"] == 5
+    with sqlite3.connect(db_path) as conn:
+        assert not schema_is_outdated(conn, TABLE)
+        assert conn.execute("SELECT SUM(Repository_Count) FROM summary_languages").fetchone()[0] == 15
+
+
+def sqlite_schema(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
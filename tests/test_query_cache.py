@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+
+from push_to_sqlite import connect_for_load, load_batches
+from query_cache import QueryCache, dataset_version
+from tests.test_data_analysis import TABLE, repository_row
+
+
+def counted(cache, result):
+    """Returns a cached query function returning `result`, and the list of its calls."""
+    calls = []
+
+    @cache.cached
+    def query(limit=10, offset=0):
+        calls.append((limit, offset))
+        return result
+
+    return query, calls
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QueryCache(version=lambda: 1, maxsize=2)
+    for name in ("first", "second"):
+        cache.put(cache.key(name), pd.DataFrame({"name": [name]}))
+    cache.get(cache.key("first"))
+    cache.put(cache.key("third"), pd.DataFrame({"name": ["third"]}))
+
+    assert cache.get(cache.key("second")) is None
+    assert cache.get(cache.key("first"))["name"].tolist() == ["first"]
+    assert cache.get(cache.key("third"))["name"].tolist() == ["third"]
+    assert cache.info()["size"] == 2
+
+
+def test_new_loads_invalidate_the_cached_results(tmp_path):
+    path = str(tmp_path / "github_data.db")
+    conn = connect_for_load(path)
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(10)]])
+    cache = QueryCache(version=lambda: dataset_version(path))
+    query, calls = counted(cache, pd.DataFrame({"count": [10]}))
+
+    query()
+    query()
+    assert len(calls) == 1
+
+    load_batches(conn, TABLE, [[repository_row(index) for index in range(10, 20)]])
+    conn.close()
+    query()
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("result", [None, pd.DataFrame()])
+def test_failed_queries_are_not_cached(result):
+    cache = QueryCache(version=lambda: 1)
+    query, calls = counted(cache, result)
+
+    query()
+    query()
+    assert len(calls) == 2
+    assert cache.info()["size"] == 0
+
+
+def test_calls_are_keyed_by_their_bound_arguments():
+    cache = QueryCache(version=lambda: 1)
+    query, calls = counted(cache, pd.DataFrame({"count": [10]}))
+
+    query()
+    query(10)
+    query(limit=10, offset=0)
+    query(limit=5)
+    assert calls == [(10, 0), (5, 0)]
+    assert query.cache_key() == query.cache_key(limit=10, offset=0)
+    assert cache.info() == {"hits": 2, "misses": 2, "size": 2, "maxsize": 128}
+
+
+def test_cached_figures_are_copied():
+    go = pytest.importorskip("plotly.graph_objects")
+    cache = QueryCache(version=lambda: 1)
+    key = cache.key("figure")
+    cache.put(key, go.Figure(go.Bar(x=["Python"], y=[3])))
+
+    figure = cache.get(key)
+    figure.update_layout(title="Changed by one session")
+    figure.data[0].y = (4,)
+
+    cached = cache.get(key)
+    assert isinstance(cached, go.Figure)
+    assert cached.layout.title.text is None
+    assert cached.data[0].y == (3,)
+
+
+def test_cached_figures_keep_their_template():
+    go = pytest.importorskip("plotly.graph_objects")
+    cache = QueryCache(version=lambda: 1)
+    key = cache.key("figure")
+    cache.put(key, go.Figure(go.Bar(x=["Python"], y=[3]), layout={"template": "plotly_dark"}))
+
+    assert cache.get(key).layout.template == go.Figure(layout={"template": "plotly_dark"}).layout.template
+
+
+def test_shared_figures_are_built_once():
+    go = pytest.importorskip("plotly.graph_objects")
+    cache = QueryCache(version=lambda: 1)
+    key = cache.key("figure")
+    figure = go.Figure(go.Bar(x=["Python"], y=[3]))
+    cache.put(key, figure)
+
+    shared = cache.get(key, copy=False)
+    assert shared is not figure
+    assert cache.get(key, copy=False) is shared
+    assert cache.get(key) is not shared
+    assert shared.data[0].y == (3,)